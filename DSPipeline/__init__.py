@@ -1,23 +1,39 @@
-from .data_managing import split_x_y
-from .data_transformations import StandardScalerStep, PCAStep, PolyStep
-from .ds_pipeline import EmptyStep, Pipeline
-from .feature_selection import PearsonCorrStep, TreeSelectionStep, ListSelectionStep, ChiSqSelectionStep, LassoSelectionStep
-from .outlier_detection import ABODStep, IsoForestStep, LOFStep
+# The steps are loaded the first time they are accessed, so that importing DSPipeline does not load sklearn, pyod or imblearn
+import importlib
 
-__all__ = [
-    "split_x_y",
-    "StandardScalerStep",
-    "PCAStep",
-    "PolyStep",
-    "SinStep",
-    "EmptyStep",
-    "Pipeline",
-    "PearsonCorrStep",
-    "TreeSelectionStep",
-    "ListSelectionStep",
-    "ChiSqSelectionStep",
-    "LassoSelectionStep",
-    "ABODStep",
-    "IsoForestStep",
-    "LOFStep"
-]
\ No newline at end of file
+_LOCATIONS = {
+    "CompiledPipeline": "compiled",
+    "InferencePipeline": "compiled",
+    "split_x_y": "data_managing",
+    "StandardScalerStep": "data_transformations",
+    "PCAStep": "data_transformations",
+    "PolyStep": "data_transformations",
+    "SinStep": "data_transformations",
+    "DAGPipeline": "ds_pipeline",
+    "EmptyStep": "ds_pipeline",
+    "Pipeline": "ds_pipeline",
+    "PearsonCorrStep": "feature_selection",
+    "PolyScreenStep": "feature_selection",
+    "TreeSelectionStep": "feature_selection",
+    "ListSelectionStep": "feature_selection",
+    "ChiSqSelectionStep": "feature_selection",
+    "LassoSelectionStep": "feature_selection",
+    "ABODStep": "outlier_detection",
+    "IsoForestStep": "outlier_detection",
+    "LOFStep": "outlier_detection",
+    "PipelineProfiler": "profiling",
+    "PrefixSearch": "search",
+    "AsyncPipelineRunner": "serving"
+}
+
+__all__ = list(_LOCATIONS)
+
+def __getattr__(name):
+    if name not in _LOCATIONS:
+        raise AttributeError(f"module {__name__} has no attribute {name}")
+    value = getattr(importlib.import_module(f".{_LOCATIONS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
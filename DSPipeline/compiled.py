@@ -0,0 +1,264 @@
+# External Imports
+import numpy as np
+import pandas as pd
+
+# Internal Imports
+from .data_managing import check_dense, float_dtype
+
+################################################################################################
+# COMPILED PIPELINE
+################################################################################################
+class CompiledPipeline():
+    def __init__(self, pipeline):
+        """ Transforms data with a fitted pipeline by passing a single float ndarray between the steps instead of a new DataFrame for each step. The array has the pipeline's dtype, or float32 when the pipeline has none and every column of the data is float32, and float64 otherwise. Steps with a compile_kernel method are turned into functions on the array and its column names are worked out once, so a DataFrame is only built for the final output. Steps without one, and steps that change the number of samples, are given a DataFrame built around the array and transform it as usual. Use Pipeline.compile to create one.
+
+        Parameters
+        ----------
+        pipeline (Pipeline) : the fitted pipeline to compile
+        """
+        self.pipeline = pipeline
+        self.description = f"Compiled {pipeline.description}"
+        self.plans = {}
+
+    def transform(self, X, y=None, allow_sample_removal=True):
+        """ Transforms the given data using the compiled steps
+
+        Parameters
+        ----------
+        X (DataFrame) : the data to transform
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        allow_sample_removal (bool, default=True) : Whether or not the pipeline is allowed to remove any samples from the data frame
+
+        Returns
+        -------
+        (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
+        """
+        check_dense(X, self.description)
+        dtype = getattr(self.pipeline, 'dtype', None)
+        dtype = float_dtype(X) if dtype is None else dtype
+        key = (tuple(X.columns), allow_sample_removal, dtype)
+        if key not in self.plans:
+            steps = [step for step in self.pipeline.steps if allow_sample_removal or not step.changes_num_samples]
+            self.plans[key] = _Plan(steps, X.columns, dtype)
+        source = as_array(X, dtype)
+        data, columns, y = self.plans[key].run(source, y)
+        if self.pipeline.append_input:
+            data = append_columns(source, data)
+            columns = X.columns.append(columns)
+
+        # Steps that transform a DataFrame may still return float64
+        data = data.astype(dtype, copy=False)
+
+        # Samples are only kept in line with the given index when none were removed
+        index = X.index if data.shape[0] == X.shape[0] else None
+        new_X = pd.DataFrame(data, columns=columns, index=index, copy=False)
+        if y is None:
+            return new_X
+        return new_X, y
+
+class _Plan():
+    def __init__(self, steps, columns, dtype):
+        """ The compiled kernels of a list of steps for one set of input columns and float type. Steps that are run on a DataFrame have no kernel, and the steps after them are compiled once the columns of their output are known. """
+        self.steps = steps
+        self.dtype = dtype
+        self.entries = []
+        self._compile_from(0, columns)
+
+    def _compile_from(self, start, columns):
+        """ Compiles the steps from start up to and including the next step without a kernel """
+        del self.entries[start:]
+        for step in self.steps[start:]:
+            compiled = compile_step(step, columns, self.dtype)
+            if compiled is None:
+                self.entries.append((step, None, columns))
+                return
+            kernel, out_columns = compiled
+            self.entries.append((step, kernel, columns))
+            columns = out_columns
+        self.out_columns = columns
+
+    def run(self, source, y):
+        """ Runs the steps on an array and returns the output array, its columns and the y data """
+        data = source
+        i = 0
+        while i < len(self.steps):
+            step, kernel, columns = self.entries[i]
+            if kernel is not None:
+                # Buffers made by an earlier kernel can be overwritten, but the input data cannot
+                data = kernel(data, not np.may_share_memory(data, source))
+                i += 1
+                continue
+
+            frame = pd.DataFrame(data, columns=columns, copy=False)
+            if y is None:
+                frame = step.transform(frame)
+            else:
+                frame, y = step.transform(frame, y=y)
+            data = as_array(frame, self.dtype)
+            i += 1
+            if i == len(self.entries) or not self.entries[i][2].equals(frame.columns):
+                self._compile_from(i, frame.columns)
+        if not self.entries or self.entries[-1][1] is not None:
+            return data, self.out_columns, y
+        return data, frame.columns, y
+
+################################################################################################
+# INFERENCE PIPELINE
+################################################################################################
+class InferencePipeline():
+    def __init__(self, pipeline, columns):
+        """ Transforms single records with a fitted pipeline for low latency serving. The steps are compiled once into functions on a one row array, so transforming a record does not build any DataFrames or validate its input with sklearn. Steps that remove samples are skipped. Use Pipeline.compile_for_inference to create one.
+
+        Parameters
+        ----------
+        pipeline (Pipeline) : the fitted pipeline to compile
+
+        columns (list) : the input columns, in the order of the values of array records
+        """
+        self.input_columns = list(columns)
+        self.append_input = pipeline.append_input
+        self.dtype = np.dtype(np.float64) if getattr(pipeline, 'dtype', None) is None else pipeline.dtype
+        self.kernels = []
+        out_columns = pd.Index(columns)
+        for step in pipeline.steps:
+            if step.changes_num_samples:
+                continue
+            compiled = compile_step(step, out_columns, self.dtype)
+            if compiled is None:
+                raise TypeError(f'{step.description} step cannot be compiled for inference')
+            kernel, out_columns = compiled
+            self.kernels.append(kernel)
+        if self.append_input:
+            out_columns = pd.Index(columns).append(out_columns)
+        self.columns = list(out_columns)
+
+    def __call__(self, record):
+        """ Transforms a single record
+
+        Parameters
+        ----------
+        record (object) : a dict mapping each input column to its value, or a 1-D array of the values in the order of input_columns. A 2-D array of several records is also accepted.
+
+        Returns
+        -------
+        (ndarray) : the transformed values, in the order of columns
+        """
+        # The record is copied once so the kernels can work in place, unless the input is appended to the output
+        if isinstance(record, dict):
+            source = np.array([record[c] for c in self.input_columns], dtype=self.dtype)
+        else:
+            source = np.array(record, dtype=self.dtype)
+        source_owned = not self.append_input
+        single = source.ndim == 1
+        if single:
+            source = source.reshape(1, -1)
+        if source.shape[1] != len(self.input_columns):
+            raise ValueError(f'Expected {len(self.input_columns)} values, got {source.shape[1]}')
+
+        data = source
+        for kernel in self.kernels:
+            data = kernel(data, source_owned or not np.may_share_memory(data, source))
+        if self.append_input:
+            data = append_columns(source, data)
+        if single:
+            return data[0]
+        return data
+
+################################################################################################
+# KERNEL HELPERS
+################################################################################################
+def compile_step(step, columns, dtype=np.float64):
+    """ Returns the (kernel, output columns) pair of a fitted step for the given input columns and float type, or None if the step has to transform a DataFrame, which includes steps whose compile_kernel returns None """
+    if step.changes_num_samples or not hasattr(step, 'compile_kernel'):
+        return None
+    return step.compile_kernel(pd.Index(columns), dtype=np.dtype(dtype))
+
+def as_array(X, dtype=np.float64):
+    """ Returns the values of a DataFrame as an ndarray of the given float type, without copying them when they already are one """
+    return X.to_numpy(dtype=dtype)
+
+def append_columns(X, new_X):
+    """ Returns a new array with the columns of new_X after the columns of X """
+    out = np.empty((X.shape[0], X.shape[1] + new_X.shape[1]), dtype=np.result_type(X, new_X), order='F')
+    out[:, :X.shape[1]] = X
+    out[:, X.shape[1]:] = new_X
+    return out
+
+def select_kernel(columns, keep):
+    """ Returns the (kernel, output columns) pair for keeping some of the columns
+
+    Parameters
+    ----------
+    columns (Index) : the input columns
+
+    keep (object) : a boolean mask over the input columns or a list of their positions, in the order to keep them
+
+    Returns
+    -------
+    (function, Index) : the kernel and the kept columns
+    """
+    positions = np.asarray(keep)
+    if positions.dtype == bool:
+        positions = np.flatnonzero(positions)
+    out_columns = columns[positions]
+
+    # A run of neighbouring columns is kept as a view instead of a copy
+    if len(positions) > 0 and np.array_equal(positions, np.arange(positions[0], positions[0] + len(positions))):
+        start, stop = positions[0], positions[0] + len(positions)
+        return (lambda X, owned: X[:, start:stop]), out_columns
+    return (lambda X, owned: X[:, positions]), out_columns
+
+def poly_product(X, terms, dtype=np.float64):
+    """ Returns a new array with the product of some of the columns for each polynomial term
+
+    Parameters
+    ----------
+    X (ndarray) : the input data
+
+    terms (list) : a tuple of column positions for each output column, with a position repeated by its power. An empty tuple gives a column of ones.
+
+    dtype (dtype, default=np.float64) : the float type of the products
+
+    Returns
+    -------
+    (ndarray) : the products, with a column for each term
+    """
+    product = np.empty((X.shape[0], len(terms)), dtype=dtype, order='F')
+    for i, term in enumerate(terms):
+        if len(term) == 0:
+            product[:, i] = 1
+            continue
+        col = product[:, i]
+        col[:] = X[:, term[0]]
+        for j in term[1:]:
+            col *= X[:, j]
+    return product
+
+def ufunc_kernel(func, kwargs, positions, append_input):
+    """ Returns a kernel that applies a numpy function to some of the columns, overwriting them when the buffer is owned
+
+    Parameters
+    ----------
+    func (function) : the function to apply
+
+    kwargs (dict) : arguments to pass to the function
+
+    positions (list) : the positions of the columns to apply the function to, or None for all of the columns
+
+    append_input (bool) : whether to append the output to the input columns
+
+    Returns
+    -------
+    (function) : the kernel
+    """
+    in_place = isinstance(func, np.ufunc) and not kwargs and positions is None and not append_input
+    def kernel(X, owned):
+        if in_place and owned:
+            return func(X, out=X)
+        new_X = func(X if positions is None else X[:, positions], **kwargs)
+        if append_input:
+            return append_columns(X, new_X)
+        return new_X
+    return kernel
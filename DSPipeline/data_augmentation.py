@@ -1,10 +1,10 @@
 # External Imports
+# imblearn is imported when a step is fitted, so that importing this module stays fast
 import pandas as pd
 import numpy as np
-from imblearn.over_sampling import ADASYN, SMOTE
 
 # Internal Imports
-from .data_managing import split_x_y
+from .data_managing import check_dense, split_x_y
 from .errors import TransformError
 
 ################################################################################################
@@ -23,6 +23,7 @@ class ADASYNStep():
         self.kwargs = kwargs
         self.fitted = None
         self.changes_num_samples = True
+        self.row_independent = False
 
     def fit(self, X, y=None):
         """ Fits the ADASYN to given data
@@ -37,9 +38,11 @@ class ADASYNStep():
         -------
         (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
+        check_dense(X, self.description)
         if y is None:
             print(f"{self.description} step is supervised and needs target values")
             raise ValueError
+        from imblearn.over_sampling import ADASYN
         self.fitted = ADASYN(**self.kwargs)
         return self.transform(X, y=y)
 
@@ -58,6 +61,7 @@ class ADASYNStep():
         """
         if self.fitted is None:
             raise TransformError
+        check_dense(X, self.description)
 
         X_rs, y_rs = self.fitted.fit_resample(X, y)
         X_rs = pd.DataFrame(X_rs, columns=X.columns)
@@ -68,12 +72,12 @@ class ADASYNStep():
 # Synthetic Minority Over-Sampling Technique (SMOTE)
 ################################################################################################
 class SMOTEStep():
-    def __init__(self, smote_class=SMOTE, kwargs={}):
+    def __init__(self, smote_class=None, kwargs={}):
         """ Uses Synthetic Minority Over-Sampling Technique (SMOTE) to create balanced samples. Uses imblearn’s SMOTE family of classes.
         
         Parameters
         ----------
-        smote_class (object, default=SMOTE) : the smote class to use for the data augmentation. imblearn offers different classes such as SVMSMOTE, KMeansSMOTE, etc.
+        smote_class (object, default=None) : the smote class to use for the data augmentation. If None imblearn's SMOTE is used. imblearn offers different classes such as SVMSMOTE, KMeansSMOTE, etc.
 
         kwargs (dict, default={}) : arguments to pass to the smote_class upon initialization
         """
@@ -82,6 +86,7 @@ class SMOTEStep():
         self.kwargs = kwargs
         self.fitted = None
         self.changes_num_samples = True
+        self.row_independent = False
 
     def fit(self, X, y=None):
         """ Fits the smote_class to given data
@@ -96,7 +101,12 @@ class SMOTEStep():
         -------
         (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
-        self.fitted = self.smote_class(**self.kwargs)
+        check_dense(X, self.description)
+        smote_class = self.smote_class
+        if smote_class is None:
+            from imblearn.over_sampling import SMOTE
+            smote_class = SMOTE
+        self.fitted = smote_class(**self.kwargs)
         if y is None:
             print(f"{self.description} step is supervised and needs target values")
             raise ValueError
@@ -117,6 +127,7 @@ class SMOTEStep():
         """
         if self.fitted is None:
             raise TransformError
+        check_dense(X, self.description)
 
         X_rs, y_rs = self.fitted.fit_resample(X, y)
         X_rs = pd.DataFrame(X_rs, columns=X.columns)
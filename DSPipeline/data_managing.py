@@ -1,4 +1,6 @@
 # External Imports
+from scipy import sparse
+import numpy as np
 import pandas as pd
 
 ################################################################################################
@@ -21,3 +23,89 @@ def split_x_y(data, y_label='label'):
         return data.drop(y_label, axis=1), y_data
     else:
         raise TypeError(f'{__name__}.split_x_y pandas DataFrame, was {str(type(data))}')
+
+def is_sparse_frame(X):
+    """ Returns whether every column of a DataFrame is sparse, as in the output of PolyStep with sparse=True
+    
+    Parameters
+    ----------
+    X (DataFrame) : the data to check
+
+    Returns
+    -------
+    (bool) : whether the DataFrame has columns and all of them are sparse
+    """
+    return X.shape[1] > 0 and all(isinstance(dtype, pd.SparseDtype) for dtype in X.dtypes)
+
+def has_sparse_columns(X):
+    """ Returns whether any column of a DataFrame is sparse
+    
+    Parameters
+    ----------
+    X (DataFrame) : the data to check
+
+    Returns
+    -------
+    (bool) : whether at least one column is sparse
+    """
+    return any(isinstance(dtype, pd.SparseDtype) for dtype in X.dtypes)
+
+def check_dense(X, description):
+    """ Raises a TypeError if a step that only works on dense data is given sparse columns, so that they are never made dense by accident
+    
+    Parameters
+    ----------
+    X (DataFrame) : the data given to the step
+
+    description (str) : the description of the step
+    """
+    if isinstance(X, pd.DataFrame) and has_sparse_columns(X):
+        raise TypeError(f'{description} step does not support sparse data and would make it dense. Convert it with X.sparse.to_dense() first if it fits in memory.')
+
+def as_model_input(X):
+    """ Returns the data to pass to an sklearn model. A DataFrame with sparse columns is turned into a CSR matrix so that it is not made dense, and any other data is returned as it is. Dense columns next to sparse ones are stored as sparse values.
+    
+    Parameters
+    ----------
+    X (DataFrame) : the data
+
+    Returns
+    -------
+    (object) : a CSR matrix of the values of a sparse DataFrame, or the given data
+    """
+    if not isinstance(X, pd.DataFrame) or not has_sparse_columns(X):
+        return X
+    if not is_sparse_frame(X):
+        X = X.astype(pd.SparseDtype(float, 0))
+    return sparse.csr_matrix(X.sparse.to_coo())
+
+def sparse_frame(matrix, columns):
+    """ Returns a DataFrame of sparse columns holding the values of a sparse matrix
+    
+    Parameters
+    ----------
+    matrix (spmatrix) : the values
+
+    columns (list) : the names of the columns
+
+    Returns
+    -------
+    (DataFrame) : the DataFrame, with a fresh index
+    """
+    return pd.DataFrame.sparse.from_spmatrix(matrix, columns=columns)
+
+def float_dtype(X):
+    """ Returns the float type a step should output for the given data, so that data cast to float32 by a pipeline's dtype stays float32
+    
+    Parameters
+    ----------
+    X (DataFrame) : the data given to the step
+
+    Returns
+    -------
+    (dtype) : float32 if every column is float32, and float64 otherwise
+    """
+    dtypes = [dtype.subtype if isinstance(dtype, pd.SparseDtype) else dtype for dtype in X.dtypes]
+    if dtypes and all(dtype == np.float32 for dtype in dtypes):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
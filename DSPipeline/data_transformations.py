@@ -1,12 +1,15 @@
 # External Imports
-from sklearn.decomposition import PCA
+# sklearn's discriminant analysis is imported when LDATransformStep is fitted, so that importing this module stays fast
+from scipy import linalg, sparse
+from scipy.special import comb
+from sklearn.decomposition import PCA, IncrementalPCA, TruncatedSVD
 from sklearn.preprocessing import StandardScaler, PolynomialFeatures
-from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
 import pandas as pd
 import numpy as np
 
 # Internal Imports
-from .data_managing import split_x_y
+from .compiled import append_columns, poly_product, ufunc_kernel
+from .data_managing import as_model_input, check_dense, float_dtype, has_sparse_columns, sparse_frame, split_x_y
 from .errors import TransformError
 
 ################################################################################################
@@ -20,13 +23,15 @@ class StandardScalerStep():
         ----------
         append_input (bool, default=False) : Whether to append the scaled features to the given data, or to only keep the transformed data
 
-        kwargs (dict, default={}) : Arguments to be passed to sklearn’s StandardScaler class
+        kwargs (dict, default={}) : Arguments to be passed to sklearn’s StandardScaler class. Sparse data can only be scaled with {'with_mean': False}, since centering would make it dense.
         """
         self.description = "Standard Scaler"
         self.append_input = append_input
         self.kwargs = kwargs
         self.fitted = None
         self.changes_num_samples = False
+        self.row_independent = True
+        self.in_place = True
 
     def fit(self, X, y=None):
         """ Fits the standard scaler 
@@ -41,11 +46,35 @@ class StandardScalerStep():
         -------
         (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
+        self._check_sparse(X, self.kwargs.get('with_mean', True))
         scaler = StandardScaler(**self.kwargs)  
-        self.fitted = scaler.fit(X)
+        self.fitted = scaler.fit(as_model_input(X))
         return self.transform(X, y=y)
 
-    def transform(self, X, y=None):
+    def partial_fit(self, X, y=None):
+        """ Updates the running mean and variance of the standard scaler with a chunk of the training data
+        
+        Parameters
+        ----------
+        X (DataFrame) : a chunk of the training data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        Returns
+        -------
+        (StandardScalerStep) : the step itself
+        """
+        self._check_sparse(X, self.kwargs.get('with_mean', True))
+        if self.fitted is None:
+            self.fitted = StandardScaler(**self.kwargs)
+        self.fitted.partial_fit(as_model_input(X))
+        return self
+
+    def reset(self):
+        """ Forgets the statistics accumulated by partial_fit, so that the next chunk starts a new fit """
+        self.fitted = None
+
+    def transform(self, X, y=None, copy=True):
         """ Transforms the input data using the previously fitted step 
         
         Parameters
@@ -54,6 +83,8 @@ class StandardScalerStep():
 
         y (DataFrame, default=None) : target values (if needed)
 
+        copy (bool, default=True) : Whether to leave X unchanged. If False the values of X may be scaled in place, so that no new array is made.
+
         Returns
         -------
         (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
@@ -61,7 +92,11 @@ class StandardScalerStep():
         if self.fitted is None:
             raise TransformError
 
-        X_scaled = pd.DataFrame(self.fitted.transform(X), columns=X.columns)
+        if has_sparse_columns(X):
+            self._check_sparse(X, self.fitted.with_mean)
+            X_scaled = sparse_frame(self.fitted.transform(as_model_input(X)), X.columns)
+        else:
+            X_scaled = pd.DataFrame(self.fitted.transform(X, copy=copy or self.append_input), columns=X.columns)
         if self.append_input:
             new_cols = []
             for col in X_scaled.columns:
@@ -73,6 +108,45 @@ class StandardScalerStep():
             return X_scaled
         return X_scaled, y
 
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted step into a function on float ndarrays for CompiledPipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output
+        """
+        if self.fitted is None:
+            raise TransformError
+
+        # The fitted statistics are cast once, so that float32 data is not promoted to float64
+        mean = self.fitted.mean_.astype(dtype) if self.fitted.with_mean else None
+        scale = self.fitted.scale_.astype(dtype) if self.fitted.scale_ is not None else None
+        append_input = self.append_input
+        def kernel(X, owned):
+            X_scaled = X if owned and not append_input else X.copy()
+            if mean is not None:
+                X_scaled -= mean
+            if scale is not None:
+                X_scaled /= scale
+            if append_input:
+                return append_columns(X, X_scaled)
+            return X_scaled
+
+        if append_input:
+            return kernel, columns.append(pd.Index([col + "_scaled" for col in columns]))
+        return kernel, columns
+
+    def _check_sparse(self, X, with_mean):
+        """ Raises a TypeError if sparse data would be centered """
+        if with_mean and has_sparse_columns(X):
+            raise TypeError(f"{self.description} step cannot center sparse data without making it dense, use kwargs={{'with_mean': False}}")
+
 ################################################################################################
 # PCA
 ################################################################################################
@@ -84,13 +158,14 @@ class PCAStep():
         ----------
         append_input (bool, default=False) : Whether to append the scaled features to the given data, or to only keep the transformed data
 
-        kwargs (dict, default={}) : Arguments to be passed to sklearn’s PCA class
+        kwargs (dict, default={}) : Arguments to be passed to sklearn’s PCA class. Sparse data is reduced with sklearn's TruncatedSVD instead, which does not center the data, using the n_components and random_state arguments.
         """
         self.description = 'PCA'
         self.kwargs = kwargs
         self.append_input = append_input
         self.fitted = None
         self.changes_num_samples = False
+        self.row_independent = True
 
     def fit(self, X, y=None):
         """ Fits PCA
@@ -105,10 +180,37 @@ class PCAStep():
         -------
         (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
+        if has_sparse_columns(X):
+            self.fitted = self._truncated_svd(X.shape[1]).fit(as_model_input(X))
+            return self.transform(X, y=y)
         pca_model = PCA(**self.kwargs)
         self.fitted = pca_model.fit(X)
         return self.transform(X, y=y)
 
+    def partial_fit(self, X, y=None):
+        """ Updates the principal components with a chunk of the training data using sklearn's IncrementalPCA, which is given the n_components, whiten and copy arguments of kwargs. n_components must be an integer, and each chunk must have at least as many rows as the number of components.
+        
+        Parameters
+        ----------
+        X (DataFrame) : a chunk of the training data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        Returns
+        -------
+        (PCAStep) : the step itself
+        """
+        if has_sparse_columns(X):
+            raise TypeError(f'{self.description} step cannot be fitted on chunks of sparse data, since sklearn\'s IncrementalPCA makes them dense')
+        if not isinstance(self.fitted, IncrementalPCA):
+            self.fitted = self._incremental_pca()
+        self.fitted.partial_fit(X)
+        return self
+
+    def reset(self):
+        """ Forgets the statistics accumulated by partial_fit, so that the next chunk starts a new fit """
+        self.fitted = None
+
     def transform(self, X, y=None):
         """ Transforms the input data using the previously fitted step 
         
@@ -125,7 +227,13 @@ class PCAStep():
         if self.fitted is None:
             raise TransformError
 
-        pca_data = self.fitted.transform(X)
+        if has_sparse_columns(X):
+            if not isinstance(self.fitted, TruncatedSVD):
+                raise TypeError(f'{self.description} step was fitted on dense data and cannot transform sparse data without making it dense')
+            pca_data = self.fitted.transform(as_model_input(X))
+        else:
+            pca_data = self.fitted.transform(X)
+        pca_data = pca_data.astype(float_dtype(X), copy=False)
         
         # Get column names for post pca dataframe
         cols = []
@@ -141,12 +249,71 @@ class PCAStep():
             return pd.DataFrame(pca_data, columns=cols)
         return pd.DataFrame(pca_data, columns=cols), y
 
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted step into a function on float ndarrays for CompiledPipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output
+        """
+        if self.fitted is None:
+            raise TransformError
+
+        # TruncatedSVD, used for sparse data, does not center or whiten
+        mean = getattr(self.fitted, 'mean_', None)
+        mean = mean.astype(dtype) if mean is not None else None
+        components = self.fitted.components_.T.astype(dtype)
+        scale = np.sqrt(self.fitted.explained_variance_).astype(dtype) if getattr(self.fitted, 'whiten', False) else None
+        append_input = self.append_input
+        def kernel(X, owned):
+            if mean is None:
+                centered = X
+            elif owned and not append_input:
+                centered = X
+                centered -= mean
+            else:
+                centered = X - mean
+            pca_data = centered @ components
+            if scale is not None:
+                pca_data /= scale
+            if append_input:
+                return append_columns(X, pca_data)
+            return pca_data
+
+        cols = pd.Index([f"PC_{i}" for i in range(1, components.shape[1]+1)])
+        if append_input:
+            return kernel, columns.append(cols)
+        return kernel, cols
+
+    def _truncated_svd(self, num_columns):
+        """ Returns sklearn's TruncatedSVD with the arguments of PCA that it supports, for reducing sparse data without centering it """
+        unsupported = [k for k, v in self.kwargs.items() if k not in ('n_components', 'random_state', 'copy') and v]
+        n_components = self.kwargs.get('n_components')
+        if unsupported or (n_components is not None and not isinstance(n_components, int)):
+            raise TypeError(f'{self.description} step reduces sparse data with TruncatedSVD, which only supports an integer n_components and random_state, not {unsupported or n_components}')
+        if n_components is None:
+            n_components = num_columns - 1
+        return TruncatedSVD(n_components=n_components, random_state=self.kwargs.get('random_state'))
+
+    def _incremental_pca(self):
+        """ Returns sklearn's IncrementalPCA with the arguments of PCA that it supports. The other arguments choose how PCA's solver runs, which does not apply to fitting in chunks """
+        n_components = self.kwargs.get('n_components')
+        if n_components is not None and not isinstance(n_components, (int, np.integer)):
+            raise ValueError(f'{self.description} step fits chunks with IncrementalPCA, which needs an integer n_components, not {n_components!r}')
+        return IncrementalPCA(**{k: v for k, v in self.kwargs.items() if k in ('n_components', 'whiten', 'copy')})
+
 ################################################################################################
 # POLYNOMIAL INTERACTIONS FEATURES
 ################################################################################################
 class PolyStep():
 
-    def __init__(self, append_input=False, kwargs={}):
+    def __init__(self, append_input=False, kwargs={}, sparse=False, max_output_features=None, max_bytes=None):
         """ Applies polynomial feature combinations to the given data with sklearn’s PolynomialFeatures
         
         Parameters
@@ -154,12 +321,24 @@ class PolyStep():
         append_input (bool, default=False) : Whether to append the scaled features to the given data, or to only keep the transformed data
 
         kwargs (dict, default={}) : Arguments to be passed to sklearn’s PolynomialFeatures class
+
+        sparse (bool, default=False) : Whether to output a DataFrame of sparse columns, which only stores the combinations that are not zero
+
+        max_output_features (int, default=None) : The most polynomial features the step may create. If the kwargs would create more, fitting raises a ValueError before anything is computed.
+
+        max_bytes (int, default=None) : The most memory in bytes the polynomial features of a transform may take. If the estimate is larger, a ValueError is raised before the features are created.
         """
         self.description = 'Polynomial Features'
         self.kwargs = kwargs
         self.append_input = append_input
+        self.sparse = sparse
+        self.max_output_features = max_output_features
+        self.max_bytes = max_bytes
         self.fitted = None
+        self.input_columns = None
+        self.kept_outputs = None
         self.changes_num_samples = False
+        self.row_independent = True
 
     def fit(self, X, y=None):
         """ Fits the polynomial features
@@ -174,10 +353,84 @@ class PolyStep():
         -------
         (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
+        self._check_num_features(X.shape[1])
         poly = PolynomialFeatures(**self.kwargs)
         self.fitted = poly.fit(X)
+        self.input_columns = list(X.columns)
+        self.kept_outputs = None
         return self.transform(X, y=y)
 
+    def partial_fit(self, X, y=None):
+        """ Fits the polynomial features on the first chunk of the training data. The features only depend on the columns, so later chunks are ignored.
+        
+        Parameters
+        ----------
+        X (DataFrame) : a chunk of the training data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        Returns
+        -------
+        (PolyStep) : the step itself
+        """
+        if self.fitted is None:
+            self._check_num_features(X.shape[1])
+            self.fitted = PolynomialFeatures(**self.kwargs).fit(X)
+            self.input_columns = list(X.columns)
+            self.kept_outputs = None
+        return self
+
+    def reset(self):
+        """ Forgets the statistics accumulated by partial_fit, so that the next chunk starts a new fit """
+        self.fitted = None
+
+    def prune_outputs(self, columns):
+        """ Only creates the polynomial features with the given names when transforming, such as the features kept by the selection step after this one. A fitted pipeline calls this itself, so each transform computes the kept products instead of all of the combinations.
+        
+        Parameters
+        ----------
+        columns (list) : the names of the features to keep creating. If None every feature is created again.
+
+        Returns
+        -------
+        (PolyStep) : the step itself
+        """
+        if self.fitted is None:
+            raise TransformError
+        if columns is None:
+            self.kept_outputs = None
+            return self
+        needed = set(columns)
+        self.kept_outputs = [(name, term) for name, term in zip(self._output_names(self.input_columns), self._terms()) if name in needed]
+        return self
+
+    def estimate_output(self, X):
+        """ Estimates the size of the polynomial features of the given data without creating them. The features have the float type of the data, so float32 data, such as data cast by a pipeline's dtype, takes half the bytes. The number of sparse values is exact, since a combination is only stored when none of the columns it multiplies are zero.
+        
+        Parameters
+        ----------
+        X (DataFrame) : the data to transform
+
+        Returns
+        -------
+        (int, int) : the number of polynomial features and the number of bytes they would take
+        """
+        itemsize = np.dtype(float_dtype(X)).itemsize
+        if self.kept_outputs is not None:
+            # The kept products are created as dense columns before a sparse output is made from them
+            return len(self.kept_outputs), X.shape[0] * len(self.kept_outputs) * itemsize
+        num_features = _num_poly_features(X.shape[1], **self.kwargs)
+        if not self.sparse:
+            return num_features, X.shape[0] * num_features * itemsize
+        # Each stored value of a sparse column takes the size of its float type and its row takes 4 more bytes
+        if has_sparse_columns(X):
+            nonzero_per_row = as_model_input(X).getnnz(axis=1)
+        else:
+            nonzero_per_row = np.count_nonzero(X.to_numpy(), axis=1)
+        counts = np.bincount(nonzero_per_row)
+        num_values = sum(int(count) * _num_poly_features(m, **self.kwargs) for m, count in enumerate(counts) if count)
+        return num_features, num_values * (itemsize + 4)
+
     def transform(self, X, y=None):
         """ Transforms the input data using the previously fitted step 
         
@@ -194,18 +447,130 @@ class PolyStep():
         if self.fitted is None:
             raise TransformError
 
-        poly_data = self.fitted.transform(X)
-        cols = self.fitted.get_feature_names(X.columns)
-        cols = [c.replace(' ', '*') for c in cols]
+        if self.max_bytes is not None:
+            num_features, num_bytes = self.estimate_output(X)
+            if num_bytes > self.max_bytes:
+                raise ValueError(f'{self.description} step would create {num_features} features taking about {num_bytes / 2**20:.1f} MiB for {X.shape[0]} samples, more than max_bytes ({self.max_bytes / 2**20:.1f} MiB)')
+
+        if self.kept_outputs is not None:
+            dtype = float_dtype(X)
+            poly_data = poly_product(X.to_numpy(dtype=dtype), [term for _, term in self.kept_outputs], dtype=dtype)
+            cols = [name for name, _ in self.kept_outputs]
+            if self.sparse:
+                poly_df = sparse_frame(sparse.csc_matrix(poly_data), cols)
+            else:
+                poly_df = pd.DataFrame(poly_data, columns=cols)
+        elif self.sparse:
+            poly_df = sparse_frame(self._sparse_transform(X), self._output_names(X.columns))
+        else:
+            poly_df = pd.DataFrame(self.fitted.transform(X), columns=self._output_names(X.columns))
 
         if self.append_input:
             if y is None:
-                return pd.concat((X, pd.DataFrame(poly_data, columns=cols)), axis=1)
-            return pd.concat((X, pd.DataFrame(poly_data, columns=cols)), axis=1), y
+                return pd.concat((X, poly_df), axis=1)
+            return pd.concat((X, poly_df), axis=1), y
 
         if y is None:
-            return pd.DataFrame(poly_data, columns=cols)
-        return pd.DataFrame(poly_data, columns=cols), y
+            return poly_df
+        return poly_df, y
+
+    def _sparse_transform(self, X):
+        """ Returns the polynomial features as a sparse matrix, without making the data or the features dense """
+        if has_sparse_columns(X):
+            values = as_model_input(X)
+        else:
+            values = X.to_numpy()
+        # sklearn expands CSR matrices directly up to degree 3, and needs CSC matrices for higher degrees
+        degree = self.kwargs.get('degree', 2)
+        max_degree = degree[1] if isinstance(degree, tuple) else degree
+        if max_degree < 4:
+            return self.fitted.transform(sparse.csr_matrix(values))
+        return self.fitted.transform(sparse.csc_matrix(values))
+
+    def _check_num_features(self, num_inputs):
+        """ Raises a ValueError if the kwargs would create more than max_output_features features from num_inputs columns """
+        if self.max_output_features is None:
+            return
+        num_features = _num_poly_features(num_inputs, **self.kwargs)
+        if num_features > self.max_output_features:
+            size = f'{num_features * 8 / 2**10:.1f} KiB'
+            raise ValueError(f'{self.description} step would create {num_features} features from {num_inputs} columns, more than max_output_features ({self.max_output_features}). As dense float64 data they take {size} per sample.')
+
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted step into a function on float ndarrays for CompiledPipeline. The kernel always creates dense features, so max_bytes is checked against their dense size
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output
+        """
+        if self.fitted is None:
+            raise TransformError
+
+        if self.kept_outputs is None:
+            terms = self._terms()
+            cols = pd.Index(self._output_names(columns))
+        else:
+            terms = [term for _, term in self.kept_outputs]
+            cols = pd.Index([name for name, _ in self.kept_outputs])
+        append_input = self.append_input
+        max_bytes = self.max_bytes
+        itemsize = np.dtype(dtype).itemsize
+        def kernel(X, owned):
+            if max_bytes is not None and X.shape[0] * len(terms) * itemsize > max_bytes:
+                raise ValueError(f'Polynomial Features step would create {len(terms)} features taking about {X.shape[0] * len(terms) * itemsize / 2**20:.1f} MiB for {X.shape[0]} samples, more than max_bytes ({max_bytes / 2**20:.1f} MiB)')
+            poly_data = poly_product(X, terms, dtype=dtype)
+            if append_input:
+                return append_columns(X, poly_data)
+            return poly_data
+
+        if append_input:
+            return kernel, columns.append(cols)
+        return kernel, cols
+
+    def _output_names(self, columns):
+        """ Returns the names of the polynomial features of the given columns, like a^2*b """
+        return [poly_feature_name(term, columns) for term in self._terms()]
+
+    def _terms(self):
+        """ Returns the positions of the input columns each polynomial feature multiplies, with each repeated by its power """
+        return [tuple(np.repeat(np.arange(len(powers)), powers)) for powers in self.fitted.powers_]
+
+def poly_feature_name(term, columns):
+    """ Returns the name of the polynomial feature that multiplies some of the columns, like a^2*b, or 1 for the bias. PolyStep and PolyScreenStep name their features with it.
+
+    Parameters
+    ----------
+    term (tuple) : the positions of the columns the feature multiplies, with each repeated by its power
+
+    columns (Index) : the names of the columns
+
+    Returns
+    -------
+    (str) : the name of the feature
+    """
+    if len(term) == 0:
+        return '1'
+    names = []
+    for i in dict.fromkeys(term):
+        power = term.count(i)
+        names.append(str(columns[i]) if power == 1 else f'{columns[i]}^{power}')
+    return '*'.join(names)
+
+def _num_poly_features(num_inputs, degree=2, interaction_only=False, include_bias=True, **kwargs):
+    """ Returns the number of features sklearn's PolynomialFeatures creates from num_inputs columns, without listing the combinations """
+    min_degree, max_degree = degree if isinstance(degree, tuple) else (0, degree)
+    num_features = 0
+    for d in range(max(min_degree, 1), max_degree + 1):
+        num_features += comb(num_inputs, d, exact=True) if interaction_only else comb(num_inputs + d - 1, d, exact=True)
+    if include_bias:
+        num_features += 1
+    return num_features
 
 ################################################################################################
 # SINE FEATURES
@@ -227,6 +592,8 @@ class SinStep():
         self.append_input = append_input
         self.fitted = False
         self.changes_num_samples = False
+        self.row_independent = True
+        self.in_place = True
         self.kwargs = kwargs
     
     def fit(self, X, y=None):
@@ -245,7 +612,23 @@ class SinStep():
         self.fitted = True
         return self.transform(X, y=y)
 
-    def transform(self, X, y=None):
+    def partial_fit(self, X, y=None):
+        """ Marks the object as having been fitted. As this is just a sine tranformation, no chunk of the training data is needed.
+        
+        Parameters
+        ----------
+        X (DataFrame) : a chunk of the training data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        Returns
+        -------
+        (SinStep) : the step itself
+        """
+        self.fitted = True
+        return self
+
+    def transform(self, X, y=None, copy=True):
         """ Transforms the input data using the previously fitted step 
         
         Parameters
@@ -254,6 +637,8 @@ class SinStep():
 
         y (DataFrame, default=None) : target values (if needed)
 
+        copy (bool, default=True) : Whether to leave X unchanged. If False the values of X may be overwritten with the output, so that no new array is made.
+
         Returns
         -------
         (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
@@ -261,16 +646,15 @@ class SinStep():
         if not self.fitted:
             raise TransformError
         
+        # Selecting columns already makes a new frame, which can be overwritten
         if self.columns is None:
-            temp_X = X.copy()
+            temp_X = X
+            owned = not copy and not self.append_input
         else:
             temp_X = X[self.columns]
+            owned = True
 
-        sin_data = np.sin(temp_X, **self.kwargs)
-        new_cols = []
-        for c in sin_data.columns:
-            new_cols.append('sin_' + c)
-        sin_data.columns = new_cols
+        sin_data = _apply_elementwise(np.sin, temp_X, self.kwargs, 'sin_', owned)
         
         if self.append_input:
             if y is None:
@@ -281,6 +665,69 @@ class SinStep():
             return sin_data
         return sin_data, y
 
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted step into a function on float ndarrays for CompiledPipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output
+        """
+        if not self.fitted:
+            raise TransformError
+
+        if self.columns is None:
+            positions = None
+            selected = columns
+        else:
+            positions = columns.get_indexer(pd.Index(self.columns))
+            if (positions < 0).any():
+                raise KeyError(list(pd.Index(self.columns)[positions < 0]))
+            selected = columns[positions]
+        kernel = ufunc_kernel(np.sin, self.kwargs, positions, self.append_input)
+        cols = pd.Index(['sin_' + c for c in selected])
+        if self.append_input:
+            return kernel, columns.append(cols)
+        return kernel, cols
+
+def _apply_elementwise(func, X, kwargs, prefix, owned):
+    """ Applies an elementwise function, such as np.sin, to every column of the data and adds a prefix to the column names. Numpy ufuncs are applied to the array of the data, and if the data is owned the output is written into it with the ufunc's out argument instead of a new array. Other functions are given the DataFrame itself, so they may use pandas methods.
+
+    Parameters
+    ----------
+    func (function) : the function to apply
+
+    X (DataFrame) : the data
+
+    kwargs (dict) : arguments to be passed to the function
+
+    prefix (str) : the prefix of the output columns
+
+    owned (bool) : whether the values of X may be overwritten
+
+    Returns
+    -------
+    (DataFrame) : the output, with the index of X
+    """
+    columns = [prefix + c for c in X.columns]
+    if has_sparse_columns(X) or not isinstance(func, np.ufunc):
+        new_X = func(X, **kwargs)
+        new_X.columns = columns
+        return new_X
+
+    # A frame of a single float type is one array, so writing into its values changes the frame itself
+    values = X.to_numpy()
+    if owned and not kwargs and values.dtype.kind == 'f' and values.flags.writeable:
+        values = func(values, out=values)
+    else:
+        values = func(values, **kwargs)
+    return pd.DataFrame(values, index=X.index, columns=columns)
+
 ################################################################################################
 # LOG FEATURES
 ################################################################################################
@@ -294,7 +741,7 @@ class LogStep():
 
         columns (object, default=None) : The columns to apply the sine function to. If None all columns are used.
 
-        log_func (function, default=np.log) : The type of log function to use; np.log, np.log10, etc.
+        log_func (function, default=np.log) : The type of log function to use; np.log, np.log10, etc. Numpy ufuncs are applied to the array of the data, while other functions are given the DataFrame of the selected columns and must return a DataFrame
 
         kwargs (dict, default={}) : Arguments to be passed to the chosen log_func
         """
@@ -303,6 +750,8 @@ class LogStep():
         self.append_input = append_input
         self.fitted = False
         self.changes_num_samples = False
+        self.row_independent = True
+        self.in_place = True
         self.log_func = log_func
         self.kwargs = kwargs
         
@@ -322,7 +771,23 @@ class LogStep():
         self.fitted = True
         return self.transform(X, y=y)
 
-    def transform(self, X, y=None):
+    def partial_fit(self, X, y=None):
+        """ Marks the object as having been fitted. As this is just a log tranformation, no chunk of the training data is needed.
+        
+        Parameters
+        ----------
+        X (DataFrame) : a chunk of the training data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        Returns
+        -------
+        (LogStep) : the step itself
+        """
+        self.fitted = True
+        return self
+
+    def transform(self, X, y=None, copy=True):
         """ Transforms the input data using the previously fitted step 
         
         Parameters
@@ -331,6 +796,8 @@ class LogStep():
 
         y (DataFrame, default=None) : target values (if needed)
 
+        copy (bool, default=True) : Whether to leave X unchanged. If False the values of X may be overwritten with the output, so that no new array is made.
+
         Returns
         -------
         (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
@@ -338,16 +805,15 @@ class LogStep():
         if not self.fitted:
             raise TransformError
         
+        # Selecting columns already makes a new frame, which can be overwritten
         if self.columns is None:
-            temp_X = X.copy()
+            temp_X = X
+            owned = not copy and not self.append_input
         else:
             temp_X = X[self.columns]
+            owned = True
 
-        log_data = self.log_func(temp_X, **self.kwargs)
-        new_cols = []
-        for c in log_data.columns:
-            new_cols.append('log_' + c)
-        log_data.columns = new_cols
+        log_data = _apply_elementwise(self.log_func, temp_X, self.kwargs, 'log_', owned)
         
         if self.append_input:   
             if y is None:
@@ -358,6 +824,40 @@ class LogStep():
             return log_data
         return log_data, y
 
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted step into a function on float ndarrays for CompiledPipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output. None is returned if log_func is not a numpy ufunc
+        """
+        if not self.fitted:
+            raise TransformError
+
+        # Functions other than numpy ufuncs are given a DataFrame, since they may use pandas methods
+        if not isinstance(self.log_func, np.ufunc):
+            return None
+
+        if self.columns is None:
+            positions = None
+            selected = columns
+        else:
+            positions = columns.get_indexer(pd.Index(self.columns))
+            if (positions < 0).any():
+                raise KeyError(list(pd.Index(self.columns)[positions < 0]))
+            selected = columns[positions]
+        kernel = ufunc_kernel(self.log_func, self.kwargs, positions, self.append_input)
+        cols = pd.Index(['log_' + c for c in selected])
+        if self.append_input:
+            return kernel, columns.append(cols)
+        return kernel, cols
+
 ################################################################################################
 # LDA TRANSFORMATION
 ################################################################################################
@@ -377,6 +877,7 @@ class LDATransformStep():
         self.kwargs = kwargs
         self.fitted = None
         self.changes_num_samples = False
+        self.row_independent = True
 
     def fit(self, X, y=None):
         """ Fits the LDA to the training data
@@ -391,10 +892,38 @@ class LDATransformStep():
         -------
         (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
+        check_dense(X, self.description)
+        from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
         lda = LinearDiscriminantAnalysis(**self.kwargs)
         self.fitted = lda.fit(X, y)
         return self.transform(X, y=y)
 
+    def partial_fit(self, X, y=None):
+        """ Accumulates the class statistics of a chunk of the training data. The projection is found with the eigenvalue solver from the statistics of all chunks seen so far, so only the n_components argument of kwargs is used.
+        
+        Parameters
+        ----------
+        X (DataFrame) : a chunk of the training data
+
+        y (DataFrame) : target values
+
+        Returns
+        -------
+        (LDATransformStep) : the step itself
+        """
+        check_dense(X, self.description)
+        if y is None:
+            print(f"{self.description} step is supervised and needs target values")
+            raise ValueError
+        if not isinstance(self.fitted, _IncrementalLDA):
+            self.fitted = _IncrementalLDA(n_components=self.kwargs.get('n_components'))
+        self.fitted.partial_fit(X, y)
+        return self
+
+    def reset(self):
+        """ Forgets the statistics accumulated by partial_fit, so that the next chunk starts a new fit """
+        self.fitted = None
+
     def transform(self, X, y=None):
         """ Transforms the input data using the previously fitted step 
         
@@ -410,8 +939,9 @@ class LDATransformStep():
         """
         if self.fitted is None:
             raise TransformError
+        check_dense(X, self.description)
 
-        lda_data = self.fitted.transform(X)
+        lda_data = self.fitted.transform(X).astype(float_dtype(X), copy=False)
         
         lda_cols = []
         for i in range(1, lda_data.shape[1]+1):
@@ -426,4 +956,68 @@ class LDATransformStep():
 
         if y is None:
             return lda_data
-        return lda_data, y
\ No newline at end of file
+        return lda_data, y
+
+class _IncrementalLDA():
+    def __init__(self, n_components=None):
+        """ Linear discriminant analysis fitted from class statistics that are accumulated over chunks of data. The projection is the same as sklearn's LinearDiscriminantAnalysis with solver='eigen'.
+        
+        Parameters
+        ----------
+        n_components (int, default=None) : number of components to keep. If None, one less than the number of classes is used
+        """
+        self.n_components = n_components
+        self.class_stats = {}
+        self.scalings = None
+
+    def partial_fit(self, X, y):
+        """ Merges the count, mean and scatter about the mean of each class in the chunk into the accumulated statistics """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        for label in np.unique(y):
+            X_label = X[y == label]
+            count = X_label.shape[0]
+            mean = X_label.mean(axis=0)
+            X_c = X_label - mean
+            scatter = X_c.T @ X_c
+            if label not in self.class_stats:
+                self.class_stats[label] = [count, mean, scatter]
+                continue
+
+            # Chan et al.'s pairwise update, like _CorrStats, so that data far from zero keeps its precision
+            stats = self.class_stats[label]
+            total = stats[0] + count
+            delta = mean - stats[1]
+            stats[2] = stats[2] + scatter + np.outer(delta, delta) * (stats[0] * count / total)
+            stats[1] = stats[1] + delta * (count / total)
+            stats[0] = total
+        self.scalings = None
+        return self
+
+    def transform(self, X):
+        """ Projects the data onto the discriminant components """
+        if self.scalings is None:
+            self.scalings = self._solve_eigen()
+        return np.asarray(X, dtype=np.float64) @ self.scalings
+
+    def _solve_eigen(self):
+        """ Solves the generalized eigenvalue problem between the between class and within class scatter """
+        counts = np.array([stats[0] for stats in self.class_stats.values()], dtype=np.float64)
+        means = np.array([stats[1] for stats in self.class_stats.values()])
+        scatters = np.array([stats[2] for stats in self.class_stats.values()])
+        priors = counts / counts.sum()
+
+        # Within class scatter is the prior weighted average of the class covariances
+        within = np.tensordot(priors, scatters / counts[:, np.newaxis, np.newaxis], axes=1)
+
+        # Between class scatter is the prior weighted scatter of the class means about the overall mean
+        means_c = means - priors @ means
+        between = (means_c * priors[:, np.newaxis]).T @ means_c
+
+        evals, evecs = linalg.eigh(between, within)
+        evecs = evecs[:, np.argsort(evals)[::-1]]
+
+        n_components = self.n_components
+        if n_components is None:
+            n_components = min(len(counts) - 1, evecs.shape[0])
+        return evecs[:, :n_components]
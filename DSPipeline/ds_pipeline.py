@@ -1,14 +1,20 @@
 # External Imports
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import os
+import numpy as np
 import pandas as pd
 
 # Internal Imports
+from DSPipeline import persistence
+from DSPipeline.compiled import CompiledPipeline, InferencePipeline, append_columns, compile_step
 from DSPipeline.errors import TransformError
+from DSPipeline.fit_cache import FitCache
 
 ################################################################################################
 # PIPELINE
 ################################################################################################
 class Pipeline():
-    def __init__(self, steps, append_input=False):
+    def __init__(self, steps, append_input=False, memory=None, max_cache_bytes=None, dtype=None, profiler=None):
         """ This class stores all of the steps that can be applied to data. It can also be used as a single step containing other sub steps.
         
         Parameters
@@ -16,11 +22,30 @@ class Pipeline():
         steps (list) : a list of step objects to use in the pipeline in the given order
 
         append_input (bool, default=False) : Whether to append the transformed data to the given data, or to only keep the transformed data
+
+        memory (str, default=None) : A directory to cache fitted steps and their output in. Fitting the same steps on the same data again loads them from the cache instead. If None nothing is cached.
+
+        max_cache_bytes (int, default=None) : The maximum size of the cache, after which the least recently used entries are removed. If None the cache is never trimmed.
+
+        dtype (dtype, default=None) : The float type to work in, such as np.float32 to halve the memory of the data. The numeric columns of the data are cast to it once when it enters the pipeline, and every step keeps its output in that type while accumulating statistics such as variances and correlations in float64. If None the data is used as it is given.
+
+        profiler (PipelineProfiler, default=None) : A profiler that records the time, and optionally the memory, of every call of each step. If None nothing is recorded.
         """
+        if dtype is not None and not np.issubdtype(np.dtype(dtype), np.floating):
+            raise ValueError(f'dtype must be a float type, was {dtype}')
         self.steps = steps
         self.append_input = append_input
         self.description = f"Pipeline Step with {[s.description for s in steps]}"
         self.changes_num_samples = False
+        self.row_independent = all(getattr(step, 'row_independent', False) for step in steps)
+        self.in_place = True
+        self.input_columns = None
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self.profiler = profiler
+        self.fit_cache = None
+        if memory is not None:
+            self.fit_cache = FitCache(memory, max_bytes=max_cache_bytes)
+        self._pool = None
 
     def fit(self, X, y=None, verbose=False):
         """ Fits the pipeline on the given data
@@ -37,24 +62,119 @@ class Pipeline():
         -------
         (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
-        new_X = X.copy()
+        return self.fit_transform(X, y=y, verbose=verbose)
+
+    def fit_stream(self, chunks, chunksize=None, verbose=False):
+        """ Fits the pipeline on data that does not fit in memory. The steps are fitted one at a time with their partial_fit method, so the data is read once for every step and each chunk is transformed by the steps that were already fitted. Like fit, it starts from scratch, so the statistics a fitted pipeline accumulated before are forgotten.
+        
+        Parameters
+        ----------
+        chunks (object) : The training data in chunks. Since it is read once for every step it must be a DataFrame, a list of DataFrames or (X, y) tuples, or a function that returns a new iterable of chunks each time it is called, such as lambda: pd.read_csv(path, chunksize=100000)
+
+        chunksize (int, default=None) : The maximum number of rows in each chunk. If None the chunks are used as they are given.
+
+        verbose (bool, default=False) : Whether or not to output progress of fitting the pipeline
+
+        Returns
+        -------
+        (Pipeline) : The fitted pipeline
+        """
+        if not callable(chunks) and iter(chunks) is chunks:
+            raise TypeError('fit_stream reads the chunks once for every step, pass a list of chunks or a function that returns a new iterable of chunks')
+        for step in self.steps:
+            if not hasattr(step, 'partial_fit'):
+                raise TypeError(f'{step.description} step does not support partial_fit')
+        self.close()
         for step in self.steps:
+            if hasattr(step, 'reset'):
+                step.reset()
+
+        for i, step in enumerate(self.steps):
             if verbose:
                 print(f'Fitting {step.description}')
+            source = chunks() if callable(chunks) else chunks
+            for X, y in _iter_chunks(source, chunksize):
+                if i == 0:
+                    self.input_columns = list(X.columns)
+                X = self._cast(X)
+                for fitted_step in self.steps[:i]:
+                    X, y = self._transform_step(fitted_step, X, y)
+                self._profile(step, 'partial_fit', X, lambda: step.partial_fit(X, y=y))
+        self._prune_outputs()
+        return self
+
+    def transform(self, X, y=None, allow_sample_removal=True, verbose=False, n_jobs=None, backend='process', copy=True):
+        """ Transforms the given data using the previously fitted pipeline
+        
+        Parameters
+        ----------
+        X (DataFrame) : The training data
+
+        y (DataFrame, default=None) : Target values (if needed)
+
+        allow_sample_removal (bool, default=True) : Whether or not the pipeline is allowed to remove any samples from the data frame. Generally this is okay in train data and not okay in test data.
+
+        verbose (bool, default=False) : Whether or not to output progress of fitting the pipeline
+
+        n_jobs (int, default=None) : The number of workers to split the rows between. Consecutive steps that transform each row on its own are run on every shard of rows at the same time, while steps that are not row independent, such as outlier detection that is refit on the data, are run on all of the rows at once. If None or 1 the data is transformed in the calling thread, and if -1 one worker is used per CPU.
+
+        backend (str, default='process') : Whether the workers are processes or threads. The workers are kept for the next transform with the same n_jobs and backend, so the fitted steps are only sent to each process once until the pipeline is fitted again or closed.
+
+        copy (bool, default=True) : Whether to leave X unchanged. If False the pipeline owns X, and steps with an in_place attribute, such as SinStep, LogStep and StandardScalerStep, write their output into its arrays instead of new ones. If True the first of those steps makes the only copy of the data.
+
+        Returns
+        -------
+        (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
+        """
+        if backend not in ('thread', 'process'):
+            raise ValueError(f"backend must be 'thread' or 'process', was {backend}")
+        steps = [step for step in self.steps if allow_sample_removal or not step.changes_num_samples]
+        if n_jobs == -1:
+            n_jobs = os.cpu_count()
+        given_X = X
+        X = self._cast(X)
+        if n_jobs is not None and n_jobs > 1 and len(X) > 1 and any(getattr(step, 'row_independent', False) for step in steps):
+            new_X, y = self._transform_sharded(steps, X, y, n_jobs, backend, verbose)
+            return self._output(X, new_X, y)
+
+        # The pipeline owns the data when it was given with copy=False or the cast made a new frame. Until then steps
+        # that work in place are asked to copy, and their output is always new data that the pipeline owns.
+        new_X = X
+        owned = (not copy or X is not given_X) and not self.append_input
+        for step in steps:
+            if verbose:
+                print(f'Transforming {step.description}')
+            new_X, y = self._transform_step(step, new_X, y, owned=owned)
+            owned = owned or getattr(step, 'in_place', False)
+        if new_X is given_X and copy:
+            new_X = new_X.copy()
+        return self._output(X, new_X, y)
+
+    def transform_stream(self, frames, chunksize=None, allow_sample_removal=True, verbose=False):
+        """ Transforms data that does not fit in memory one chunk at a time using the previously fitted pipeline. Only one chunk is held in memory at a time.
+        
+        Parameters
+        ----------
+        frames (object) : A DataFrame, an iterable of DataFrames such as the reader returned by pd.read_csv(..., chunksize=...), or an iterable of (X, y) tuples. Objects with a to_pandas method, such as pyarrow record batches from a Parquet file's iter_batches, are converted to DataFrames.
+
+        chunksize (int, default=None) : The maximum number of rows in each chunk passed through the pipeline. If None the chunks are used as they are given.
+
+        allow_sample_removal (bool, default=True) : Whether or not the pipeline is allowed to remove any samples from the data frame. Steps that remove samples are applied to each chunk separately.
+
+        verbose (bool, default=False) : Whether or not to output progress of transforming each chunk
+
+        Yields
+        ------
+        (DataFrame, DataFrame) : The transformed chunks, either as a DataFrame or as a tuple of the X and y data if y values were given
+        """
+        for X, y in _iter_chunks(frames, chunksize):
             if y is None:
-                new_X = step.fit(new_X)
+                yield self.transform(X, allow_sample_removal=allow_sample_removal, verbose=verbose)
             else:
-                new_X, y = step.fit(new_X, y=y)
-        if self.append_input:
-            if y is None:
-                return pd.concat((X, new_X), axis=1)
-            return pd.concat((X, new_X), axis=1), y
-        if y is None:
-            return new_X
-        return new_X, y
+                yield self.transform(X, y=y, allow_sample_removal=allow_sample_removal, verbose=verbose)
 
-    def transform(self, X, y=None, allow_sample_removal=True, verbose=False):
-        """ Transforms the given data using the previously fitted pipeline
+    def fit_transform(self, X, y=None, allow_sample_removal=True, verbose=False):
+        """ Fits the pipeline and transforms the given data in a single pass, reusing the output of each fitted step
         
         Parameters
         ----------
@@ -70,26 +190,398 @@ class Pipeline():
         -------
         (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
-        new_X = X.copy()
+        # Every step returns its transformed data when it is fitted, so the fitted output is carried forward
+        # instead of transforming the data a second time. The output only has to be transformed separately once
+        # a step that removes samples is skipped, since the remaining steps are still fitted on the reduced data.
+        self.close()
+        self.input_columns = list(X.columns)
+        given_X = X
+        X = fit_X = self._cast(X)
+        fit_y = y
+        out_X = None
+        out_y = None
+        key = None
+        if self.fit_cache is not None:
+            key = self.fit_cache.fingerprint(X, y)
+        for step in self.steps:
+            if verbose:
+                print(f'Fitting {step.description}')
+            if out_X is None and not allow_sample_removal and step.changes_num_samples:
+                out_X, out_y = fit_X, fit_y
+            if key is not None:
+                key = self.fit_cache.output_key(key, step)
+            fit_X, fit_y = self._fit_step(step, fit_X, fit_y, key=key)
+            if out_X is not None and not step.changes_num_samples:
+                if verbose:
+                    print(f'Transforming {step.description}')
+                out_X, out_y = self._transform_step(step, out_X, out_y)
+        self._prune_outputs()
+        if out_X is None:
+            out_X, out_y = fit_X, fit_y
+        if out_X is given_X:
+            out_X = out_X.copy()
+        return self._output(X, out_X, out_y)
+
+    def input_features(self):
+        """ Returns the columns the fitted pipeline needs from the step before it, which are the columns needed by its first step
+        
+        Returns
+        -------
+        (list) : the names of the needed columns, or None if every column may be needed
+        """
+        if self.append_input or len(self.steps) == 0 or not hasattr(self.steps[0], 'input_features'):
+            return None
+        return self.steps[0].input_features()
+
+    def compile(self):
+        """ Compiles the fitted pipeline so that it passes a single float ndarray between the steps instead of building a DataFrame for each one
+
+        Returns
+        -------
+        (CompiledPipeline) : The compiled pipeline, which has a transform method like this pipeline's
+        """
+        return CompiledPipeline(self)
+
+    def compile_for_inference(self, columns=None):
+        """ Compiles the fitted pipeline into a function that transforms a single record with plain numpy operations on precomputed column positions, for serving one request at a time. Steps that remove samples are skipped, as with allow_sample_removal=False.
+
+        Parameters
+        ----------
+        columns (list, default=None) : The input columns, in the order of the values of array records. If None the columns the pipeline was fitted on are used.
+
+        Returns
+        -------
+        (InferencePipeline) : A function that takes a dict of column names to values or a 1-D array and returns a 1-D array of the transformed values. The names of the output values are in its columns attribute.
+        """
+        if columns is None:
+            columns = getattr(self, 'input_columns', None)
+        if columns is None:
+            raise ValueError('The pipeline must be fitted or given its input columns to be compiled for inference')
+        return InferencePipeline(self, columns)
+
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted steps into a single function on float ndarrays, so this pipeline can be used as a step of a compiled pipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the pipeline will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output. None is returned if any of the steps cannot be compiled.
+        """
+        kernels = []
+        out_columns = columns
         for step in self.steps:
-            if not allow_sample_removal and step.changes_num_samples:
+            compiled = compile_step(step, out_columns, dtype)
+            if compiled is None:
+                return None
+            kernel, out_columns = compiled
+            kernels.append(kernel)
+
+        append_input = self.append_input
+        def kernel(X, owned):
+            new_X = X
+            for step_kernel in kernels:
+                new_X = step_kernel(new_X, (owned and not append_input) or not np.may_share_memory(new_X, X))
+            if append_input:
+                return append_columns(X, new_X)
+            return new_X
+
+        if append_input:
+            return kernel, columns.append(out_columns)
+        return kernel, out_columns
+
+    def save(self, path):
+        """ Saves the fitted pipeline to a directory. The learned arrays are stored uncompressed in their own files so that they can be memory mapped by load.
+        
+        Parameters
+        ----------
+        path (str) : The directory to save the pipeline to
+        """
+        persistence.save(self, path)
+
+    @staticmethod
+    def load(path, mmap=True):
+        """ Loads a pipeline saved with save
+        
+        Parameters
+        ----------
+        path (str) : The directory the pipeline was saved to
+
+        mmap (bool, default=True) : Whether to memory map the learned arrays. Mapped arrays are read only and are shared between processes that load the same pipeline, except for tree node arrays, which sklearn copies when loading. Use False if the pipeline will be fitted again.
+
+        Returns
+        -------
+        (Pipeline) : The loaded pipeline
+        """
+        return persistence.load(path, mmap=mmap)
+
+    def _fit_step(self, step, X, y, key=None):
+        """ Fits a single step and returns its transformed (X, y) pair. If a cache key is given the fitted step is loaded from or stored in the fit cache. """
+        return self._profile(step, 'fit', X, lambda: self._fit_cached(step, X, y, key))
+
+    def _fit_cached(self, step, X, y, key):
+        """ Fits a single step, or loads it from the fit cache if it has the key """
+        if key is not None:
+            cached = self.fit_cache.load(key)
+            if cached is not None:
+                state, X, y = cached
+                step.__dict__.update(state)
+                return X, y
+        if y is None:
+            new_X, new_y = step.fit(X), None
+        else:
+            new_X, new_y = step.fit(X, y=y)
+        if key is not None:
+            self.fit_cache.store(key, step, new_X, new_y)
+        return new_X, new_y
+
+    def _transform_step(self, step, X, y, owned=False):
+        """ Transforms the data with a single fitted step and returns the (X, y) pair. Steps that work in place may overwrite owned data. """
+        kwargs = {'copy': False} if owned and getattr(step, 'in_place', False) else {}
+        if y is None:
+            return self._profile(step, 'transform', X, lambda: (step.transform(X, **kwargs), None))
+        return self._profile(step, 'transform', X, lambda: step.transform(X, y=y, **kwargs))
+
+    def _profile(self, step, method, X, func, description=None):
+        """ Calls func, which calls a method of the step, and records it with the profiler if the pipeline has one """
+        profiler = getattr(self, 'profiler', None)
+        if profiler is None:
+            return func()
+        position = next(i for i, s in enumerate(self.steps) if s is step)
+        return profiler.run(position, step.description if description is None else description, method, X, func)
+
+    def _cast(self, X):
+        """ Casts the numeric columns of the data to the pipeline's dtype, keeping sparse columns sparse. The data is returned as it is when there is no dtype or its columns already have it. """
+        dtype = getattr(self, 'dtype', None)
+        if dtype is None:
+            return X
+        casts = {}
+        for col, col_dtype in X.dtypes.items():
+            if isinstance(col_dtype, pd.SparseDtype):
+                if col_dtype.subtype != dtype:
+                    casts[col] = pd.SparseDtype(dtype, 0)
+            elif np.issubdtype(col_dtype, np.number) and col_dtype != dtype:
+                casts[col] = dtype
+        if not casts:
+            return X
+        return X.astype(casts)
+
+    def _prune_outputs(self):
+        """ Tells each fitted step that can prune its outputs, like PolyStep, which of its output columns the next step needs, so that it only creates those when transforming """
+        for step, next_step in zip(self.steps, self.steps[1:]):
+            if hasattr(step, 'prune_outputs'):
+                needed = next_step.input_features() if hasattr(next_step, 'input_features') else None
+                step.prune_outputs(needed)
+
+    def close(self):
+        """ Shuts down the workers kept by transform for n_jobs. They are started again by the next transform that needs them, and fitting the pipeline closes them, since process workers hold a copy of the fitted steps. Close the pipeline after changing its fitted steps in any other way. """
+        pool = getattr(self, '_pool', None)
+        self._pool = None
+        if pool is not None:
+            pool[2].shutdown()
+
+    def __del__(self):
+        _shutdown_pool(getattr(self, '_pool', None))
+
+    def __getstate__(self):
+        # The workers belong to this process, so they are not saved or copied with the pipeline
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        return state
+
+    def _shard_pool(self, n_jobs, backend):
+        """ Returns the executor for transforming shards, starting one if the pipeline has none for this number of workers and backend. Process workers are sent every step of the pipeline once, when they start. """
+        pool = getattr(self, '_pool', None)
+        if pool is not None and pool[:2] == (n_jobs, backend):
+            return pool[2]
+        self.close()
+        if backend == 'thread':
+            executor = ThreadPoolExecutor(max_workers=n_jobs)
+        else:
+            executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(self.steps,))
+        self._pool = (n_jobs, backend, executor)
+        return executor
+
+    def _transform_sharded(self, steps, X, y, n_jobs, backend, verbose):
+        """ Transforms the data by splitting its rows into n_jobs shards. Runs of row independent steps are applied to the shards in parallel and the outputs are joined back together in order, and the other steps are applied to all of the rows at once. """
+        executor = self._shard_pool(n_jobs, backend)
+        start = 0
+        while start < len(steps):
+            if not getattr(steps[start], 'row_independent', False):
+                if verbose:
+                    print(f'Transforming {steps[start].description} on all rows')
+                X, y = self._transform_step(steps[start], X, y)
+                start += 1
                 continue
+            stop = start
+            while stop < len(steps) and getattr(steps[stop], 'row_independent', False):
+                stop += 1
             if verbose:
-                print(f'Transforming {step.description}')
-            if y is None:
-                new_X = step.transform(new_X)
+                print(f'Transforming {[step.description for step in steps[start:stop]]} on {n_jobs} shards')
+            # A run of steps on the shards is recorded as one call of its first step, described with every step in the run
+            description = ', '.join(step.description for step in steps[start:stop])
+            X, y = self._profile(steps[start], 'transform', X, lambda: self._run_shards(executor, steps[start:stop], X, y, n_jobs, backend), description=description)
+            start = stop
+        return X, y
+
+    def _run_shards(self, executor, steps, X, y, n_jobs, backend):
+        """ Applies the steps to each shard of rows on the executor and joins the outputs in order """
+        shard_size = -(-len(X) // n_jobs)
+        # Process workers hold every step of the pipeline, so they are told the positions of the steps to apply
+        positions = [next(i for i, s in enumerate(self.steps) if s is step) for step in steps]
+        futures = []
+        for row in range(0, len(X), shard_size):
+            X_shard = _reset_index(X.iloc[row:row + shard_size])
+            y_shard = None if y is None else _reset_index(y.iloc[row:row + shard_size])
+            if backend == 'thread':
+                futures.append(executor.submit(_transform_shard, steps, X_shard, y_shard))
             else:
-                new_X, y = step.transform(new_X, y=y)
+                futures.append(executor.submit(_transform_worker_shard, positions, X_shard, y_shard))
+        results = [future.result() for future in futures]
+
+        # The original index is kept unless samples were removed, in which case the index is reset like the outlier steps do
+        new_X = pd.concat([r_X for r_X, _ in results], axis=0, ignore_index=True)
+        new_y = None if y is None else pd.concat([r_y for _, r_y in results], axis=0, ignore_index=True)
+        if len(new_X) == len(X):
+            new_X.index = X.index
+            if new_y is not None:
+                new_y.index = y.index
+        return new_X, new_y
+
+    def _output(self, X, new_X, y):
+        """ Formats the output of the pipeline, appending the input data if needed """
         if self.append_input:
-            if y is None:
-                return pd.concat((X, new_X), axis=1)
-            return pd.concat((X, new_X), axis=1), y
+            new_X = pd.concat((X, new_X), axis=1)
         if y is None:
             return new_X
         return new_X, y
 
+def _iter_chunks(frames, chunksize=None):
+    """ Yields (X, y) pairs of chunks with a fresh index from a DataFrame or an iterable of DataFrames, (X, y) tuples or objects with a to_pandas method """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    for item in frames:
+        if isinstance(item, tuple):
+            X, y = item
+        else:
+            X, y = item, None
+        if hasattr(X, 'to_pandas'):
+            X = X.to_pandas()
+        if chunksize is None or len(X) <= chunksize:
+            yield _reset_index(X), _reset_index(y)
+            continue
+        for start in range(0, len(X), chunksize):
+            stop = start + chunksize
+            y_chunk = None if y is None else y.iloc[start:stop]
+            yield _reset_index(X.iloc[start:stop]), _reset_index(y_chunk)
+
+# The fitted steps of the pipeline a worker process transforms data for, which are sent once when the worker starts:
+# the list of steps of a Pipeline, or a dict of the step of each node of a DAGPipeline
+_worker_steps = None
+
+def _init_worker(steps):
+    """ Stores the fitted steps in a worker process """
+    global _worker_steps
+    _worker_steps = steps
+
+def _shutdown_pool(pool):
+    """ Shuts down the executor of a (n_jobs, backend, executor) pool without waiting for it, for when a pipeline is deleted """
+    if pool is not None:
+        pool[2].shutdown(wait=False)
+
+def _transform_worker_shard(positions, X, y):
+    """ Transforms a shard of rows with the steps at the given positions of the steps stored in this worker process """
+    return _transform_shard([_worker_steps[i] for i in positions], X, y)
+
+def _transform_shard(steps, X, y):
+    """ Transforms a shard of rows with each of the given steps in order """
+    for step in steps:
+        if y is None:
+            X = step.transform(X)
+        else:
+            X, y = step.transform(X, y=y)
+    return X, y
+
+def _reset_index(data):
+    """ Resets the index of the data to start at 0 so that steps can concatenate by position """
+    if data is None:
+        return None
+    index = data.index
+    if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+        return data
+    return data.reset_index(drop=True)
+
+################################################################################################
+# DAG PIPELINE
+################################################################################################
+class DAGPipeline():
+    def __init__(self, nodes, output, n_jobs=None, backend='thread'):
+        """ A pipeline shaped as a directed acyclic graph. Each named node applies a step to the output of the nodes it names as inputs, and nodes that do not depend on each other are fitted and transformed at the same time. It can also be used as a single step in another pipeline.
+        
+        Parameters
+        ----------
+        nodes (dict) : Maps the name of each node to a (step, inputs) tuple, where inputs is a list of the names of the nodes the step uses the output of. The name 'input' refers to the data given to the pipeline. When a node has several inputs their outputs are joined column wise before the step is applied, so a merge node can use an EmptyStep.
+
+        output (str) : The name of the node whose output the pipeline returns
+
+        n_jobs (int, default=None) : The maximum number of nodes to run at the same time. If None the executor's default is used.
+
+        backend (str, default='thread') : Whether to run nodes on a 'thread' pool or a 'process' pool. Threads share the data without copying it, while processes avoid the global interpreter lock at the cost of copying each node's input. The pool is kept between transforms, and process workers are sent the fitted steps once, when they start.
+        """
+        if backend not in ('thread', 'process'):
+            raise ValueError(f"backend must be 'thread' or 'process', was {backend}")
+        self.nodes = nodes
+        self.output = output
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.description = f"DAG Pipeline Step with {[step.description for step, _ in nodes.values()]}"
+        self.changes_num_samples = False
+        self.row_independent = all(getattr(step, 'row_independent', False) for step, _ in nodes.values())
+        self.order = self._sort_nodes()
+        self._pool = None
+
+    def fit(self, X, y=None, verbose=False):
+        """ Fits every node needed for the output on the given data
+        
+        Parameters
+        ----------
+        X (DataFrame) : the training data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        verbose (bool, default=False) : whether or not to output progress of fitting the pipeline
+
+        Returns
+        -------
+        (DataFrame, DataFrame) : a tuple of the transformed DataFrames, the first being the X data and the second being the y data
+        """
+        return self._run(X, y, True, verbose)
+
+    def transform(self, X, y=None, allow_sample_removal=True, verbose=False):
+        """ Transforms the given data using the previously fitted nodes
+        
+        Parameters
+        ----------
+        X (DataFrame) : The data to transform
+
+        y (DataFrame, default=None) : Target values (if needed)
+
+        allow_sample_removal (bool, default=True) : Unused since the nodes of a DAG pipeline cannot remove samples. It is accepted so the DAG pipeline can be used in place of a Pipeline.
+
+        verbose (bool, default=False) : Whether or not to output progress of transforming the data
+
+        Returns
+        -------
+        (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
+        """
+        return self._run(X, y, False, verbose)
+
     def fit_transform(self, X, y=None, allow_sample_removal=True, verbose=False):
-        """ Fits the pipeline and then transforms the given data
+        """ Fits the pipeline and returns the transformed data, which is the output of fitting each node
         
         Parameters
         ----------
@@ -97,7 +589,7 @@ class Pipeline():
 
         y (DataFrame, default=None) : Target values (if needed)
 
-        allow_sample_removal (bool, default=True) : Whether or not the pipeline is allowed to remove any samples from the data frame. Generally this is okay in train data and not okay in test data.
+        allow_sample_removal (bool, default=True) : Unused since the nodes of a DAG pipeline cannot remove samples
 
         verbose (bool, default=False) : Whether or not to output progress of fitting the pipeline
 
@@ -105,8 +597,136 @@ class Pipeline():
         -------
         (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
-        self.fit(X, y=y, verbose=verbose)
-        return self.transform(X, y=y, allow_sample_removal=allow_sample_removal, verbose=verbose)
+        return self.fit(X, y=y, verbose=verbose)
+
+    def close(self):
+        """ Shuts down the workers kept by transform. They are started again by the next transform, and fitting the pipeline closes them, since process workers hold a copy of the fitted steps. """
+        pool = getattr(self, '_pool', None)
+        self._pool = None
+        if pool is not None:
+            pool[2].shutdown()
+
+    def __del__(self):
+        _shutdown_pool(getattr(self, '_pool', None))
+
+    def __getstate__(self):
+        # The workers belong to this process, so they are not saved or copied with the pipeline
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        return state
+
+    def _node_pool(self):
+        """ Returns the executor for transforming the nodes, starting it if the pipeline has none """
+        if getattr(self, '_pool', None) is None:
+            if self.backend == 'thread':
+                executor = ThreadPoolExecutor(max_workers=self.n_jobs)
+            else:
+                executor = ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker, initargs=({name: step for name, (step, _) in self.nodes.items()},))
+            self._pool = (self.n_jobs, self.backend, executor)
+        return self._pool[2]
+
+    def _sort_nodes(self):
+        """ Checks the graph and returns the names of the nodes needed for the output in an order where every node comes after its inputs """
+        if self.output not in self.nodes:
+            raise ValueError(f"The output node {self.output} is not one of the nodes")
+        steps = [step for step, _ in self.nodes.values()]
+        if len(set(map(id, steps))) != len(steps):
+            raise ValueError("Each node must have its own step object")
+
+        order = []
+        visiting = set()
+        def visit(name):
+            if name == 'input' or name in order:
+                return
+            if name not in self.nodes:
+                raise ValueError(f"Unknown input node {name}")
+            if name in visiting:
+                raise ValueError(f"The nodes have a cycle through {name}")
+            step, inputs = self.nodes[name]
+            if step.changes_num_samples:
+                raise ValueError(f"{step.description} step changes the number of samples, which would misalign the branches of a DAG pipeline")
+            if len(inputs) == 0:
+                raise ValueError(f"Node {name} has no inputs")
+            visiting.add(name)
+            for input_name in inputs:
+                visit(input_name)
+            visiting.remove(name)
+            order.append(name)
+        visit(self.output)
+        return order
+
+    def _run(self, X, y, fit, verbose):
+        """ Runs each node as soon as all of its inputs are ready, and returns the output node's data """
+        if fit and verbose:
+            print(f'Fitting {self.description}')
+        elif verbose:
+            print(f'Transforming {self.description}')
+
+        # Intermediate outputs are released once every node that uses them has run
+        outputs = {'input': _reset_index(X)}
+        consumers = {name: 0 for name in self.order}
+        consumers['input'] = 0
+        for name in self.order:
+            for input_name in self.nodes[name][1]:
+                consumers[input_name] += 1
+
+        # Fitting changes the steps, so it runs on its own pool and the workers kept for transforming are closed
+        if fit:
+            self.close()
+            executor = ThreadPoolExecutor(max_workers=self.n_jobs) if self.backend == 'thread' else ProcessPoolExecutor(max_workers=self.n_jobs)
+        else:
+            executor = self._node_pool()
+        try:
+            remaining = list(self.order)
+            running = {}
+            while remaining or running:
+                for name in [n for n in remaining if all(i in outputs for i in self.nodes[n][1])]:
+                    step, inputs = self.nodes[name]
+                    if verbose:
+                        print(f"{'Fitting' if fit else 'Transforming'} node {name}: {step.description}")
+                    node_X = _join_inputs([outputs[i] for i in inputs])
+                    if not fit and self.backend == 'process':
+                        running[executor.submit(_transform_worker_node, name, node_X, y)] = name
+                    else:
+                        running[executor.submit(_run_node, step, node_X, y, fit, self.backend == 'process')] = name
+                    remaining.remove(name)
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    fitted_step, outputs[name] = future.result()
+                    if fitted_step is not None:
+                        self.nodes[name][0].__dict__.update(fitted_step.__dict__)
+                    for input_name in self.nodes[name][1]:
+                        consumers[input_name] -= 1
+                        if consumers[input_name] == 0 and input_name != self.output:
+                            del outputs[input_name]
+        finally:
+            if fit:
+                executor.shutdown()
+
+        if y is None:
+            return outputs[self.output]
+        return outputs[self.output], y
+
+def _join_inputs(frames):
+    """ Joins the outputs of several nodes column wise """
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, axis=1)
+
+def _run_node(step, X, y, fit, return_step):
+    """ Fits or transforms the data with a single node's step. The fitted step is returned when it ran in another process, so its state can be copied back. """
+    if fit:
+        new_X = step.fit(X) if y is None else step.fit(X, y=y)[0]
+    else:
+        new_X = step.transform(X) if y is None else step.transform(X, y=y)[0]
+    if fit and return_step:
+        return step, new_X
+    return None, new_X
+
+def _transform_worker_node(name, X, y):
+    """ Transforms the data with the step of the named node stored in this worker process """
+    return _run_node(_worker_steps[name], X, y, False, False)
 
 ################################################################################################
 # EMPTY STEP
@@ -121,6 +741,7 @@ class EmptyStep():
         """
         self.description = "Empty Step"
         self.changes_num_samples = False
+        self.row_independent = True
         self.fitted = False
 
     def fit(self, X, y=None):
@@ -130,6 +751,17 @@ class EmptyStep():
             return X
         return X, y
 
+    def partial_fit(self, X, y=None):
+        """ Placeholder partial_fit method """
+        self.fitted = True
+        return self
+
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Placeholder compile_kernel method """
+        if not self.fitted:
+            raise TransformError
+        return (lambda X, owned: X), columns
+
     def transform(self, X, y=None):
         """ Placeholder transform method """
         if self.fitted:
@@ -1,13 +1,15 @@
 # External Imports
+# sklearn's feature selection, ensemble and linear models are imported when a step is fitted, so that importing this module stays fast
 import pandas as pd
 import numpy as np
-from sklearn.feature_selection import SelectFromModel, SelectKBest, chi2
-from sklearn.ensemble import ExtraTreesRegressor
+from itertools import chain, combinations, combinations_with_replacement, islice
+from scipy import sparse
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.linear_model import Lasso
 
 # Internal Imports
-from .data_managing import split_x_y
+from .compiled import append_columns, poly_product, select_kernel
+from .data_managing import as_model_input, check_dense, float_dtype, has_sparse_columns, split_x_y
+from .data_transformations import poly_feature_name
 from .errors import TransformError
 
 ################################################################################################
@@ -24,6 +26,7 @@ class ListSelectionStep():
         self.description = f'Select features: {str(features)}'
         self.features = features
         self.changes_num_samples = False
+        self.row_independent = True
         self.fitted = False
 
     def fit(self, X, y=None):
@@ -42,6 +45,22 @@ class ListSelectionStep():
         self.fitted = True
         return self.transform(X, y=y)
 
+    def partial_fit(self, X, y=None):
+        """ Sets the step as fitted. No chunk of the training data is needed since this feature selection is not specific to the data
+        
+        Parameters
+        ----------
+        X (DataFrame) : a chunk of the training data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        Returns
+        -------
+        (ListSelectionStep) : the step itself
+        """
+        self.fitted = True
+        return self
+
     def transform(self, X, y=None):
         """ Transforms the given data using the previously fitted selection
         
@@ -70,27 +89,80 @@ class ListSelectionStep():
             print(list(X.columns))
             raise KeyError
 
+    def input_features(self):
+        """ Returns the columns the fitted selection keeps, which are the only columns it needs from the step before it
+        
+        Returns
+        -------
+        (list) : the names of the kept columns
+        """
+        if not self.fitted:
+            raise TransformError
+        return list(self.features)
+
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted selection into a function on float ndarrays for CompiledPipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output
+        """
+        if not self.fitted:
+            raise TransformError
+
+        positions = columns.get_indexer(pd.Index(self.features))
+        if (positions < 0).any():
+            print("Could not fit features:")
+            print(self.features)
+            print("to data with features:")
+            print(list(columns))
+            raise KeyError
+        return select_kernel(columns, positions)
+
 ################################################################################################
 ## TREE SELECTION
 ################################################################################################
 class TreeSelectionStep():
-    def __init__(self, tree_model=ExtraTreesRegressor, tree_kwargs={'n_estimators':100}, select_kwargs={}):
-        """Uses a tree to select features. Uses sklearn’s ExtraTreesRegressor (default) and SelectFromModel classes.
+    def __init__(self, tree_model=None, tree_kwargs={'n_estimators':100}, select_kwargs={}, n_jobs=-1, max_samples=None, batch_size=None, patience=2, random_state=None):
+        """Uses a tree to select features. Uses sklearn’s ExtraTreesClassifier or ExtraTreesRegressor (chosen from the target by default) and SelectFromModel classes. The trees can be fitted on a stratified sample of the rows, and added in batches that stop early once the selected features stop changing. The number of trees that were fitted is stored in num_trees.
         
         Parameters
         ----------
-        tree_model (object) : the type of model to use as a tree. See https://scikit-learn.org/stable/modules/ensemble.html#ensemble for more
+        tree_model (object, default=None) : the type of model to use as a tree. If None sklearn's ExtraTreesClassifier is used when the target is binary or multiclass, as found by sklearn's type_of_target, and ExtraTreesRegressor otherwise. See https://scikit-learn.org/stable/modules/ensemble.html#ensemble for more
 
-        tree_kwargs (dict, default={}) : arguments to pass to the tree model initialization
+        tree_kwargs (dict, default={'n_estimators':100}) : arguments to pass to the tree model initialization. With batch_size, n_estimators is the most trees that are fitted
 
         select_kwargs (dict, default={}) : arguments to pass to sklearn's SelectFromModel class's initializiation
+
+        n_jobs (int, default=-1) : the number of cores to fit the trees on, if the model takes an n_jobs argument and it is not in tree_kwargs. If -1 all of the cores are used.
+
+        max_samples (object, default=None) : the number of rows, or the fraction of the rows if it is a float, to fit each batch of trees on. The rows are sampled so that each class, or each decile of a continuous target, keeps its share of the rows. If None every row is used.
+
+        batch_size (int, default=None) : the number of trees to add at a time. The model must take a warm_start argument. The batches are fitted on new samples of the rows until the selected features have not changed for patience batches or n_estimators trees have been fitted. If None all of the trees are fitted at once.
+
+        patience (int, default=2) : the number of batches in a row that must select the same features to stop early
+
+        random_state (int, default=None) : the seed, or numpy RandomState, used to sample the rows. The trees are seeded by the random_state in tree_kwargs
         """
         self.description = 'Tree Feature Selection'
         self.tree_model = tree_model
         self.tree_kwargs = tree_kwargs
         self.select_kwargs = select_kwargs
+        self.n_jobs = n_jobs
+        self.max_samples = max_samples
+        self.batch_size = batch_size
+        self.patience = patience
+        self.random_state = random_state
         self.changes_num_samples = False
+        self.row_independent = True
         self.features = None
+        self.num_trees = None
 
     def fit(self, X, y=None):
         """ Fits the selection on the given data
@@ -105,17 +177,47 @@ class TreeSelectionStep():
         -------
         (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
-        model = self.tree_model(**self.tree_kwargs)
-        fitter = SelectFromModel(model, **self.select_kwargs)
-
-        cols = X.columns
-        fitter.fit(X, y)
-
-        features_i = fitter.get_support(indices=True)
-        feature_names = []
-        for i in features_i:
-            feature_names.append(cols[i])
-        self.features = feature_names
+        from sklearn.base import is_classifier
+        from sklearn.feature_selection import SelectFromModel
+        from sklearn.utils import check_random_state
+        model = self._make_model(y)
+        X_fit = as_model_input(X)
+        target = np.asarray(y)
+        if target.ndim == 2 and target.shape[1] == 1:
+            target = target.ravel()
+        random_state = check_random_state(self.random_state)
+        strata = None
+        if self.max_samples is not None and target.ndim > 1:
+            strata = np.zeros(len(target))
+        elif self.max_samples is not None:
+            strata = target if is_classifier(model) else _quantile_bins(target)
+
+        if self.batch_size is None:
+            rows = self._sample_rows(strata, random_state)
+            model.fit(_take_rows(X_fit, rows), _take_rows(target, rows))
+            self.num_trees = len(getattr(model, 'estimators_', [model]))
+        else:
+            if 'warm_start' not in model.get_params():
+                raise ValueError(f'{type(model).__name__} cannot add trees in batches since it has no warm_start argument')
+            max_trees = model.get_params()['n_estimators']
+            model.set_params(warm_start=True)
+            support = None
+            stable_batches = 0
+            num_trees = 0
+            while num_trees < max_trees and stable_batches < self.patience:
+                num_trees = min(max_trees, num_trees + self.batch_size)
+                rows = self._sample_rows(strata, random_state)
+                model.set_params(n_estimators=num_trees)
+                model.fit(_take_rows(X_fit, rows), _take_rows(target, rows))
+
+                # The importances are averaged over every tree so far, so the selection settles as trees are added
+                new_support = SelectFromModel(model, prefit=True, **self.select_kwargs).get_support()
+                stable_batches = stable_batches + 1 if support is not None and (new_support == support).all() else 0
+                support = new_support
+            self.num_trees = num_trees
+
+        fitter = SelectFromModel(model, prefit=True, **self.select_kwargs)
+        self.features = list(X.columns[fitter.get_support(indices=True)])
         return self.transform(X, y=y)
 
     def transform(self, X, y=None):
@@ -139,24 +241,98 @@ class TreeSelectionStep():
             return X
         return X, y
 
+    def input_features(self):
+        """ Returns the columns the fitted selection keeps, which are the only columns it needs from the step before it
+        
+        Returns
+        -------
+        (list) : the names of the kept columns
+        """
+        if self.features is None:
+            raise TransformError
+        return list(self.features)
+
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted selection into a function on float ndarrays for CompiledPipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output
+        """
+        if self.features is None:
+            raise TransformError
+        return select_kernel(columns, columns.isin(self.features))
+
+    def _make_model(self, y):
+        """ Returns the unfitted tree model, choosing a classifier or regressor from the target when no model was given, and using n_jobs cores when the model can """
+        tree_model = self.tree_model
+        if tree_model is None:
+            from sklearn.ensemble import ExtraTreesClassifier, ExtraTreesRegressor
+            from sklearn.utils.multiclass import type_of_target
+            tree_model = ExtraTreesClassifier if type_of_target(y) in ('binary', 'multiclass') else ExtraTreesRegressor
+        model = tree_model(**self.tree_kwargs)
+        if 'n_jobs' in model.get_params() and 'n_jobs' not in self.tree_kwargs:
+            model.set_params(n_jobs=self.n_jobs)
+        return model
+
+    def _sample_rows(self, strata, random_state):
+        """ Returns the positions of the rows to fit the next batch of trees on, or None to fit on every row """
+        if strata is None:
+            return None
+        num_samples = int(self.max_samples * len(strata)) if isinstance(self.max_samples, float) else self.max_samples
+        if num_samples >= len(strata):
+            return None
+        return _stratified_sample(strata, num_samples, random_state)
+
+def _quantile_bins(target, num_bins=10):
+    """ Returns the decile, or other quantile bin, of each value of a continuous target, for sampling rows across the range of the target """
+    edges = np.quantile(target, np.linspace(0, 1, num_bins + 1)[1:-1])
+    return np.searchsorted(edges, target, side='right')
+
+def _stratified_sample(strata, num_samples, random_state):
+    """ Returns the sorted positions of a random sample of rows in which each stratum keeps its share of the rows, with at least one row from each """
+    positions = []
+    for stratum in np.unique(strata):
+        members = np.flatnonzero(strata == stratum)
+        take = min(len(members), max(1, int(round(len(members) * num_samples / len(strata)))))
+        positions.append(random_state.choice(members, size=take, replace=False))
+    return np.sort(np.concatenate(positions))
+
+def _take_rows(X, rows):
+    """ Returns the given rows of a DataFrame, array or sparse matrix, or all of it if rows is None """
+    if rows is None:
+        return X
+    if isinstance(X, pd.DataFrame):
+        return X.iloc[rows]
+    return X[rows]
+
+
 ################################################################################################
 # PEARSON CORRELATION FEATURE SELECTION
 ################################################################################################
 class PearsonCorrStep():
     def __init__(self, num_features, kwargs={}):
-        """ Uses pearson’s correlation to select features. Uses pandas’s corr method. 
+        """ Uses pearson’s correlation to select features. The correlation of each feature with the target is computed directly in one pass over the data, giving the same values as pandas’s corr method without building the correlation matrix of every pair of features.
         
         Parameters
         ----------
         num_features (float) : Number of features to keep. If less than 1, then that is the minimum correlation value
 
-        kwargs (dict, default={}) : Arguments to pass to panda's corr method.
+        kwargs (dict, default={}) : Arguments of panda's corr method. method may be 'pearson', 'spearman', 'kendall' or a function, and min_periods is the minimum number of samples needed to compute a correlation.
         """
         self.description = "Pearson Correlation Feature Selection"
         self.num_features = num_features
         self.kwargs = kwargs
         self.features = None
         self.changes_num_samples = False
+        self.row_independent = True
+        self.corr_stats = None
 
     def fit(self, X, y=None):
         """ Fits the selection on the given data
@@ -171,22 +347,53 @@ class PearsonCorrStep():
         -------
         (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
-        # if type(X) != type(pd.DataFrame()):
-        #     y_label = 'y_column'
-        #     X = pd.DataFrame(X)
-        #     y = pd.DataFrame(y, columns=[y_label])
-        if y is not None:
-            y_label = y.name
-        data = pd.concat((X, y), axis=1)
-        corr = data.corr(**self.kwargs)
-        corr_target = abs(corr[y_label])
+        if y is None:
+            print(f"{self.description} step is supervised and needs target values")
+            raise ValueError
+        self._select(_target_correlations(X, y, self.kwargs))
+        self.corr_stats = None
+        return self.transform(X, y=y)
+
+    def partial_fit(self, X, y=None):
+        """ Accumulates the means, variances and covariances with the target of a chunk of the training data in float64 and updates the selection. The correlations are the same as computing them on all of the chunks at once. Only the pearson method can be accumulated.
+        
+        Parameters
+        ----------
+        X (DataFrame) : a chunk of the training data
+
+        y (DataFrame) : target values
+
+        Returns
+        -------
+        (PearsonCorrStep) : the step itself
+        """
+        if y is None:
+            print(f"{self.description} step is supervised and needs target values")
+            raise ValueError
+        if self.kwargs.get('method', 'pearson') != 'pearson':
+            print(f"{self.description} step can only accumulate the pearson method over chunks")
+            raise ValueError
+        X = X.select_dtypes(include=['number', 'bool'])
+        if self.corr_stats is None:
+            self.corr_stats = _CorrStats(list(X.columns))
+        self.corr_stats.partial_fit(as_model_input(X), y)
+        corr = self.corr_stats.correlations(self.kwargs.get('min_periods', 1))
+        self._select(pd.Series(corr, index=self.corr_stats.columns))
+        return self
+
+    def reset(self):
+        """ Forgets the statistics accumulated by partial_fit, so that the next chunk starts a new fit """
+        self.features = None
+        self.corr_stats = None
+
+    def _select(self, corr_target):
+        """ Keeps the features with the highest absolute correlations, or those above the minimum correlation """
+        corr_target = corr_target.abs()
         if self.num_features < 1:
-            relevant_features = corr_target[corr_target > self.num_features]
+            self.features = corr_target[corr_target > self.num_features]
         else:
-            corr_target = corr_target.sort_values(ascending=False)
-            relevant_features = corr_target.iloc[:(self.num_features + 1)]
-        self.features = relevant_features.drop(index=y_label)
-        return self.transform(X, y=y)
+            corr_target = corr_target.sort_values(ascending=False, kind='mergesort')
+            self.features = corr_target.iloc[:int(self.num_features)]
 
     def transform(self, X, y=None):
         """ Transforms the given data using the previously fitted selection
@@ -207,6 +414,34 @@ class PearsonCorrStep():
             return X.loc[:, X.columns.isin(self.features.index)]
         return X.loc[:, X.columns.isin(self.features.index)], y
 
+    def input_features(self):
+        """ Returns the columns the fitted selection keeps, which are the only columns it needs from the step before it
+        
+        Returns
+        -------
+        (list) : the names of the kept columns
+        """
+        if self.features is None:
+            raise TransformError
+        return list(self.features.index)
+
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted selection into a function on float ndarrays for CompiledPipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output
+        """
+        if self.features is None:
+            raise TransformError
+        return select_kernel(columns, columns.isin(self.features.index))
+
 ################################################################################################
 # CHI SQUARED FEATURE SELECTION
 ################################################################################################
@@ -222,6 +457,8 @@ class ChiSqSelectionStep():
         self.select_kwargs = select_kwargs
         self.features = None
         self.changes_num_samples = False
+        self.row_independent = True
+        self.class_stats = None
 
     def fit(self, X, y=None):
         """ Fits the selection on the given data
@@ -236,13 +473,56 @@ class ChiSqSelectionStep():
         -------
         (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
-        X_norm = pd.DataFrame(MinMaxScaler().fit_transform(X), columns=X.columns)
+        if has_sparse_columns(X):
+            # Max abs scaling keeps zeros at zero, and matches min max scaling for the non-negative values chi squared needs
+            X_norm = as_model_input(X)
+            max_abs = abs(X_norm).max(axis=0).toarray().ravel()
+            max_abs[max_abs == 0] = 1
+            X_norm = X_norm @ sparse.diags(1 / max_abs)
+        else:
+            X_norm = pd.DataFrame(MinMaxScaler().fit_transform(X), columns=X.columns)
+        from sklearn.feature_selection import SelectKBest, chi2
         chi_selector = SelectKBest(chi2, **self.select_kwargs)
         chi_selector.fit(X_norm, y)
         chi_support = chi_selector.get_support()
-        self.features = X.loc[:, chi_support].columns.tolist()
+        self.features = X.columns[chi_support].tolist()
+        self.class_stats = None
         return self.transform(X, y=y)
 
+    def partial_fit(self, X, y=None):
+        """ Accumulates the per class sums and the feature ranges of a chunk of the training data and updates the selection. The chi squared scores are the same as min max scaling and scoring all of the chunks at once.
+        
+        Parameters
+        ----------
+        X (DataFrame) : a chunk of the training data
+
+        y (DataFrame) : target values
+
+        Returns
+        -------
+        (ChiSqSelectionStep) : the step itself
+        """
+        if y is None:
+            print(f"{self.description} step is supervised and needs target values")
+            raise ValueError
+        if self.class_stats is None:
+            self.class_stats = _ChiSqStats(list(X.columns))
+        self.class_stats.partial_fit(as_model_input(X), y)
+        scores = self.class_stats.scores()
+        k = self.select_kwargs.get('k', 10)
+        if k == 'all':
+            self.features = list(self.class_stats.columns)
+        else:
+            support = np.zeros(scores.shape[0], dtype=bool)
+            support[np.argsort(scores, kind='mergesort')[scores.shape[0] - k:]] = True
+            self.features = [c for c, keep in zip(self.class_stats.columns, support) if keep]
+        return self
+
+    def reset(self):
+        """ Forgets the statistics accumulated by partial_fit, so that the next chunk starts a new fit """
+        self.features = None
+        self.class_stats = None
+
     def transform(self, X, y=None):
         """ Transforms the given data using the previously fitted selection
         
@@ -262,6 +542,34 @@ class ChiSqSelectionStep():
             return X.loc[:, X.columns.isin(self.features)]
         return X.loc[:, X.columns.isin(self.features)], y
 
+    def input_features(self):
+        """ Returns the columns the fitted selection keeps, which are the only columns it needs from the step before it
+        
+        Returns
+        -------
+        (list) : the names of the kept columns
+        """
+        if self.features is None:
+            raise TransformError
+        return list(self.features)
+
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted selection into a function on float ndarrays for CompiledPipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output
+        """
+        if self.features is None:
+            raise TransformError
+        return select_kernel(columns, columns.isin(self.features))
+
 ################################################################################################
 # LASSO FEATURE SELECTION
 ################################################################################################
@@ -280,6 +588,7 @@ class LassoSelectionStep():
         self.select_kwargs = select_kwargs
         self.features = None
         self.changes_num_samples = False
+        self.row_independent = True
 
     def fit(self, X, y=None):
         """ Fits the selection on the given data
@@ -294,8 +603,10 @@ class LassoSelectionStep():
         -------
         (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
+        from sklearn.feature_selection import SelectFromModel
+        from sklearn.linear_model import Lasso
         embeded_lr_selector = SelectFromModel(Lasso(**self.lasso_kwargs), **self.select_kwargs)
-        embeded_lr_selector.fit(X, y)
+        embeded_lr_selector.fit(as_model_input(X), y)
 
         embeded_lr_support = embeded_lr_selector.get_support()
         self.features = X.loc[:, embeded_lr_support].columns.tolist()
@@ -320,3 +631,348 @@ class LassoSelectionStep():
         if y is None:
             return X.loc[:, X.columns.isin(self.features)]
         return X.loc[:, X.columns.isin(self.features)], y
+
+    def input_features(self):
+        """ Returns the columns the fitted selection keeps, which are the only columns it needs from the step before it
+        
+        Returns
+        -------
+        (list) : the names of the kept columns
+        """
+        if self.features is None:
+            raise TransformError
+        return list(self.features)
+
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted selection into a function on float ndarrays for CompiledPipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output
+        """
+        if self.features is None:
+            raise TransformError
+        return select_kernel(columns, columns.isin(self.features))
+
+################################################################################################
+# POLYNOMIAL FEATURE SCREENING
+################################################################################################
+class PolyScreenStep():
+    def __init__(self, num_features, kwargs={}, score='corr', block_size=1000, append_input=False, lasso_kwargs={}):
+        """ Finds the polynomial feature combinations that best predict the target without creating all of them. The combinations PolyStep would create are made a block at a time, each block is scored against the target, and only the names and scores of the best combinations are kept, so memory grows with the block size instead of the number of combinations. Transforming only creates the kept combinations.
+        
+        Parameters
+        ----------
+        num_features (int) : Number of combinations to keep
+
+        kwargs (dict, default={}) : The degree and interaction_only arguments of sklearn's PolynomialFeatures. The bias column is never kept since it is constant.
+
+        score (str, default='corr') : How to score the combinations. 'corr' uses the absolute pearson correlation with the target, which is the same for every block, and 'lasso' uses the absolute coefficients of a Lasso fitted on each standardized block
+
+        block_size (int, default=1000) : Number of combinations created and scored at a time
+
+        append_input (bool, default=False) : Whether to append the kept combinations to the given data, or to only keep the combinations
+
+        lasso_kwargs (dict, default={}) : arguments to pass to sklearn's Lasso class initializiation when score is 'lasso'
+        """
+        if score not in ('corr', 'lasso'):
+            raise ValueError(f"score must be 'corr' or 'lasso', was {score}")
+        self.description = "Polynomial Feature Screening"
+        self.num_features = num_features
+        self.kwargs = kwargs
+        self.score = score
+        self.block_size = block_size
+        self.append_input = append_input
+        self.lasso_kwargs = lasso_kwargs
+        self.features = None
+        self.terms = None
+        self.changes_num_samples = False
+        self.row_independent = True
+
+    def fit(self, X, y=None):
+        """ Scores the combinations of the given data block by block and keeps the best ones
+        
+        Parameters
+        ----------
+        X (DataFrame) : training data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        Returns
+        -------
+        (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
+        """
+        if y is None:
+            print(f"{self.description} step is supervised and needs target values")
+            raise ValueError
+        check_dense(X, self.description)
+        dtype = float_dtype(X)
+        values = X.to_numpy(dtype=dtype)
+        target = np.asarray(y, dtype=np.float64).ravel()
+
+        # The best combinations so far, as their positions in the order PolyStep creates them
+        best_order = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0)
+        best_terms = []
+        order = 0
+        for block in _poly_blocks(X.shape[1], self.block_size, **self.kwargs):
+            scores = np.nan_to_num(self._score_block(poly_product(values, block, dtype=dtype), target), nan=-1)
+            all_order = np.concatenate((best_order, np.arange(order, order + len(block))))
+            all_scores = np.concatenate((best_scores, scores))
+            all_terms = best_terms + block
+            order += len(block)
+            keep = np.argsort(-all_scores, kind='mergesort')[:int(self.num_features)]
+            best_order, best_scores, best_terms = all_order[keep], all_scores[keep], [all_terms[i] for i in keep]
+
+        # The kept combinations are created in the same order as PolyStep
+        sort = np.argsort(best_order)
+        self.terms = [tuple(X.columns[i] for i in best_terms[j]) for j in sort]
+        self.features = pd.Series(best_scores[sort], index=[poly_feature_name(best_terms[j], X.columns) for j in sort])
+        return self.transform(X, y=y)
+
+    def transform(self, X, y=None):
+        """ Creates the kept combinations of the given data
+        
+        Parameters
+        ----------
+        X (DataFrame) : training data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        Returns
+        -------
+        (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
+        """
+        if self.features is None:
+            raise TransformError
+        check_dense(X, self.description)
+        positions = [tuple(X.columns.get_loc(c) for c in term) for term in self.terms]
+        dtype = float_dtype(X)
+        new_X = pd.DataFrame(poly_product(X.to_numpy(dtype=dtype), positions, dtype=dtype), columns=self.features.index, index=X.index)
+        if self.append_input:
+            new_X = pd.concat((X, new_X), axis=1)
+        if y is None:
+            return new_X
+        return new_X, y
+
+    def input_features(self):
+        """ Returns the columns the kept combinations multiply, which are the only columns the step needs from the step before it
+        
+        Returns
+        -------
+        (list) : the names of the columns, or None if every column is needed since the input is appended
+        """
+        if self.features is None:
+            raise TransformError
+        if self.append_input:
+            return None
+        return list(dict.fromkeys(c for term in self.terms for c in term))
+
+    def compile_kernel(self, columns, dtype=np.float64):
+        """ Compiles the fitted step into a function on float ndarrays for CompiledPipeline
+        
+        Parameters
+        ----------
+        columns (Index) : the columns of the data the step will be given
+
+        dtype (dtype, default=np.float64) : the float type of the arrays the kernel is given
+
+        Returns
+        -------
+        (function, Index) : the kernel, which is called with the array and whether it may be overwritten, and the columns of its output
+        """
+        if self.features is None:
+            raise TransformError
+        positions = [tuple(columns.get_loc(c) for c in term) for term in self.terms]
+        append_input = self.append_input
+        def kernel(X, owned):
+            new_X = poly_product(X, positions, dtype=dtype)
+            if append_input:
+                return append_columns(X, new_X)
+            return new_X
+        if append_input:
+            return kernel, columns.append(self.features.index)
+        return kernel, self.features.index
+
+    def _score_block(self, block, target):
+        """ Returns the score of each combination in a block """
+        if self.score == 'corr':
+            return np.abs(_CorrStats(None).partial_fit(block, target).correlations())
+        from sklearn.linear_model import Lasso
+        std = block.std(axis=0, dtype=np.float64)
+        std[std == 0] = 1
+        block -= block.mean(axis=0, dtype=np.float64)
+        block /= std
+        return np.abs(Lasso(**self.lasso_kwargs).fit(block, target - target.mean()).coef_)
+
+class _ChiSqStats():
+    def __init__(self, columns):
+        """ Running statistics needed to compute the chi squared scores of min max scaled features over chunks of data
+        
+        Parameters
+        ----------
+        columns (list) : the names of the features
+        """
+        self.columns = columns
+        self.minimum = None
+        self.maximum = None
+        self.class_counts = {}
+        self.class_sums = {}
+
+    def partial_fit(self, X, y):
+        """ Adds the feature ranges and the count and feature sums of each class in the chunk """
+        y = np.asarray(y)
+        if sparse.issparse(X):
+            # Sparse data is max abs scaled like in ChiSqSelectionStep.fit, so the minimum stays at zero
+            X = X.tocsr()
+            minimum = np.zeros(X.shape[1])
+            maximum = abs(X).max(axis=0).toarray().ravel()
+        else:
+            X = np.asarray(X, dtype=np.float64)
+            minimum = X.min(axis=0)
+            maximum = X.max(axis=0)
+        if self.minimum is None:
+            self.minimum = minimum
+            self.maximum = maximum
+        else:
+            self.minimum = np.minimum(self.minimum, minimum)
+            self.maximum = np.maximum(self.maximum, maximum)
+        for label in np.unique(y):
+            X_label = X[y == label]
+            self.class_counts[label] = self.class_counts.get(label, 0) + X_label.shape[0]
+            self.class_sums[label] = self.class_sums.get(label, 0) + np.asarray(X_label.sum(axis=0)).ravel()
+        return self
+
+    def scores(self):
+        """ Returns the chi squared score of each feature, with undefined scores set to the lowest value """
+        labels = list(self.class_counts)
+        counts = np.array([self.class_counts[label] for label in labels], dtype=np.float64)
+        sums = np.array([self.class_sums[label] for label in labels])
+
+        # Min max scaling is linear, so the class sums of the scaled features come from the raw sums
+        feature_range = self.maximum - self.minimum
+        feature_range[feature_range == 0] = 1
+        observed = (sums - counts[:, np.newaxis] * self.minimum) / feature_range
+        expected = np.outer(counts / counts.sum(), observed.sum(axis=0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = ((observed - expected) ** 2 / expected).sum(axis=0)
+        scores[np.isnan(scores)] = np.finfo(scores.dtype).min
+        return scores
+
+def _target_correlations(X, y, kwargs):
+    """ Returns the correlation of each numeric column of X with the target. Pearson correlations and spearman correlations without missing values are computed in one vectorized pass, and other methods use pandas's corrwith, which still only pairs each column with the target. """
+    method = kwargs.get('method', 'pearson')
+    X = X.select_dtypes(include=['number', 'bool'])
+    target = np.asarray(y, dtype=np.float64).ravel()
+    if has_sparse_columns(X):
+        if method != 'pearson':
+            raise TypeError(f'The {method} method cannot be computed on sparse data without making it dense, use the pearson method')
+        stats = _CorrStats(list(X.columns)).partial_fit(as_model_input(X), target)
+        return pd.Series(stats.correlations(kwargs.get('min_periods', 1)), index=X.columns)
+    if method == 'spearman' and not (X.isna().to_numpy().any() or np.isnan(target).any()):
+        # Without missing values every pair of columns has the same rows, so each column only needs ranking once
+        X = X.rank()
+        target = pd.Series(target).rank().to_numpy()
+        method = 'pearson'
+    if method != 'pearson':
+        return X.corrwith(pd.Series(target, index=X.index), method=method)
+    stats = _CorrStats(list(X.columns)).partial_fit(X, target)
+    return pd.Series(stats.correlations(kwargs.get('min_periods', 1)), index=X.columns)
+
+class _CorrStats():
+    def __init__(self, columns):
+        """ Running statistics needed to compute the pearson correlation of each feature with the target over chunks of data. Each feature only uses the rows where it and the target are not missing, like pandas's corr method.
+        
+        Parameters
+        ----------
+        columns (list) : the names of the features
+        """
+        self.columns = columns
+        self.count = None
+        self.mean_x = None
+        self.mean_y = None
+        self.m2_x = None
+        self.m2_y = None
+        self.co_moment = None
+
+    def partial_fit(self, X, y):
+        """ Merges the count, means, sums of squared deviations and co-moments of a chunk into the accumulated statistics """
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if sparse.issparse(X):
+            # Sparse data has no missing values, and the zeros are left out of the sums
+            count = np.full(X.shape[1], X.shape[0], dtype=np.float64)
+            mean_x = np.asarray(X.mean(axis=0)).ravel()
+            mean_y = np.full(X.shape[1], y.mean())
+            y_c = y - y.mean()
+            m2_x = np.maximum(np.asarray(X.multiply(X).sum(axis=0)).ravel() - X.shape[0] * mean_x ** 2, 0)
+            m2_y = np.full(X.shape[1], y_c @ y_c)
+            co_moment = np.asarray(X.T @ y_c).ravel()
+            return self._merge(count, mean_x, mean_y, m2_x, m2_y, co_moment)
+
+        X = np.asarray(X, dtype=np.float64)
+        valid = ~np.isnan(X) & ~np.isnan(y)[:, np.newaxis]
+        if valid.all():
+            count = np.full(X.shape[1], X.shape[0], dtype=np.float64)
+            mean_x = X.mean(axis=0)
+            mean_y = np.full(X.shape[1], y.mean())
+            X_c = X - mean_x
+            y_c = y - mean_y[0] if len(mean_y) else y
+            m2_x = np.einsum('ij,ij->j', X_c, X_c)
+            m2_y = np.full(X.shape[1], y_c @ y_c)
+            co_moment = y_c @ X_c
+        else:
+            count = valid.sum(axis=0).astype(np.float64)
+            Y = np.broadcast_to(y[:, np.newaxis], X.shape)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean_x = np.where(count > 0, np.where(valid, X, 0).sum(axis=0) / count, 0)
+                mean_y = np.where(count > 0, np.where(valid, Y, 0).sum(axis=0) / count, 0)
+            X_c = np.where(valid, X - mean_x, 0)
+            Y_c = np.where(valid, Y - mean_y, 0)
+            m2_x = np.einsum('ij,ij->j', X_c, X_c)
+            m2_y = np.einsum('ij,ij->j', Y_c, Y_c)
+            co_moment = np.einsum('ij,ij->j', X_c, Y_c)
+        return self._merge(count, mean_x, mean_y, m2_x, m2_y, co_moment)
+
+    def _merge(self, count, mean_x, mean_y, m2_x, m2_y, co_moment):
+        """ Merges the statistics of a chunk into the accumulated statistics """
+        if self.count is None:
+            self.count, self.mean_x, self.mean_y, self.m2_x, self.m2_y, self.co_moment = count, mean_x, mean_y, m2_x, m2_y, co_moment
+            return self
+
+        # Chan et al.'s pairwise update keeps the sums of deviations accurate without subtracting large raw sums
+        total = self.count + count
+        share = np.divide(count, total, out=np.zeros_like(total), where=total > 0)
+        weight = self.count * share
+        delta_x = mean_x - self.mean_x
+        delta_y = mean_y - self.mean_y
+        self.mean_x = self.mean_x + delta_x * share
+        self.mean_y = self.mean_y + delta_y * share
+        self.m2_x = self.m2_x + m2_x + delta_x * delta_x * weight
+        self.m2_y = self.m2_y + m2_y + delta_y * delta_y * weight
+        self.co_moment = self.co_moment + co_moment + delta_x * delta_y * weight
+        self.count = total
+        return self
+
+    def correlations(self, min_periods=1):
+        """ Returns the correlation of each feature with the target, which is missing for constant features and features with fewer than min_periods rows """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.co_moment / np.sqrt(self.m2_x * self.m2_y)
+        corr[self.count < max(min_periods, 1)] = np.nan
+        return np.clip(corr, -1, 1)
+
+def _poly_blocks(num_inputs, block_size, degree=2, interaction_only=False, **kwargs):
+    """ Yields lists of up to block_size combinations of column positions, in the order of sklearn's PolynomialFeatures without the bias column """
+    min_degree, max_degree = degree if isinstance(degree, tuple) else (1, degree)
+    combine = combinations if interaction_only else combinations_with_replacement
+    terms = chain.from_iterable(combine(range(num_inputs), d) for d in range(max(min_degree, 1), max_degree + 1))
+    while True:
+        block = list(islice(terms, block_size))
+        if not block:
+            return
+        yield block
@@ -0,0 +1,243 @@
+# External Imports
+import hashlib
+import inspect
+import os
+import pickle
+import types
+import warnings
+import numpy as np
+import pandas as pd
+
+################################################################################################
+# FIT CACHE
+################################################################################################
+class FitCache():
+    def __init__(self, directory, max_bytes=None):
+        """ Stores fitted steps and their fit output on disk so that fitting the same steps on the same data again loads them instead. Entries are keyed on a fingerprint of the pipeline's input data and the class and arguments of every step up to and including the cached step. The least recently used entries are removed when the cache grows past max_bytes.
+
+        Parameters
+        ----------
+        directory (str) : the directory to store the cache in. It is created if it does not exist
+
+        max_bytes (int, default=None) : the maximum total size of the cached entries. If None the cache is never trimmed
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def fingerprint(self, X, y=None):
+        """ Returns a key for the given data that changes whenever its values, index, columns or types change
+
+        Parameters
+        ----------
+        X (DataFrame) : the data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        Returns
+        -------
+        (str) : the fingerprint of the data
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        for data in (X, y):
+            if data is None:
+                digest.update(b'None')
+                continue
+            digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+            if isinstance(data, pd.DataFrame):
+                digest.update(repr(list(data.columns)).encode())
+                digest.update(repr(list(data.dtypes)).encode())
+            else:
+                digest.update(repr((data.name, data.dtype)).encode())
+        return digest.hexdigest()
+
+    def output_key(self, key, step):
+        """ Returns the key of the output of a step given the key of its input
+
+        Parameters
+        ----------
+        key (str) : the key of the data the step is fitted on
+
+        step (object) : the step being fitted
+
+        Returns
+        -------
+        (str) : the key of the fitted step and its output
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(key.encode())
+        digest.update(step_key(step).encode())
+        return digest.hexdigest()
+
+    def load(self, key):
+        """ Loads a cached entry and marks it as recently used
+
+        Parameters
+        ----------
+        key (str) : the key of the entry
+
+        Returns
+        -------
+        (tuple) : a tuple of the fitted step's attributes, the X data and the y data, or None if the entry is not cached
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return entry
+
+    def store(self, key, step, X, y=None):
+        """ Stores a fitted step and its output, then removes the least recently used entries if the cache is over its size limit
+
+        Parameters
+        ----------
+        key (str) : the key of the entry
+
+        step (object) : the fitted step
+
+        X (DataFrame) : the output of fitting the step
+
+        y (DataFrame, default=None) : the target values output by fitting the step. If the step or its output cannot be pickled a warning is given and nothing is stored
+        """
+        path = self._path(key)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                pickle.dump((vars(step), X, y), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            # Steps holding lambdas or other unpicklable objects are fitted as usual but not cached
+            os.remove(temp_path)
+            warnings.warn(f'{type(step).__name__} was not cached since it could not be pickled: {e}')
+            return
+        os.replace(temp_path, path)
+        self._evict()
+
+    def info(self):
+        """ Returns the hit, miss and eviction counts along with the number and total size of the cached entries
+
+        Returns
+        -------
+        (dict) : the cache statistics
+        """
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'bytes': sum(size for _, _, size in entries)
+        }
+
+    def clear(self):
+        """ Removes every cached entry """
+        for path, _, _ in self._entries():
+            os.remove(path)
+
+    def _path(self, key):
+        """ Returns the file path of an entry """
+        return os.path.join(self.directory, f'{key}.pkl')
+
+    def _entries(self):
+        """ Returns a list of (path, last used time, size) tuples for the cached entries """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict(self):
+        """ Removes the least recently used entries until the cache is within its size limit """
+        if self.max_bytes is None:
+            return
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+################################################################################################
+def step_key(step):
+    """ Returns a key for the configuration of a step, which is the same for steps of the same class created with the same arguments, in this run or any other, and different when any argument differs. What the step learned while fitting is not part of the key.
+
+    Parameters
+    ----------
+    step (object) : the step, which may be fitted or not
+
+    Returns
+    -------
+    (str) : the key of the step
+    """
+    return hashlib.blake2b(_describe(step).encode(), digest_size=20).hexdigest()
+
+def _describe(value):
+    """ Returns a string describing a step's configuration or an argument of it, which is stable between runs """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes, np.generic, np.dtype)):
+        return repr(value)
+    if isinstance(value, np.ndarray):
+        # The repr of a large array leaves out most of its values, so its contents are hashed instead
+        data = repr(value.tolist()).encode() if value.dtype == object else np.ascontiguousarray(value).tobytes()
+        digest = hashlib.blake2b(data, digest_size=20)
+        return f'ndarray({value.dtype}, {value.shape}, {digest.hexdigest()})'
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        digest = hashlib.blake2b(pd.util.hash_pandas_object(value).values.tobytes(), digest_size=20)
+        labels = list(value.columns) if isinstance(value, pd.DataFrame) else getattr(value, 'name', None)
+        return f'{type(value).__name__}({_describe(labels)}, {digest.hexdigest()})'
+    if isinstance(value, dict):
+        return '{' + ', '.join(f'{_describe(k)}: {_describe(v)}' for k, v in sorted(value.items(), key=lambda item: repr(item[0]))) + '}'
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__ + '(' + ', '.join(_describe(v) for v in value) + ')'
+    if isinstance(value, (set, frozenset)):
+        return type(value).__name__ + '(' + ', '.join(sorted(_describe(v) for v in value)) + ')'
+    if isinstance(value, np.random.RandomState):
+        return f'RandomState({_describe(value.get_state())})'
+    if isinstance(value, np.random.Generator):
+        return f'Generator({_describe(value.bit_generator.state)})'
+    if isinstance(value, types.FunctionType):
+        # Lambdas and closures share their qualified name with others in the same module, so functions are also described by their code, defaults and closure values
+        closure = [cell.cell_contents for cell in value.__closure__ or ()]
+        return f'{value.__module__}.{value.__qualname__}({_describe_code(value.__code__)}, {_describe(value.__defaults__)}, {_describe(closure)})'
+    if isinstance(value, types.CodeType):
+        return _describe_code(value)
+    if inspect.isclass(value) or inspect.isroutine(value) or isinstance(value, np.ufunc):
+        return f'{getattr(value, "__module__", None) or type(value).__module__}.{getattr(value, "__qualname__", value.__name__)}'
+    if hasattr(value, 'get_params'):
+        # sklearn estimators given as arguments
+        return f'{type(value).__module__}.{type(value).__qualname__}({_describe(value.get_params(deep=False))})'
+    if type(value).__repr__ is object.__repr__:
+        # The default repr holds the memory address of the object, so objects such as steps are described by the arguments they were created with, which they keep as attributes of the same name
+        return f'{type(value).__module__}.{type(value).__qualname__}({_describe(_constructor_arguments(value))})'
+    return repr(value)
+
+def _describe_code(code):
+    """ Returns a string describing the bytecode of a function along with the constants and names it uses """
+    digest = hashlib.blake2b(code.co_code, digest_size=20)
+    return f'code({digest.hexdigest()}, {_describe(code.co_consts)}, {_describe(code.co_names)})'
+
+def _constructor_arguments(value):
+    """ Returns the arguments of an object's class that the object keeps as attributes of the same name """
+    try:
+        parameters = inspect.signature(type(value).__init__).parameters
+    except (TypeError, ValueError):
+        return {}
+    attributes = getattr(value, '__dict__', {})
+    return {name: attributes[name] for name in parameters if name != 'self' and name in attributes}
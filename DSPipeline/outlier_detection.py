@@ -1,31 +1,64 @@
 # External Imports
+# pyod and the sklearn outlier detectors are imported when a step is fitted, so that importing this module stays fast
+import numpy as np
 import pandas as pd
-from pyod.models.abod import ABOD
-from sklearn.ensemble import IsolationForest
-from sklearn.neighbors import LocalOutlierFactor
 
 # Internal Imports
-from .data_managing import split_x_y
+from .data_managing import check_dense, split_x_y
 from .errors import TransformError
 
+################################################################################################
+# SAMPLE REMOVAL
+################################################################################################
+def _remove_samples(X, y, keep):
+    """ Removes samples from the data with a single boolean mask, so X and y are each rebuilt once regardless of the number of outliers. The mask is positional, so any index works.
+    
+    Parameters
+    ----------
+    X (DataFrame) : the data to remove samples from
+
+    y (DataFrame) : the target values to remove samples from, or None
+
+    keep (array) : a boolean array with one value for each row, True for the rows to keep
+
+    Returns
+    -------
+    (DataFrame, DataFrame) : a tuple of the DataFrames with the samples removed and their index reset, the first being the X data and the second being the y data
+    """
+    keep = np.asarray(keep, dtype=bool)
+    X = X[keep].reset_index(drop=True)
+    if y is None:
+        return X
+    return X, y[keep].reset_index(drop=True)
+
 ################################################################################################
 # ANGLE BASED OUTLIER DETECTION
 ################################################################################################
 class ABODStep():
-    def __init__(self, num_remove, kwargs={}):
-        """ Uses angle based outlier detection to detect and remove outliers. Uses pyod’s ABOD class.
+    def __init__(self, num_remove, max_reference=None, reference='random', random_state=None, kwargs={}):
+        """ Uses angle based outlier detection to detect and remove outliers. Uses pyod’s ABOD class with the fast, k nearest neighbors based method unless another method is given in kwargs.
         
         Parameters
         ----------
-        num_remove (int) : number of detected outliers to remove
+        num_remove (int) : number of detected outliers to remove from the data given to fit or transform
+
+        max_reference (int, default=None) : the maximum number of training samples kept as the reference set that new samples are scored against. If None all of the training samples are used.
+
+        reference (str, default='random') : how to reduce the training data to max_reference samples, either 'random' for a random subsample or 'kmeans' for the cluster centers of sklearn's MiniBatchKMeans
+
+        random_state (int, default=None) : seed used when reducing the reference set
         
         kwargs (dict, default={}) : arguments to pass to pyod's ABOD class initialization
         """
         self.description = 'Angle Based Outlier Detection'
         self.num_remove = num_remove
+        self.max_reference = max_reference
+        self.reference = reference
+        self.random_state = random_state
         self.kwargs = kwargs
         self.fitted = None
         self.changes_num_samples = True
+        self.row_independent = False
 
     def fit(self, X, y=None):
         """ Fits the outlier detection on the given data
@@ -40,10 +73,25 @@ class ABODStep():
         -------
         (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
-        abod = ABOD(**self.kwargs)
-        self.fitted = abod.fit(X)
+        check_dense(X, self.description)
+        from pyod.models.abod import ABOD
+        abod = ABOD(**dict({'method': 'fast'}, **self.kwargs))
+        self.fitted = abod.fit(self._reference_set(X))
         return self.transform(X, y=y)
 
+    def _reference_set(self, X):
+        """ Reduces the training data to at most max_reference samples so that fitting and scoring stay bounded """
+        if self.max_reference is None or X.shape[0] <= self.max_reference:
+            return X
+        if self.reference == 'random':
+            return X.sample(n=self.max_reference, random_state=self.random_state)
+        if self.reference == 'kmeans':
+            from sklearn.cluster import MiniBatchKMeans
+            kmeans = MiniBatchKMeans(n_clusters=self.max_reference, random_state=self.random_state)
+            kmeans.fit(X)
+            return pd.DataFrame(kmeans.cluster_centers_, columns=X.columns)
+        raise ValueError(f"reference must be 'random' or 'kmeans', was {self.reference}")
+
     def transform(self, X, y=None):
         """ Transforms the given data using the previously fitted outlier detection method
         
@@ -59,19 +107,14 @@ class ABODStep():
         """
         if self.fitted is None:
             raise TransformError
+        check_dense(X, self.description)
         
-        scores = pd.DataFrame(self.fitted.decision_scores_*-1, columns=['score'])
-        scores = scores.sort_values('score', ascending=False)
-
-        # Remove outliers
-        rm_index = scores.head(self.num_remove).index
-        X = X.drop(index=rm_index).reset_index(drop=True)
-
-        if y is None:
-            return X
-
-        y = y.drop(index=rm_index).reset_index(drop=True)
-        return X, y 
+        # Higher scores are more abnormal, so remove the samples with the highest scores
+        scores = self.fitted.decision_function(X)
+        keep = np.ones(X.shape[0], dtype=bool)
+        if self.num_remove > 0:
+            keep[np.argsort(-scores, kind='mergesort')[:self.num_remove]] = False
+        return _remove_samples(X, y, keep)
 
 ################################################################################################
 # ISOLATION FOREST
@@ -90,6 +133,7 @@ class IsoForestStep():
         self.include_y = include_y
         self.kwargs = kwargs
         self.changes_num_samples = True
+        self.row_independent = True
         self.fitted = None
 
     def fit(self, X, y=None):
@@ -105,6 +149,8 @@ class IsoForestStep():
         -------
         (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
+        check_dense(X, self.description)
+        from sklearn.ensemble import IsolationForest
         self.fitted = IsolationForest(**self.kwargs)
         self.fitted.fit(X, y)
         return self.transform(X, y=y)
@@ -124,40 +170,33 @@ class IsoForestStep():
         """
         if self.fitted is None:
             raise TransformError
+        check_dense(X, self.description)
 
         outlier_labels = self.fitted.predict(X)
-
-        # Remove outliers from data
-        for i in range(outlier_labels.shape[0]):
-            if outlier_labels[i] == -1:
-                X = X.drop(index=i)
-                if y is not None:
-                    y = y.drop(index=i)
-
-        if y is None:
-            return X.reset_index(drop=True)
-        
-        y = y.reset_index(drop=True)
-        return X.reset_index(drop=True), y
+        return _remove_samples(X, y, outlier_labels != -1)
 
 ################################################################################################
 # LOCAL OUTLIER FACTOR
 ################################################################################################
 class LOFStep():
-    def __init__(self, include_y=True, kwargs={'contamination': 'auto'}):
+    def __init__(self, include_y=True, novelty=False, kwargs={'contamination': 'auto'}):
         """ Uses the local outlier factor to detect and remove outliers. Uses sklearn’s LocalOutlierFactor class.
         
         Parameters
         ----------
         include_y (bool, default=True), Whether or not to include the y data when fitting the isolation forest
 
+        novelty (bool, default=False) : Whether to fit the neighbors once on the training data and score new data against them. If False the local outlier factor is refit on the data given to every transform call.
+
         kwargs (dict, default={'contamination': 'auto'}) : arguments to pass to sklearn’s IsolationForest class initialization
         """
         self.description = "Local Outlier Factor"
         self.include_y = include_y
+        self.novelty = novelty
         self.kwargs = kwargs
         self.fitted = None
         self.changes_num_samples = True
+        self.row_independent = novelty
 
     def fit(self, X, y=None):
         """ Fits the outlier detection on the given data
@@ -172,6 +211,15 @@ class LOFStep():
         -------
         (DataFrame, DataFrame) : A tuple of the transformed DataFrames, the first being the X data and the second being the y data
         """
+        check_dense(X, self.description)
+        from sklearn.neighbors import LocalOutlierFactor
+        if self.novelty:
+            self.fitted = LocalOutlierFactor(**dict(self.kwargs, novelty=True))
+            self.fitted.fit(X)
+
+            # Predicting on the training data would count each sample as its own neighbor, so use the factors found while fitting
+            return _remove_samples(X, y, self.fitted.negative_outlier_factor_ >= self.fitted.offset_)
+
         self.fitted = LocalOutlierFactor(**self.kwargs)
         return self.transform(X, y=y)
 
@@ -190,18 +238,10 @@ class LOFStep():
         """
         if self.fitted is None:
             raise TransformError
+        check_dense(X, self.description)
 
-        outlier_labels = self.fitted.fit_predict(X, y)
-
-        # Remove outliers from data
-        for i in range(outlier_labels.shape[0]):
-            if outlier_labels[i] == -1:
-                X = X.drop(index=i)
-                if y is not None:
-                    y = y.drop(index=i)
-        
-        if y is None:
-            return X.reset_index(drop=True)
-        
-        y = y.reset_index(drop=True)
-        return X.reset_index(drop=True), y
\ No newline at end of file
+        if self.novelty:
+            outlier_labels = self.fitted.predict(X)
+        else:
+            outlier_labels = self.fitted.fit_predict(X, y)
+        return _remove_samples(X, y, outlier_labels != -1)
\ No newline at end of file
@@ -0,0 +1,96 @@
+# External Imports
+import os
+import pickle
+import shutil
+import numpy as np
+
+# Arrays smaller than this are kept in the pickle since mapping them would not save anything
+MIN_ARRAY_BYTES = 1024
+
+FORMAT_VERSION = 1
+OBJECT_FILE = 'pipeline.pkl'
+ARRAY_DIRECTORY = 'arrays'
+
+################################################################################################
+# SAVING
+################################################################################################
+def save(obj, path):
+    """ Saves a fitted pipeline or step to a directory. The learned arrays (scaler means, PCA components, LDA scalings, etc.) are written as uncompressed .npy files so they can be memory mapped when loading, and everything else is pickled. The node arrays of fitted sklearn trees are kept in the pickle, since sklearn copies them into the tree when it is loaded.
+
+    Parameters
+    ----------
+    obj (object) : the fitted pipeline or step to save
+
+    path (str) : the directory to save to. Any previously saved arrays in it are replaced
+    """
+    array_path = os.path.join(path, ARRAY_DIRECTORY)
+    if os.path.isdir(array_path):
+        shutil.rmtree(array_path)
+    os.makedirs(array_path)
+    with open(os.path.join(path, OBJECT_FILE), 'wb') as f:
+        _ArrayPickler(f, array_path).dump({'format_version': FORMAT_VERSION, 'object': obj})
+
+################################################################################################
+# LOADING
+################################################################################################
+def load(path, mmap=True):
+    """ Loads a pipeline or step saved with save
+
+    Parameters
+    ----------
+    path (str) : the directory the pipeline was saved to
+
+    mmap (bool, default=True) : whether to memory map the learned arrays instead of reading them. Mapped arrays are read only and processes that load the same files share their memory, which makes loading fast. Tree node arrays are always read into each process. Use False if the loaded steps will be fitted again.
+
+    Returns
+    -------
+    (object) : the loaded pipeline or step
+    """
+    with open(os.path.join(path, OBJECT_FILE), 'rb') as f:
+        saved = _ArrayUnpickler(f, os.path.join(path, ARRAY_DIRECTORY), mmap).load()
+    if saved.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"{path} was saved with format version {saved.get('format_version')}, expected {FORMAT_VERSION}")
+    return saved['object']
+
+################################################################################################
+class _ArrayPickler(pickle.Pickler):
+    def __init__(self, file, array_path):
+        """ A pickler that writes large numeric arrays to their own .npy files instead of the pickle, except for the node arrays of sklearn trees """
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.array_path = array_path
+        self.saved = {}
+
+    def persistent_id(self, obj):
+        """ Saves mappable arrays to a file and returns a reference to it, or None to pickle the object normally """
+        # sklearn copies the node arrays of a tree when loading it, so mapping them would not save anything and trees are pickled on their own
+        if type(obj).__name__ == 'Tree' and type(obj).__module__ == 'sklearn.tree._tree':
+            return ('pickle', pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+        if type(obj) not in (np.ndarray, np.memmap) or obj.dtype.hasobject or obj.nbytes < MIN_ARRAY_BYTES:
+            return None
+
+        # Arrays that are referenced more than once are only saved once
+        if id(obj) not in self.saved:
+            name = f'{len(self.saved)}.npy'
+            np.save(os.path.join(self.array_path, name), obj, allow_pickle=False)
+            self.saved[id(obj)] = (name, obj)
+        return ('ndarray', self.saved[id(obj)][0])
+
+class _ArrayUnpickler(pickle.Unpickler):
+    def __init__(self, file, array_path, mmap):
+        """ An unpickler that loads the arrays written by _ArrayPickler, memory mapping them if mmap is True """
+        super().__init__(file)
+        self.array_path = array_path
+        self.mmap_mode = 'r' if mmap else None
+        self.loaded = {}
+
+    def persistent_load(self, pid):
+        """ Loads the array file or pickled object a reference points to """
+        kind, name = pid
+        if kind == 'pickle':
+            # name holds the pickled object itself
+            return pickle.loads(name)
+        if kind != 'ndarray':
+            raise pickle.UnpicklingError(f'Unknown reference type {kind}')
+        if name not in self.loaded:
+            self.loaded[name] = np.load(os.path.join(self.array_path, name), mmap_mode=self.mmap_mode, allow_pickle=False)
+        return self.loaded[name]
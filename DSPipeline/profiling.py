@@ -0,0 +1,129 @@
+# External Imports
+from collections import deque
+import time
+import tracemalloc
+import pandas as pd
+
+# The number of recent step calls kept by a profiler by default
+MAX_RECORDS = 100000
+
+################################################################################################
+# PIPELINE PROFILER
+################################################################################################
+class PipelineProfiler():
+    def __init__(self, memory=False, callbacks=None, max_records=MAX_RECORDS):
+        """ Records how long each step of a pipeline takes every time it is fitted or transformed. Pass it to a Pipeline with the profiler argument. A pipeline without a profiler does no extra work, and timing a step only reads two clocks, so a profiler can be left on in production.
+
+        Parameters
+        ----------
+        memory (bool, default=False) : Whether to record the memory used by each step with tracemalloc. Tracing memory slows down every allocation, so it is meant for finding the step that uses the most memory rather than for production. When profiled pipelines are nested, the peak of the outer step only covers the time since the last inner step started. Before Python 3.9 tracemalloc cannot reset its peak, so the peak of the inner steps is not recorded.
+
+        callbacks (list, default=None) : Functions called with the record of each step call as soon as the step returns, such as a function that sends the times to a metrics system
+
+        max_records (int, default=100000) : The number of recent records kept by the profiler. If None every record is kept.
+        """
+        self.memory = memory
+        self.callbacks = list(callbacks) if callbacks is not None else []
+        self.records = deque(maxlen=max_records)
+
+    def run(self, position, description, method, X, func):
+        """ Calls a step of a pipeline, records it and returns its output
+
+        Parameters
+        ----------
+        position (int) : the position of the step in its pipeline
+
+        description (str) : the description of the step
+
+        method (str) : the method of the step being called, such as 'fit', 'transform' or 'partial_fit'
+
+        X (DataFrame) : the data given to the step
+
+        func (function) : a function without arguments that calls the step
+
+        Returns
+        -------
+        (object) : the output of func
+        """
+        started_tracing = False
+        peak_reset = True
+        if self.memory:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            elif hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            else:
+                # Before Python 3.9 the peak cannot be reset without stopping the tracing that is already running, which would lose the memory it traced
+                peak_reset = False
+            memory_before = tracemalloc.get_traced_memory()[0]
+
+        start = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            output = func()
+        finally:
+            wall_seconds = time.perf_counter() - wall_start
+            cpu_seconds = time.process_time() - cpu_start
+            if self.memory:
+                memory_after, memory_peak = tracemalloc.get_traced_memory()
+                if started_tracing:
+                    tracemalloc.stop()
+
+        output_X = output[0] if isinstance(output, tuple) else output
+        input_shape = getattr(X, 'shape', None)
+        output_shape = getattr(output_X, 'shape', None)
+        record = {
+            'step': position,
+            'description': description,
+            'method': method,
+            'start': start,
+            'wall_seconds': wall_seconds,
+            'cpu_seconds': cpu_seconds,
+            'input_shape': input_shape,
+            'output_shape': output_shape,
+            'rows_removed': input_shape[0] - output_shape[0] if input_shape is not None and output_shape is not None else None,
+            'peak_memory_delta': memory_peak - memory_before if self.memory and peak_reset else None,
+            'allocated_bytes': memory_after - memory_before if self.memory else None
+        }
+        self.records.append(record)
+        for callback in self.callbacks:
+            callback(record)
+        return output
+
+    def to_frame(self):
+        """ Returns the records of the step calls, oldest first. The columns are the position of the step, its description, the method called, the time.time() it started, the wall and CPU seconds it took, the shapes of its input and output, the number of rows it removed, and, if memory is recorded, the peak memory above what was allocated when it started and the bytes still allocated when it returned, which include its output. CPU time is for the whole process, so it includes the threads a step starts.
+
+        Returns
+        -------
+        (DataFrame) : one row per step call
+        """
+        return pd.DataFrame(list(self.records), columns=['step', 'description', 'method', 'start', 'wall_seconds', 'cpu_seconds', 'input_shape', 'output_shape',
+                                                         'rows_removed', 'peak_memory_delta', 'allocated_bytes'])
+
+    def summary(self):
+        """ Returns the number of calls and the total and mean times of each method of each step, along with the largest peak memory delta
+
+        Returns
+        -------
+        (DataFrame) : one row per step and method, in the order of the steps
+        """
+        frame = self.to_frame()
+        frame['peak_memory_delta'] = frame['peak_memory_delta'].astype(float)
+        return frame.groupby(['step', 'description', 'method'], sort=True).agg(
+            calls=('wall_seconds', 'size'),
+            wall_seconds=('wall_seconds', 'sum'),
+            mean_wall_seconds=('wall_seconds', 'mean'),
+            cpu_seconds=('cpu_seconds', 'sum'),
+            max_peak_memory_delta=('peak_memory_delta', 'max'))
+
+    def clear(self):
+        """ Removes all of the records """
+        self.records.clear()
+
+    def __getstate__(self):
+        # The callbacks are often lambdas or bound to a connection, so they are not saved with a pipeline
+        state = self.__dict__.copy()
+        state['callbacks'] = []
+        return state
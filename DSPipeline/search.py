@@ -0,0 +1,164 @@
+# External Imports
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import copy
+import time
+
+# Internal Imports
+from .ds_pipeline import Pipeline
+from .fit_cache import step_key
+
+################################################################################################
+# PREFIX SEARCH
+################################################################################################
+class PrefixSearch():
+    def __init__(self, candidates, scorer=None, n_jobs=None, backend='thread'):
+        """ Fits several candidate pipelines that share leading steps, such as a grid of settings for the last few steps. The candidates are organized into a prefix tree so that every distinct prefix of steps is fitted only once, and the branches that follow it start from its output and are fitted in parallel.
+
+        Parameters
+        ----------
+        candidates (list) : A list of candidate pipelines, each given as a list of steps. Steps at the same position are shared when they have the same step_key, which means the same class and constructor arguments.
+
+        scorer (function, default=None) : A function called with the transformed X and y data of each candidate that returns its score. If None the candidates are not scored.
+
+        n_jobs (int, default=None) : The maximum number of steps to fit at the same time. If None the executor's default is used.
+
+        backend (str, default='thread') : Whether to fit the steps on a 'thread' pool or a 'process' pool
+        """
+        if backend not in ('thread', 'process'):
+            raise ValueError(f"backend must be 'thread' or 'process', was {backend}")
+        self.candidates = candidates
+        self.scorer = scorer
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.pipelines = None
+        self.scores = None
+        self.report = None
+
+    def fit(self, X, y=None, verbose=False):
+        """ Fits every candidate pipeline, fitting each shared prefix of steps once
+
+        Parameters
+        ----------
+        X (DataFrame) : the training data
+
+        y (DataFrame, default=None) : target values (if needed)
+
+        verbose (bool, default=False) : whether or not to output progress of fitting the candidates
+
+        Returns
+        -------
+        (PrefixSearch) : the fitted search, with the fitted pipelines in pipelines (built from copies of the fitted steps, so the given steps are not fitted), their scores in scores and the time saved in report
+        """
+        start = time.perf_counter()
+        root = _PrefixNode(None)
+        for index, steps in enumerate(self.candidates):
+            node = root
+            for step in steps:
+                node = node.child(step)
+            node.candidates.append(index)
+
+        outputs = {}
+        if self.backend == 'thread':
+            executor = ThreadPoolExecutor(max_workers=self.n_jobs)
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.n_jobs)
+        with executor:
+            running = {}
+            def submit_children(node, node_X, node_y):
+                for child in node.children.values():
+                    if verbose:
+                        print(f'Fitting {child.step.description}')
+                    running[executor.submit(_fit_node, child.step, node_X, node_y, self.backend == 'process')] = child
+
+            submit_children(root, X, y)
+            for index in root.candidates:
+                outputs[index] = (X, y)
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node = running.pop(future)
+                    fitted_step, node_X, node_y, node.seconds = future.result()
+                    if fitted_step is not None:
+                        node.step.__dict__.update(fitted_step.__dict__)
+                    for index in node.candidates:
+                        outputs[index] = (node_X, node_y)
+                    submit_children(node, node_X, node_y)
+
+        # Each candidate gets its own copies of the tree nodes it was fitted as, since the same step object can be given under different prefixes
+        naive_steps = 0
+        naive_seconds = 0.0
+        self.pipelines = []
+        for steps in self.candidates:
+            node = root
+            fitted_steps = []
+            for step in steps:
+                node = node.children[step_key(step)]
+                fitted_steps.append(copy.deepcopy(node.step))
+                naive_steps += 1
+                naive_seconds += node.seconds
+            self.pipelines.append(Pipeline(fitted_steps))
+        nodes = root.descendants()
+        fit_seconds = sum(node.seconds for node in nodes)
+
+        for pipeline in self.pipelines:
+            pipeline._prune_outputs()
+        if self.scorer is not None:
+            self.scores = [self.scorer(*outputs[index]) for index in range(len(self.candidates))]
+        self.report = {
+            'candidates': len(self.candidates),
+            'steps_fitted': len(nodes),
+            'naive_steps_fitted': naive_steps,
+            'fit_seconds': fit_seconds,
+            'naive_fit_seconds': naive_seconds,
+            'saved_seconds': naive_seconds - fit_seconds,
+            'wall_seconds': time.perf_counter() - start
+        }
+        if verbose:
+            print(f"Fitted {len(nodes)} steps instead of {naive_steps}, saving {self.report['saved_seconds']:.3f} seconds of fitting")
+        return self
+
+    def best(self):
+        """ Returns the index and fitted pipeline of the candidate with the highest score
+
+        Returns
+        -------
+        (int, Pipeline) : a tuple of the index of the best candidate and its fitted pipeline
+        """
+        if self.scores is None:
+            raise ValueError("A scorer is needed to find the best candidate")
+        index = max(range(len(self.scores)), key=lambda i: self.scores[i])
+        return index, self.pipelines[index]
+
+################################################################################################
+class _PrefixNode():
+    def __init__(self, step):
+        """ A node of the prefix tree, holding its own copy of a step shared by every candidate that starts with the same steps """
+        self.step = step
+        self.children = {}
+        self.candidates = []
+        self.seconds = 0.0
+
+    def child(self, step):
+        """ Returns the child for the given step, creating it if this is the first candidate with that step here """
+        key = step_key(step)
+        if key not in self.children:
+            self.children[key] = _PrefixNode(copy.deepcopy(step))
+        return self.children[key]
+
+    def descendants(self):
+        """ Returns every node below this one """
+        nodes = []
+        for child in self.children.values():
+            nodes.append(child)
+            nodes.extend(child.descendants())
+        return nodes
+
+def _fit_node(step, X, y, return_step):
+    """ Fits a single step and returns the step if it was fitted in another process, its output and the time it took """
+    start = time.perf_counter()
+    if y is None:
+        new_X, new_y = step.fit(X), None
+    else:
+        new_X, new_y = step.fit(X, y=y)
+    seconds = time.perf_counter() - start
+    return (step if return_step else None), new_X, new_y, seconds
@@ -0,0 +1,152 @@
+# External Imports
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+import numpy as np
+import pandas as pd
+
+# The number of recent batches and requests kept for the metrics
+METRICS_WINDOW = 10000
+
+################################################################################################
+# ASYNC PIPELINE RUNNER
+################################################################################################
+class AsyncPipelineRunner():
+    def __init__(self, pipeline, max_batch=64, max_wait_ms=2.0, columns=None):
+        """ Serves single record transforms from asyncio code by collecting the records of concurrent requests into batches. Each batch is transformed with one call of the pipeline's transform method on a worker thread, and every caller gets back its own row. A batch is started when it has max_batch records or when its oldest record has waited max_wait_ms.
+
+        Parameters
+        ----------
+        pipeline (Pipeline) : the fitted pipeline, or any object with a transform method such as a CompiledPipeline. Samples are never removed so that every record gets a row back.
+
+        max_batch (int, default=64) : the maximum number of records transformed together
+
+        max_wait_ms (float, default=2.0) : the longest time in milliseconds a record waits for more records to join its batch
+
+        columns (list, default=None) : the input columns, in the order of the values of array records. If None the columns the pipeline was fitted on are used.
+        """
+        if columns is None:
+            columns = getattr(getattr(pipeline, 'pipeline', pipeline), 'input_columns', None)
+        if columns is None:
+            raise ValueError('The pipeline must be fitted or given its input columns to be served')
+        self.pipeline = pipeline
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.columns = list(columns)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = []
+        self.timer = None
+        self.batch_sizes = deque(maxlen=METRICS_WINDOW)
+        self.queue_seconds = deque(maxlen=METRICS_WINDOW)
+        self.latency_seconds = deque(maxlen=METRICS_WINDOW)
+        self.num_requests = 0
+        self.num_batches = 0
+
+    async def transform(self, record):
+        """ Transforms a single record in the next batch
+
+        Parameters
+        ----------
+        record (object) : a dict mapping each input column to its value, a Series, or a 1-D array of the values in the order of columns
+
+        Returns
+        -------
+        (Series) : the transformed row
+        """
+        if isinstance(record, pd.Series):
+            record = record.to_dict()
+        if isinstance(record, dict):
+            values = [record[c] for c in self.columns]
+        else:
+            values = np.asarray(record)
+            if values.shape != (len(self.columns),):
+                raise ValueError(f'Expected {len(self.columns)} values, got an array of shape {values.shape}')
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((values, future, time.perf_counter()))
+        if len(self.pending) >= self.max_batch:
+            self._start_batch(loop)
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_wait_ms / 1000, self._start_batch, loop)
+        return await future
+
+    def metrics(self):
+        """ Returns the batch size and latency statistics of the recent batches and requests. The queueing time is how long a record waited before its batch started to be transformed, and the latency is how long until its row was returned.
+
+        Returns
+        -------
+        (dict) : the number of requests and batches, the mean and maximum batch sizes, and the median and 99th percentile queueing time and latency in milliseconds
+        """
+        def percentile(values, q):
+            if not values:
+                return None
+            return float(np.percentile(np.fromiter(values, dtype=np.float64), q)) * 1000
+
+        return {
+            'requests': self.num_requests,
+            'batches': self.num_batches,
+            'mean_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else None,
+            'max_batch_size': max(self.batch_sizes) if self.batch_sizes else None,
+            'queue_ms_p50': percentile(self.queue_seconds, 50),
+            'queue_ms_p99': percentile(self.queue_seconds, 99),
+            'latency_ms_p50': percentile(self.latency_seconds, 50),
+            'latency_ms_p99': percentile(self.latency_seconds, 99)
+        }
+
+    def close(self):
+        """ Stops the worker thread once the running batches are done """
+        self.executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _start_batch(self, loop):
+        """ Sends the pending records to the worker thread as a batch """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending[:self.max_batch], self.pending[self.max_batch:]
+        if self.pending:
+            self.timer = loop.call_later(self.max_wait_ms / 1000, self._start_batch, loop)
+        if not batch:
+            return
+        work = loop.run_in_executor(self.executor, self._transform_batch, [values for values, _, _ in batch])
+        work.add_done_callback(lambda done: self._finish_batch(batch, done))
+
+    def _transform_batch(self, rows):
+        """ Transforms a batch of records on the worker thread and returns the time it started along with the output """
+        start = time.perf_counter()
+        X = pd.DataFrame(rows, columns=self.columns)
+        new_X = self.pipeline.transform(X, allow_sample_removal=False)
+        if len(new_X) != len(rows):
+            raise ValueError(f'The pipeline returned {len(new_X)} rows for a batch of {len(rows)} records')
+        return start, new_X
+
+    def _finish_batch(self, batch, done):
+        """ Gives each caller of a finished batch its row, or the error raised while transforming it """
+        end = time.perf_counter()
+        self.num_batches += 1
+        self.num_requests += len(batch)
+        self.batch_sizes.append(len(batch))
+        if done.cancelled():
+            for _, future, _ in batch:
+                future.cancel()
+            return
+        if done.exception() is not None:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(done.exception())
+            return
+
+        start, new_X = done.result()
+        values = new_X.to_numpy()
+        for i, (_, future, queued) in enumerate(batch):
+            self.queue_seconds.append(start - queued)
+            self.latency_seconds.append(end - queued)
+            if not future.done():
+                future.set_result(pd.Series(values[i], index=new_X.columns))
@@ -0,0 +1,53 @@
+################################################################################################
+# COMPILED PIPELINE BENCHMARK
+################################################################################################
+# Compares transforming with a fitted 6 step pipeline against its compiled version, which
+# passes a single ndarray between the steps instead of building a DataFrame for each one.
+# Reports the best wall time, the peak traced memory and the number of allocated blocks.
+#
+# Run from the repository root with
+#     python -m benchmarks.compiled_pipeline_bench
+
+# External Imports
+import warnings
+import numpy as np
+
+# Internal Imports
+from benchmarks.utils import time_call, trace_call
+from DSPipeline.data_transformations import LogStep, PCAStep, PolyStep, SinStep, StandardScalerStep
+from DSPipeline.ds_pipeline import Pipeline
+from DSPipeline.feature_selection import PearsonCorrStep
+from tests.utils import rand_df
+
+SHAPES = [(1000, 10), (10000, 10), (100000, 10)]
+
+################################################################################################
+def make_pipeline():
+    """ Returns the unfitted 6 step pipeline that is benchmarked """
+    return Pipeline([
+        LogStep(append_input=True),
+        StandardScalerStep(),
+        PolyStep(kwargs={'degree':2, 'include_bias':False}),
+        PearsonCorrStep(num_features=100),
+        PCAStep(kwargs={'n_components':20}, append_input=True),
+        SinStep(columns=['PC_1', 'PC_2'], append_input=True)
+    ])
+
+################################################################################################
+def main():
+    warnings.simplefilter('ignore')
+    print(f"{'rows':>8} {'mode':>10} {'time (s)':>10} {'peak (MB)':>10} {'blocks':>8}")
+    for shape in SHAPES:
+        X, y = rand_df(shape=shape, val_range=(1, 10))
+        pipeline = make_pipeline()
+        pipeline.fit(X, y)
+        compiled = pipeline.compile()
+        np.testing.assert_allclose(compiled.transform(X).values, pipeline.transform(X).values)
+
+        for mode, transform in (('dataframe', pipeline.transform), ('compiled', compiled.transform)):
+            seconds = time_call(lambda: transform(X))
+            peak, blocks = trace_call(lambda: transform(X))
+            print(f"{shape[0]:>8} {mode:>10} {seconds:>10.4f} {peak / 1e6:>10.1f} {blocks:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+################################################################################################
+# IMPORT BENCHMARK
+################################################################################################
+# Measures the time importing DSPipeline adds on top of pandas and numpy, and the time of
+# importing a few light steps, each in a fresh interpreter so nothing is already loaded.
+# Reports the best wall time over a number of interpreters.
+#
+# Run from the repository root with
+#     python -m benchmarks.import_bench
+
+# External Imports
+import os
+import subprocess
+import sys
+
+STATEMENTS = ['import DSPipeline', 'from DSPipeline import StandardScalerStep, ListSelectionStep, Pipeline']
+REPEAT = 5
+
+IMPORT_SCRIPT = """
+import time
+import numpy, pandas
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+################################################################################################
+def time_import(statement):
+    """ Returns the best wall time of running an import statement in a fresh interpreter, after pandas and numpy are loaded """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best = float('inf')
+    for _ in range(REPEAT):
+        output = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT.format(statement=statement)], cwd=root)
+        best = min(best, float(output.decode().strip().splitlines()[-1]))
+    return best
+
+################################################################################################
+def main():
+    print(f"{'time (s)':>10}  statement")
+    for statement in STATEMENTS:
+        print(f"{time_import(statement):>10.4f}  {statement}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+################################################################################################
+# INFERENCE LATENCY BENCHMARK
+################################################################################################
+# Compares the latency of transforming a single record with Pipeline.transform on a one row
+# DataFrame against the function returned by Pipeline.compile_for_inference, given either a
+# dict or a 1-D array. Reports the median and 99th percentile latency in microseconds.
+#
+# Run from the repository root with
+#     python -m benchmarks.inference_bench
+
+# External Imports
+import warnings
+import numpy as np
+
+# Internal Imports
+from benchmarks.utils import latency_percentiles
+from DSPipeline.data_transformations import LogStep, PCAStep, StandardScalerStep
+from DSPipeline.ds_pipeline import Pipeline
+from DSPipeline.feature_selection import ListSelectionStep, PearsonCorrStep
+from tests.utils import rand_df
+
+N_FEATURES = 30
+CALLS = 10000
+
+PIPELINES = {
+    'scaler': lambda: [StandardScalerStep()],
+    'scaler, pca': lambda: [StandardScalerStep(), PCAStep(kwargs={'n_components':10})],
+    'scaler, selection': lambda: [StandardScalerStep(), PearsonCorrStep(num_features=10)],
+    'log, scaler, selection, pca': lambda: [LogStep(), StandardScalerStep(), PearsonCorrStep(num_features=15), PCAStep(kwargs={'n_components':5})],
+    'list, log': lambda: [ListSelectionStep([str(i) for i in range(0, N_FEATURES, 2)]), LogStep(append_input=True)]
+}
+
+################################################################################################
+def main():
+    warnings.simplefilter('ignore')
+    X, y = rand_df(shape=(2000, N_FEATURES), val_range=(1, 10))
+    record = X.iloc[0]
+    row, values, values_dict = X.iloc[[0]], record.to_numpy(), record.to_dict()
+
+    print(f"{'pipeline':>28} {'mode':>10} {'p50 (us)':>9} {'p99 (us)':>9}")
+    for name, make_steps in PIPELINES.items():
+        pipeline = Pipeline(make_steps())
+        pipeline.fit(X, y)
+        inference = pipeline.compile_for_inference()
+        np.testing.assert_allclose(inference(values), pipeline.transform(row).to_numpy()[0])
+
+        for mode, func in (('dataframe', lambda: pipeline.transform(row)), ('array', lambda: inference(values)), ('dict', lambda: inference(values_dict))):
+            p50, p99 = latency_percentiles(func, calls=CALLS)
+            print(f"{name:>28} {mode:>10} {p50:>9.1f} {p99:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+################################################################################################
+# OUTLIER DETECTION BENCHMARK
+################################################################################################
+# Times the sample removing steps over increasing row counts. The time per row should stay
+# roughly constant, showing that removing outliers grows linearly with the number of rows.
+#
+# Run from the repository root with
+#     python -m benchmarks.outlier_detection_bench
+
+# External Imports
+import numpy as np
+
+# Internal Imports
+from benchmarks.utils import time_call
+from DSPipeline.outlier_detection import IsoForestStep, _remove_samples
+from tests.utils import rand_df
+
+ROW_COUNTS = [20000, 40000, 80000, 160000]
+CONTAMINATION = 0.01
+
+################################################################################################
+def main():
+    print(f"{'rows':>10} {'removal (s)':>12} {'us/row':>8} {'iso forest (s)':>15} {'us/row':>8}")
+    for n_rows in ROW_COUNTS:
+        X, y = rand_df(shape=(n_rows, 10))
+        keep = np.random.uniform(size=n_rows) > CONTAMINATION
+        removal_time = time_call(lambda: _remove_samples(X, y, keep))
+
+        step = IsoForestStep(kwargs={'contamination': CONTAMINATION})
+        step.fit(X.iloc[:10000], y.iloc[:10000])
+        step_time = time_call(lambda: step.transform(X, y))
+
+        print(f"{n_rows:>10} {removal_time:>12.4f} {removal_time / n_rows * 1e6:>8.3f} {step_time:>15.4f} {step_time / n_rows * 1e6:>8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+################################################################################################
+# SERVING BENCHMARK
+################################################################################################
+# Sends single record requests from many concurrent tasks to an AsyncPipelineRunner and
+# reports the throughput along with the runner's batch size and latency metrics. A max_batch
+# of 1 transforms every request on its own, for comparison with micro-batching.
+#
+# Run from the repository root with
+#     python -m benchmarks.serving_bench
+
+# External Imports
+import asyncio
+import time
+import warnings
+
+# Internal Imports
+from DSPipeline.data_transformations import PCAStep, StandardScalerStep
+from DSPipeline.ds_pipeline import Pipeline
+from DSPipeline.feature_selection import PearsonCorrStep
+from DSPipeline.serving import AsyncPipelineRunner
+from tests.utils import rand_df
+
+N_REQUESTS = 5000
+CONCURRENCY = 256
+SETTINGS = [(1, 0.0), (16, 1.0), (64, 2.0), (256, 5.0)]
+
+################################################################################################
+async def generate_load(runner, records, concurrency):
+    """ Sends every record to the runner, keeping at most concurrency requests in flight, and returns the time it took """
+    semaphore = asyncio.Semaphore(concurrency)
+    async def request(record):
+        async with semaphore:
+            return await runner.transform(record)
+    start = time.perf_counter()
+    await asyncio.gather(*(request(record) for record in records))
+    return time.perf_counter() - start
+
+################################################################################################
+def main():
+    warnings.simplefilter('ignore')
+    X, y = rand_df(shape=(N_REQUESTS, 20))
+    pipeline = Pipeline([StandardScalerStep(), PearsonCorrStep(num_features=10), PCAStep(kwargs={'n_components':5})])
+    pipeline.fit(X, y)
+    records = [X.iloc[i].to_numpy() for i in range(N_REQUESTS)]
+
+    print(f"{'max_batch':>9} {'wait (ms)':>9} {'req/s':>8} {'mean batch':>10} {'queue p99 (ms)':>14} {'latency p99 (ms)':>16}")
+    for max_batch, max_wait_ms in SETTINGS:
+        async def run():
+            async with AsyncPipelineRunner(pipeline, max_batch=max_batch, max_wait_ms=max_wait_ms) as runner:
+                seconds = await generate_load(runner, records, CONCURRENCY)
+                return seconds, runner.metrics()
+        seconds, metrics = asyncio.run(run())
+        print(f"{max_batch:>9} {max_wait_ms:>9.1f} {N_REQUESTS / seconds:>8.0f} {metrics['mean_batch_size']:>10.1f} {metrics['queue_ms_p99']:>14.2f} {metrics['latency_ms_p99']:>16.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+################################################################################################
+# STEP SUITE BENCHMARK
+################################################################################################
+# Times fitting and transforming every step class, and a few representative pipelines, on
+# tall, wide and huge data. The results can be saved as JSON and compared against a saved
+# baseline, in which case every case that became slower than the threshold is reported as a
+# regression and the exit code is 1.
+#
+# Run from the repository root with
+#     python -m benchmarks.suite_bench --output baseline.json
+#     python -m benchmarks.suite_bench --baseline baseline.json
+#
+# The huge shape takes a few gigabytes of memory and is only run when it is asked for with
+#     python -m benchmarks.suite_bench --shapes tall wide huge
+# and --scale 0.1 runs every shape with a tenth of the rows for a quick check.
+
+# External Imports
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import warnings
+import numpy as np
+import pandas as pd
+import sklearn
+
+# Internal Imports
+from benchmarks.utils import time_call, trace_call
+from DSPipeline.data_augmentation import ADASYNStep, SMOTEStep
+from DSPipeline.data_transformations import LDATransformStep, LogStep, PCAStep, PolyStep, SinStep, StandardScalerStep
+from DSPipeline.ds_pipeline import Pipeline
+from DSPipeline.feature_selection import ChiSqSelectionStep, LassoSelectionStep, ListSelectionStep, PearsonCorrStep, PolyScreenStep, TreeSelectionStep
+from DSPipeline.outlier_detection import ABODStep, IsoForestStep, LOFStep
+from tests.utils import rand_df
+
+# The (rows, columns) of each shape of data
+SHAPES = {
+    'tall': (50000, 10),
+    'wide': (2000, 1000),
+    'huge': (2000000, 50)
+}
+DEFAULT_SHAPES = ['tall', 'wide']
+
+# The share of each class in the classification data
+CLASS_WEIGHTS = [0.6, 0.3, 0.1]
+
+# A case is slower than its baseline when it takes this fraction longer, and at least MIN_SECONDS longer, so that noise in fast cases is not reported
+THRESHOLD = 0.2
+MIN_SECONDS = 0.005
+
+# The cases, each with a function that returns a new step or list of steps, whether the data has class labels, and the shapes it is run on.
+# Steps whose time or output grows faster than the number of cells, such as PolyStep and the neighbour based outlier detectors, skip the larger shapes.
+CASES = {
+    'StandardScalerStep': (lambda X: StandardScalerStep(), False, ['tall', 'wide', 'huge']),
+    'PCAStep': (lambda X: PCAStep(kwargs={'n_components':5}), False, ['tall', 'wide', 'huge']),
+    'PolyStep': (lambda X: PolyStep(kwargs={'degree':2}), False, ['tall']),
+    'SinStep': (lambda X: SinStep(), False, ['tall', 'wide', 'huge']),
+    'LogStep': (lambda X: LogStep(), False, ['tall', 'wide', 'huge']),
+    'LDATransformStep': (lambda X: LDATransformStep(), True, ['tall', 'wide', 'huge']),
+    'ListSelectionStep': (lambda X: ListSelectionStep(list(X.columns[::2])), False, ['tall', 'wide', 'huge']),
+    'PearsonCorrStep': (lambda X: PearsonCorrStep(num_features=5), False, ['tall', 'wide', 'huge']),
+    'ChiSqSelectionStep': (lambda X: ChiSqSelectionStep(select_kwargs={'k':5}), True, ['tall', 'wide', 'huge']),
+    'LassoSelectionStep': (lambda X: LassoSelectionStep(lasso_kwargs={'alpha':0.1}), False, ['tall', 'wide']),
+    'TreeSelectionStep': (lambda X: TreeSelectionStep(tree_kwargs={'n_estimators':10}), False, ['tall', 'wide']),
+    'PolyScreenStep': (lambda X: PolyScreenStep(num_features=20), False, ['tall', 'wide']),
+    'ABODStep': (lambda X: ABODStep(num_remove=10, max_reference=1000, random_state=0), False, ['tall', 'wide']),
+    'IsoForestStep': (lambda X: IsoForestStep(kwargs={'contamination':0.01}), False, ['tall', 'wide', 'huge']),
+    'LOFStep': (lambda X: LOFStep(kwargs={'contamination':0.01}), False, ['tall', 'wide']),
+    'SMOTEStep': (lambda X: SMOTEStep(), True, ['tall', 'wide']),
+    'ADASYNStep': (lambda X: ADASYNStep(), True, ['tall', 'wide']),
+    'preprocessing pipeline': (lambda X: [LogStep(), StandardScalerStep(), LOFStep(kwargs={'contamination':0.01}), PearsonCorrStep(num_features=5), PCAStep(kwargs={'n_components':3})], False, ['tall', 'wide']),
+    'polynomial pipeline': (lambda X: [StandardScalerStep(), PolyStep(kwargs={'degree':2}), PearsonCorrStep(num_features=20), PCAStep(kwargs={'n_components':5}, append_input=True)], False, ['tall']),
+    'classification pipeline': (lambda X: [StandardScalerStep(), SMOTEStep(), ChiSqSelectionStep(select_kwargs={'k':5}), LDATransformStep(append_input=True)], True, ['tall', 'wide'])
+}
+
+################################################################################################
+def make_data(shape, classification, scale):
+    """ Returns positive data of the given shape with a continuous target, or with three imbalanced classes for the augmentation steps to balance, using a fixed seed """
+    np.random.seed(0)
+    shape = (max(100, int(shape[0] * scale)), shape[1])
+    if classification:
+        X = rand_df(shape=shape, val_range=(1, 10), labeled=False)
+        return X, pd.Series(np.random.choice(3, size=shape[0], p=CLASS_WEIGHTS), name='y')
+    return rand_df(shape=shape, val_range=(1, 10))
+
+def run_case(make_steps, X, y, repeat, memory):
+    """ Returns the best fit and transform times of a case, and the peak traced memory of a transform if memory is True. A list of steps is run as a Pipeline. """
+    def make():
+        steps = make_steps(X)
+        return Pipeline(steps) if isinstance(steps, list) else steps
+
+    result = {'fit': time_call(lambda: make().fit(X, y), repeat=repeat)}
+    fitted = make()
+    fitted.fit(X, y)
+    result['transform'] = time_call(lambda: fitted.transform(X, y=y), repeat=repeat)
+    if memory:
+        result['transform_peak_bytes'] = trace_call(lambda: fitted.transform(X, y=y))[0]
+    return result
+
+def run_suite(shapes, cases, repeat=3, scale=1.0, memory=False):
+    """ Runs every case on each of its shapes and returns the results, keyed by 'case/shape/method'. A case that raises is recorded with its error instead of a time. """
+    results = {}
+    for shape in shapes:
+        # Only the data of one shape is kept at a time
+        data = {}
+        for name, (make_steps, classification, case_shapes) in cases.items():
+            if shape not in case_shapes:
+                continue
+            if classification not in data:
+                data[classification] = make_data(SHAPES[shape], classification, scale)
+            X, y = data[classification]
+            try:
+                result = run_case(make_steps, X, y, repeat, memory)
+            except Exception as e:
+                result = {'error': f'{type(e).__name__}: {e}'}
+            for method, value in result.items():
+                results[f'{name}/{shape}/{method}'] = value
+            print(f"{name:>24} {shape:>6} " + ' '.join(f'{method}={value:.4f}' if isinstance(value, float) else f'{method}={value}' for method, value in result.items()), flush=True)
+    return results
+
+def find_regressions(results, baseline, threshold=THRESHOLD, min_seconds=MIN_SECONDS):
+    """ Returns the times that are slower than the baseline by more than the threshold, as a list of (key, baseline seconds, seconds) tuples
+
+    Parameters
+    ----------
+    results (dict) : the times of this run, keyed by 'case/shape/method'
+
+    baseline (dict) : the times of the baseline run
+
+    threshold (float, default=0.2) : the fraction a time may grow by before it is a regression
+
+    min_seconds (float, default=0.005) : the least number of seconds a time must grow by to be a regression
+
+    Returns
+    -------
+    (list) : the regressions, slowest relative to the baseline first. Cases that now raise an error have a time of inf.
+    """
+    regressions = []
+    for key, before in baseline.items():
+        if not key.endswith(('/fit', '/transform')) or not isinstance(before, float):
+            continue
+        seconds = results.get(key)
+        # A case that used to run and now raises is always a regression
+        if seconds is None and key.rsplit('/', 1)[0] + '/error' in results:
+            seconds = float('inf')
+        if isinstance(seconds, float) and seconds > before * (1 + threshold) and seconds - before > min_seconds:
+            regressions.append((key, before, seconds))
+    return sorted(regressions, key=lambda r: r[2] / r[1], reverse=True)
+
+def environment():
+    """ Returns the versions and commit the results were measured with """
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor()
+    }
+
+################################################################################################
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Times every step and a few pipelines on tall, wide and huge data')
+    parser.add_argument('--shapes', nargs='+', choices=list(SHAPES), default=DEFAULT_SHAPES)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3, help='the number of times each case is timed, of which the best is kept')
+    parser.add_argument('--scale', type=float, default=1.0, help='the fraction of the rows of each shape to use')
+    parser.add_argument('--memory', action='store_true', help='also record the peak traced memory of each transform')
+    parser.add_argument('--output', help='a JSON file to save the results to')
+    parser.add_argument('--baseline', help='a JSON file of saved results to compare against')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='the fraction a time may grow by before it is a regression')
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter('ignore')
+    results = run_suite(args.shapes, {name: CASES[name] for name in args.cases}, repeat=args.repeat, scale=args.scale, memory=args.memory)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'scale': args.scale, 'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('scale', 1.0) != args.scale:
+            print(f"The baseline was run with scale {baseline.get('scale', 1.0)}, not {args.scale}")
+            return 1
+        regressions = find_regressions(results, baseline['results'], threshold=args.threshold)
+        print(f'\n{len(regressions)} regressions against {args.baseline}')
+        for key, before, seconds in regressions:
+            print(f'{key:>48} {before:>10.4f} -> {seconds:>10.4f} ({seconds / before:.2f}x)')
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
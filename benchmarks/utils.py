@@ -0,0 +1,42 @@
+################################################################################################
+# BENCHMARK UTILITIES
+################################################################################################
+
+# External Imports
+import time
+import tracemalloc
+
+################################################################################################
+def time_call(func, repeat=3):
+    """ Returns the best wall time of calling func over a number of repeats """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def trace_call(func):
+    """ Returns the peak traced memory of calling func in bytes and the number of memory blocks it allocated, counting the blocks that were freed again """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    return peak, blocks
+
+def latency_percentiles(func, calls=10000, percentiles=(50, 99)):
+    """ Returns the given percentiles of the wall time of single calls of func in microseconds """
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter_ns()
+        func()
+        times.append(time.perf_counter_ns() - start)
+    times.sort()
+    return [times[min(len(times) - 1, int(len(times) * p / 100))] / 1000 for p in percentiles]
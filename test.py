@@ -6,12 +6,19 @@
 import unittest
 
 # Internal Imports
+from tests.compiled_tests import *
 from tests.data_augmentation_tests import *
 from tests.data_manager_tests import *
 from tests.data_transformation_tests import *
 from tests.ds_pipeline_tests import *
 from tests.feature_selection_tests import *
+from tests.fit_cache_tests import *
+from tests.import_tests import *
 from tests.outlier_detection_tests import *
+from tests.persistence_tests import *
+from tests.profiling_tests import *
+from tests.search_tests import *
+from tests.serving_tests import *
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
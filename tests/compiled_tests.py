@@ -0,0 +1,146 @@
+# External Imports
+import unittest
+import numpy as np
+import pandas as pd
+
+# Internal Imports
+from DSPipeline.compiled import CompiledPipeline, compile_step
+from DSPipeline.data_transformations import LDATransformStep, LogStep, PCAStep, PolyStep, SinStep, StandardScalerStep
+from DSPipeline.ds_pipeline import EmptyStep, Pipeline
+from DSPipeline.errors import TransformError
+from DSPipeline.feature_selection import ChiSqSelectionStep, LassoSelectionStep, ListSelectionStep, PearsonCorrStep, PolyScreenStep, TreeSelectionStep
+from DSPipeline.outlier_detection import LOFStep
+from tests.utils import rand_df, rand_df_classification
+
+################################################################################################
+# TESTS
+################################################################################################
+class CompiledStepTests(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(200, 6), val_range=(1, 10))
+        self.X_class, self.y_class = rand_df_classification(shape=(200, 6), val_range=(1, 10), classes=3)
+
+    # Fits the steps in a pipeline and checks that the compiled pipeline gives the same output without changing the input
+    def assert_compiled_matches(self, steps, X, y):
+        pipeline = Pipeline(steps)
+        pipeline.fit(X, y)
+        original = X.copy()
+        compiled = pipeline.compile()
+        self.assertIsInstance(compiled, CompiledPipeline)
+        expected = pipeline.transform(X)
+        r = compiled.transform(X)
+        self.assertEqual(list(r.columns), list(expected.columns))
+        np.testing.assert_allclose(r.values, expected.values)
+        pd.testing.assert_frame_equal(X, original)
+
+    # Tests each transformation step, with and without appending to the input
+    def test_transformations(self):
+        for append_input in (False, True):
+            self.assert_compiled_matches([StandardScalerStep(append_input=append_input)], self.X, self.y)
+            self.assert_compiled_matches([StandardScalerStep(kwargs={'with_mean':False})], self.X, self.y)
+            self.assert_compiled_matches([PCAStep(append_input=append_input, kwargs={'n_components':3, 'whiten':True})], self.X, self.y)
+            self.assert_compiled_matches([PolyStep(append_input=append_input, kwargs={'degree':3})], self.X, self.y)
+            self.assert_compiled_matches([PolyStep(kwargs={'degree':2, 'interaction_only':True, 'include_bias':False})], self.X, self.y)
+            self.assert_compiled_matches([SinStep(append_input=append_input), SinStep(columns=['sin_1', 'sin_0'])], self.X, self.y)
+            self.assert_compiled_matches([LogStep(append_input=append_input, columns=['2']), LogStep(log_func=np.log10)], self.X, self.y)
+            self.assert_compiled_matches([LogStep(append_input=append_input, log_func=lambda X: X.apply(np.log1p)), StandardScalerStep()], self.X, self.y)
+
+    # Tests each feature selection step, including selections that are a view of neighbouring columns
+    def test_selections(self):
+        self.assert_compiled_matches([ListSelectionStep(['3', '1'])], self.X, self.y)
+        self.assert_compiled_matches([ListSelectionStep(['1', '2', '3'])], self.X, self.y)
+        self.assert_compiled_matches([PearsonCorrStep(num_features=3)], self.X, self.y)
+        self.assert_compiled_matches([TreeSelectionStep(tree_kwargs={'n_estimators':10})], self.X, self.y)
+        self.assert_compiled_matches([LassoSelectionStep(select_kwargs={'threshold':-np.inf, 'max_features':3})], self.X, self.y)
+        self.assert_compiled_matches([ChiSqSelectionStep(select_kwargs={'k':3})], self.X_class, self.y_class)
+        self.assert_compiled_matches([PolyScreenStep(num_features=4, append_input=True)], self.X, self.y)
+
+    # Tests that steps which were not compiled are given a DataFrame, and that the compiled output stays the same when it is reused
+    def test_fallback(self):
+        steps = [StandardScalerStep(), LOFStep(kwargs={'contamination':0.05}), Pipeline([PCAStep(kwargs={'n_components':3}), EmptyStep()], append_input=True), LDATransformStep()]
+        pipeline = Pipeline(steps)
+        pipeline.fit(self.X_class, self.y_class)
+        expected_X, expected_y = pipeline.transform(self.X_class, y=self.y_class)
+        compiled = pipeline.compile()
+        for _ in range(2):
+            r_X, r_y = compiled.transform(self.X_class, y=self.y_class)
+            self.assertEqual(list(r_X.columns), list(expected_X.columns))
+            np.testing.assert_allclose(r_X.values, expected_X.values)
+            np.testing.assert_array_equal(r_y.values, expected_y.values)
+        self.assertEqual(len(compiled.plans), 1)
+
+        r = compiled.transform(self.X_class, allow_sample_removal=False)
+        self.assertEqual(r.shape[0], self.X_class.shape[0])
+        pd.testing.assert_index_equal(r.index, self.X_class.index)
+
+    # Tests that a nested pipeline that appends its input and the pipeline's own append_input are compiled
+    def test_append_input(self):
+        inner = Pipeline([StandardScalerStep(), PolyStep(kwargs={'degree':2})], append_input=True)
+        self.assert_compiled_matches([inner, PCAStep(kwargs={'n_components':2})], self.X, self.y)
+        pipeline = Pipeline([StandardScalerStep(), PCAStep(kwargs={'n_components':2})], append_input=True)
+        pipeline.fit(self.X)
+        pd.testing.assert_frame_equal(pipeline.compile().transform(self.X), pipeline.transform(self.X))
+
+    # Tests that a float32 pipeline keeps every array the kernels make in float32
+    def test_float32(self):
+        steps = [LogStep(), StandardScalerStep(append_input=True), PolyStep(kwargs={'degree':2}), PearsonCorrStep(num_features=8), PolyScreenStep(num_features=4, append_input=True), PCAStep(kwargs={'n_components':3, 'whiten':True})]
+        pipeline = Pipeline(steps, dtype=np.float32)
+        pipeline.fit(self.X, self.y)
+        expected = pipeline.transform(self.X)
+        r = pipeline.compile().transform(self.X)
+        self.assertEqual(list(r.dtypes.unique()), [np.float32])
+        np.testing.assert_allclose(r.values, expected.values, rtol=1e-4, atol=1e-4)
+
+        data = self.X.to_numpy(dtype=np.float32)
+        columns = self.X.columns
+        for step in steps:
+            kernel, columns = compile_step(step, columns, np.float32)
+            data = kernel(data, True)
+            self.assertEqual(data.dtype, np.float32, step.description)
+        self.assertEqual(pipeline.compile_for_inference()(self.X.iloc[0].to_dict()).dtype, np.float32)
+
+    # Tests that compiling an unfitted step raises a transform error
+    def test_not_fitted(self):
+        compiled = Pipeline([StandardScalerStep(), PCAStep()]).compile()
+        with self.assertRaises(TransformError):
+            compiled.transform(self.X)
+
+class InferenceTests(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(200, 6), val_range=(1, 10))
+        self.pipeline = Pipeline([LogStep(), StandardScalerStep(), LOFStep(kwargs={'contamination':0.05}), PearsonCorrStep(num_features=4), PCAStep(kwargs={'n_components':2})])
+        self.pipeline.fit(self.X, self.y)
+
+    # Tests that dicts, 1-D arrays and 2-D arrays give the same values as transforming without removing samples
+    def test_matches_transform(self):
+        inference = self.pipeline.compile_for_inference()
+        expected = self.pipeline.transform(self.X, allow_sample_removal=False)
+        self.assertEqual(inference.columns, list(expected.columns))
+        for i in (0, 17):
+            values = self.X.iloc[i].to_numpy()
+            np.testing.assert_allclose(inference(self.X.iloc[i].to_dict()), expected.iloc[i].to_numpy())
+            np.testing.assert_allclose(inference(values), expected.iloc[i].to_numpy())
+            np.testing.assert_array_equal(values, self.X.iloc[i].to_numpy())
+        np.testing.assert_allclose(inference(self.X.to_numpy()), expected.to_numpy())
+
+    # Tests that the pipeline's append_input keeps the record's values
+    def test_append_input(self):
+        pipeline = Pipeline([StandardScalerStep(), PCAStep(kwargs={'n_components':2})], append_input=True)
+        pipeline.fit(self.X)
+        inference = pipeline.compile_for_inference()
+        expected = pipeline.transform(self.X.iloc[[5]].reset_index(drop=True))
+        self.assertEqual(inference.columns, list(expected.columns))
+        np.testing.assert_allclose(inference(self.X.iloc[5].to_dict()), expected.iloc[0].to_numpy())
+
+    # Tests that missing values, unfitted pipelines and steps that cannot be compiled are rejected
+    def test_errors(self):
+        inference = self.pipeline.compile_for_inference()
+        self.assertRaises(ValueError, inference, np.ones(3))
+        self.assertRaises(KeyError, inference, {'0': 1.0})
+        self.assertRaises(ValueError, Pipeline([StandardScalerStep()]).compile_for_inference)
+        X_class, y_class = rand_df_classification(shape=(100, 4), classes=3)
+        pipeline = Pipeline([LDATransformStep()])
+        pipeline.fit(X_class, y_class)
+        self.assertRaises(TypeError, pipeline.compile_for_inference)
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Internal Imports
-from DSPipeline.data_managing import split_x_y
+from DSPipeline.data_managing import as_model_input, check_dense, is_sparse_frame, split_x_y
 from .utils import rand_df
 
 ################################################################################################
@@ -24,4 +24,22 @@ class DataManagingTests(unittest.TestCase):
     def test_split_x_y_raise(self):
         data = np.array([[1, 2, 3], [4, 5, 6]])
         with self.assertRaises(TypeError):
-            split_x_y(data)
\ No newline at end of file
+            split_x_y(data)
+
+    # Tests that only dataframes with all sparse columns are turned into sparse matrices
+    def test_as_model_input(self):
+        X, _ = rand_df(shape=(10, 4))
+        self.assertIs(as_model_input(X), X)
+        self.assertFalse(is_sparse_frame(X))
+        sparse_X = X.astype(pd.SparseDtype(float, 0))
+        self.assertTrue(is_sparse_frame(sparse_X))
+        np.testing.assert_allclose(as_model_input(sparse_X).toarray(), X.values)
+        np.testing.assert_allclose(as_model_input(pd.concat((X, sparse_X), axis=1)).toarray(), np.hstack((X.values, X.values)))
+
+    # Tests that check_dense only raises a type error for sparse columns
+    def test_check_dense(self):
+        X, _ = rand_df(shape=(10, 4))
+        check_dense(X, 'Test')
+        X['sparse'] = pd.arrays.SparseArray(np.zeros(10))
+        with self.assertRaises(TypeError):
+            check_dense(X, 'Test')
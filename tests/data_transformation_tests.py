@@ -1,9 +1,11 @@
 # External Imports
 import unittest
 import numpy as np
+import pandas as pd
 
 # Internal Imports
 from DSPipeline.data_transformations import *
+from DSPipeline.ds_pipeline import Pipeline
 from tests.step_tests import StepTest
 from tests.utils import rand_df, rand_df_classification
 
@@ -36,6 +38,23 @@ class LogTests3(unittest.TestCase, StepTest):
     X, y = rand_df(val_range=(0, 100))
     test_X = rand_df(val_range=(0, 100), labeled=False)
 
+# A log function that only works on pandas objects
+def pandas_log(X):
+    return X.apply(np.log1p)
+
+class LogTests4(unittest.TestCase, StepTest):
+    step = LogStep(columns=['1', '10'], log_func=pandas_log)
+    X, y = rand_df(val_range=(0, 100))
+    test_X = rand_df(val_range=(0, 100), labeled=False)
+
+    # Tests that a function that is not a numpy ufunc is given the DataFrame
+    def test_pandas_function(self):
+        step = LogStep(columns=['1', '10'], log_func=pandas_log)
+        step.fit(self.X, self.y)
+        result = step.transform(self.test_X)
+        self.assertEqual(list(result.columns), ['log_1', 'log_10'])
+        np.testing.assert_allclose(result.values, np.log1p(self.test_X[['1', '10']].values))
+
 class PCATests1(unittest.TestCase, StepTest):
     step = PCAStep()
     X, y = rand_df()
@@ -63,6 +82,11 @@ class PolyTests3(unittest.TestCase, StepTest):
     y = None
     test_X = rand_df(shape=(50, 10), labeled=False)
 
+class PolyTests4(unittest.TestCase, StepTest):
+    step = PolyStep(append_input=True, kwargs={'degree':3, 'interaction_only':True}, sparse=True)
+    X, y = rand_df(shape=(100, 10))
+    test_X = rand_df(shape=(50, 10), labeled=False)
+
 class SinTests1(unittest.TestCase, StepTest):
     step = SinStep()
     X, y = rand_df()
@@ -93,4 +117,149 @@ class StandardScalerTests2(unittest.TestCase, StepTest):
 class StandardScalerTests3(unittest.TestCase, StepTest):
     step = StandardScalerStep(append_input=True)
     X, y = rand_df()
-    test_X = rand_df(labeled=False)
\ No newline at end of file
+    test_X = rand_df(labeled=False)
+
+class PartialFitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df_classification(shape=(300, 8), classes=3)
+        self.chunks = [(self.X.iloc[i:i + 100].reset_index(drop=True), self.y.iloc[i:i + 100].reset_index(drop=True)) for i in range(0, 300, 100)]
+
+    # Tests that the scaler fitted on chunks matches the scaler fitted at once
+    def test_standard_scaler(self):
+        step = StandardScalerStep()
+        for X, y in self.chunks:
+            step.partial_fit(X, y)
+        expected = StandardScalerStep().fit(self.X)
+        np.testing.assert_allclose(step.transform(self.X).values, expected.values)
+
+    # Tests that incremental pca keeps the requested number of components
+    def test_pca(self):
+        step = PCAStep(kwargs={'n_components':3})
+        for X, y in self.chunks:
+            step.partial_fit(X, y)
+        self.assertEqual(step.transform(self.X).shape, (300, 3))
+
+    # Tests that the arguments of PCA's solver are ignored by incremental pca and a fraction of the variance is rejected
+    def test_pca_arguments(self):
+        step = PCAStep(kwargs={'n_components':3, 'svd_solver':'full', 'random_state':0})
+        for X, y in self.chunks:
+            step.partial_fit(X, y)
+        self.assertEqual(step.transform(self.X).shape, (300, 3))
+        self.assertRaises(ValueError, PCAStep(kwargs={'n_components':0.9}).partial_fit, self.X)
+
+    # Tests that the accumulated lda projection matches sklearn's eigen solver up to the sign of each component
+    def test_lda(self):
+        step = LDATransformStep()
+        for X, y in self.chunks:
+            step.partial_fit(X, y)
+        result = step.transform(self.X).values
+        expected = LDATransformStep(kwargs={'solver':'eigen'}).fit(self.X, self.y)[0].values
+        self.assertEqual(result.shape, (300, 2))
+        for i in range(result.shape[1]):
+            self.assertAlmostEqual(abs(np.corrcoef(result[:, i], expected[:, i])[0, 1]), 1)
+
+    # Tests that the class statistics keep their precision when the data is far from zero
+    def test_lda_offset(self):
+        rng = np.random.RandomState(0)
+        X = pd.DataFrame(rng.normal(size=(2000, 4)) + 1e8, columns=['a', 'b', 'c', 'd'])
+        y = pd.Series(rng.randint(0, 3, size=2000), name='y')
+        X['a'] += y
+        step = LDATransformStep()
+        step.partial_fit(X.iloc[:1000], y.iloc[:1000])
+        step.partial_fit(X.iloc[1000:], y.iloc[1000:])
+        result = step.transform(X).values
+        expected = LDATransformStep(kwargs={'solver':'eigen'}).fit(X, y)[0].values
+        for i in range(result.shape[1]):
+            self.assertAlmostEqual(abs(np.corrcoef(result[:, i], expected[:, i])[0, 1]), 1)
+
+    # Tests that supervised steps need target values
+    def test_lda_needs_y(self):
+        with self.assertRaises(ValueError):
+            LDATransformStep().partial_fit(self.X)
+
+class PolyBudgetTests(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(100, 8))
+        self.X[self.X < 50] = 0
+
+    # Tests that the sparse output has the same values and columns as the dense output, and that its size is estimated exactly
+    def test_sparse(self):
+        for kwargs in ({'degree':2}, {'degree':4, 'interaction_only':True, 'include_bias':False}):
+            dense = PolyStep(kwargs=kwargs).fit(self.X)
+            step = PolyStep(kwargs=kwargs, sparse=True)
+            r = step.fit(self.X)
+            self.assertTrue(all(isinstance(dtype, pd.SparseDtype) for dtype in r.dtypes))
+            self.assertEqual(list(r.columns), list(dense.columns))
+            np.testing.assert_allclose(r.sparse.to_coo().toarray(), dense.values)
+            num_features, num_bytes = step.estimate_output(self.X)
+            self.assertEqual(num_features, dense.shape[1])
+            self.assertEqual(num_bytes, sum(r.iloc[:, i].values.sp_values.nbytes + r.iloc[:, i].values.sp_index.indices.nbytes for i in range(r.shape[1])))
+            
+        # Sparse data is expanded without being made dense
+        sparse_X = self.X.astype(pd.SparseDtype(float, 0))
+        np.testing.assert_allclose(PolyStep(sparse=True).fit(sparse_X).sparse.to_coo().toarray(), PolyStep().fit(self.X).values)
+
+    # Tests that too many features or bytes raise a value error before the features are created
+    def test_budget(self):
+        X = pd.DataFrame(np.zeros((10, 500))).add_prefix('x')
+        with self.assertRaises(ValueError):
+            PolyStep(max_output_features=100000).fit(X)
+        with self.assertRaises(ValueError):
+            PolyStep(max_output_features=100000).partial_fit(X)
+        with self.assertRaises(ValueError):
+            PolyStep(max_bytes=10**6).fit(X)
+        self.assertEqual(PolyStep(max_output_features=125751, max_bytes=10**6, sparse=True).fit(X).shape, (10, 125751))
+        self.assertEqual(PolyStep(kwargs={'degree':2}).estimate_output(X), (125751, 10 * 125751 * 8))
+        self.assertEqual(PolyStep(kwargs={'degree':2}).estimate_output(X.astype(np.float32)), (125751, 10 * 125751 * 4))
+
+    # Tests that the estimated size of float32 features matches the features that are created
+    def test_float32_estimate(self):
+        X = self.X.astype(np.float32)
+        dense = PolyStep().fit(X)
+        self.assertEqual(PolyStep().estimate_output(X)[1], dense.values.nbytes)
+        step = PolyStep(sparse=True)
+        r = step.fit(X)
+        self.assertEqual(step.estimate_output(X)[1], sum(r.iloc[:, i].values.sp_values.nbytes + r.iloc[:, i].values.sp_index.indices.nbytes for i in range(r.shape[1])))
+
+class SparseTests(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df_classification(shape=(200, 20), classes=3)
+        self.X[self.X < 80] = 0
+        self.sparse_X = self.X.astype(pd.SparseDtype(float, 0))
+
+    # Tests that scaling without centering keeps the data sparse and matches scaling dense data
+    def test_standard_scaler(self):
+        step = StandardScalerStep(kwargs={'with_mean':False})
+        r = step.fit(self.sparse_X)
+        self.assertTrue(all(isinstance(dtype, pd.SparseDtype) for dtype in r.dtypes))
+        np.testing.assert_allclose(r.sparse.to_coo().toarray(), StandardScalerStep(kwargs={'with_mean':False}).fit(self.X).values)
+        chunked = StandardScalerStep(kwargs={'with_mean':False})
+        chunked.partial_fit(self.sparse_X.iloc[:100])
+        chunked.partial_fit(self.sparse_X.iloc[100:])
+        np.testing.assert_allclose(chunked.transform(self.sparse_X).sparse.to_coo().toarray(), r.sparse.to_coo().toarray())
+        self.assertRaises(TypeError, StandardScalerStep().fit, self.sparse_X)
+        centered = StandardScalerStep()
+        centered.fit(self.X)
+        self.assertRaises(TypeError, centered.transform, self.sparse_X)
+
+    # Tests that sparse data is reduced with truncated svd, and that options it does not support are rejected
+    def test_pca(self):
+        step = PCAStep(kwargs={'n_components':3, 'random_state':0})
+        r = step.fit(self.sparse_X)
+        self.assertEqual(r.shape, (200, 3))
+        self.assertEqual(type(step.fitted).__name__, 'TruncatedSVD')
+        np.testing.assert_allclose(step.transform(self.X).values, r.values)
+        np.testing.assert_allclose(Pipeline([step]).compile().transform(self.X).values, r.values)
+        self.assertRaises(TypeError, PCAStep(kwargs={'whiten':True}).fit, self.sparse_X)
+        self.assertRaises(TypeError, PCAStep(kwargs={'n_components':0.9}).fit, self.sparse_X)
+        self.assertRaises(TypeError, PCAStep().partial_fit, self.sparse_X)
+
+    # Tests that steps which would make sparse data dense raise a type error
+    def test_dense_only(self):
+        self.assertRaises(TypeError, LDATransformStep().fit, self.sparse_X, self.y)
+        step = LDATransformStep()
+        step.fit(self.X, self.y)
+        self.assertRaises(TypeError, step.transform, self.sparse_X)
@@ -1,12 +1,17 @@
 # External Imports
+import io
+import pickle
+import time
+import tracemalloc
 import unittest
+import numpy as np
 import pandas as pd
 
 # Internal Imports
-from DSPipeline.data_transformations import PCAStep, PolyStep, StandardScalerStep
-from DSPipeline.ds_pipeline import EmptyStep, Pipeline
-from DSPipeline.feature_selection import PearsonCorrStep, ChiSqSelectionStep
-from DSPipeline.outlier_detection import ABODStep
+from DSPipeline.data_transformations import LDATransformStep, LogStep, PCAStep, PolyStep, SinStep, StandardScalerStep
+from DSPipeline.ds_pipeline import DAGPipeline, EmptyStep, Pipeline
+from DSPipeline.feature_selection import PearsonCorrStep, ChiSqSelectionStep, LassoSelectionStep, ListSelectionStep, PolyScreenStep, TreeSelectionStep
+from DSPipeline.outlier_detection import ABODStep, LOFStep
 from DSPipeline.errors import TransformError
 from tests.step_tests import StepTest
 from tests.utils import rand_df, rand_df_classification
@@ -120,4 +125,406 @@ class TestPipelineStep1(unittest.TestCase, StepTest):
 class TestPipelineStep2(unittest.TestCase, StepTest):
     step = Pipeline([PCAStep(), PolyStep()], append_input=True)
     X, y = rand_df(shape=(100, 10), val_range=(0, 100))
-    test_X = rand_df(shape=(100, 10), val_range=(0, 100), labeled=False)
\ No newline at end of file
+    test_X = rand_df(shape=(100, 10), val_range=(0, 100), labeled=False)
+
+class CountingStep(EmptyStep):
+    """ An empty step that counts how many times it is fitted and transformed """
+    def __init__(self):
+        super().__init__()
+        self.fit_calls = 0
+        self.transform_calls = 0
+
+    def fit(self, X, y=None):
+        self.fit_calls += 1
+        return super().fit(X, y=y)
+
+    def transform(self, X, y=None):
+        self.transform_calls += 1
+        return super().transform(X, y=y)
+
+class TestPipelineFitTransform(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(100, 10), outlier=True)
+
+    # Tests that fit_transform reuses the output of fit instead of transforming the data again
+    def test_single_pass(self):
+        steps = [CountingStep(), StandardScalerStep(), CountingStep()]
+        pipeline = Pipeline(steps)
+        r, _ = pipeline.fit_transform(self.X, y=self.y)
+        self.assertEqual(r.shape, self.X.shape)
+        for step in (steps[0], steps[2]):
+            self.assertEqual(step.fit_calls, 1)
+            self.assertEqual(step.transform_calls, 0)
+
+    # Tests that the output matches fitting and then transforming
+    def test_matches_fit_then_transform(self):
+        pipeline = Pipeline([StandardScalerStep(), PCAStep(kwargs={'n_components':3})])
+        r, _ = pipeline.fit_transform(self.X, y=self.y)
+        t, _ = pipeline.transform(self.X, y=self.y)
+        pd.testing.assert_frame_equal(r, t)
+
+    # Tests that samples are only removed when allowed, while later steps are still fitted on the reduced data
+    def test_sample_removal(self):
+        counting_step = CountingStep()
+        pipeline = Pipeline([StandardScalerStep(), ABODStep(num_remove=5), counting_step])
+        r, r_y = pipeline.fit_transform(self.X, y=self.y)
+        self.assertEqual(r.shape[0], self.X.shape[0] - 5)
+        self.assertEqual(r_y.shape[0], self.X.shape[0] - 5)
+        self.assertEqual(counting_step.transform_calls, 0)
+
+        r, r_y = pipeline.fit_transform(self.X, y=self.y, allow_sample_removal=False)
+        self.assertEqual(r.shape[0], self.X.shape[0])
+        self.assertEqual(r_y.shape[0], self.X.shape[0])
+        self.assertEqual(counting_step.fit_calls, 2)
+        self.assertEqual(counting_step.transform_calls, 1)
+
+class TestPipelineTransformStream(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(250, 10))
+        self.pipeline = Pipeline([StandardScalerStep(), PCAStep(kwargs={'n_components':3}, append_input=True)])
+        self.pipeline.fit(self.X, self.y)
+        self.expected = self.pipeline.transform(self.X)
+
+    # Tests that a DataFrame split into chunks gives the same result as transforming it at once
+    def test_dataframe_chunks(self):
+        chunks = list(self.pipeline.transform_stream(self.X, chunksize=60))
+        self.assertEqual([c.shape[0] for c in chunks], [60, 60, 60, 60, 10])
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), self.expected)
+
+    # Tests that the chunks of a csv reader can be streamed, even though their indices do not start at 0
+    def test_csv_reader(self):
+        buffer = io.StringIO()
+        self.X.to_csv(buffer, index=False)
+        buffer.seek(0)
+        chunks = self.pipeline.transform_stream(pd.read_csv(buffer, chunksize=100), chunksize=40)
+        result = pd.concat(chunks, ignore_index=True)
+        np.testing.assert_allclose(result.values, self.expected.values)
+
+    # Tests that target values stay aligned with their chunk when samples are removed
+    def test_sample_removal(self):
+        X, y = rand_df(shape=(200, 10), outlier=True)
+        pipeline = Pipeline([StandardScalerStep(), LOFStep(kwargs={'contamination':0.05})])
+        pipeline.fit(X, y)
+        frames = [(X.iloc[:100], y.iloc[:100]), (X.iloc[100:], y.iloc[100:])]
+        for chunk_X, chunk_y in pipeline.transform_stream(frames):
+            self.assertEqual(chunk_X.shape[0], 95)
+            self.assertEqual(chunk_y.shape[0], 95)
+        for chunk_X, chunk_y in pipeline.transform_stream(frames, allow_sample_removal=False):
+            self.assertEqual(chunk_X.shape[0], 100)
+            self.assertEqual(chunk_y.shape[0], 100)
+
+class TestPipelineFitStream(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df_classification(shape=(300, 10), classes=3)
+        self.chunks = [(self.X.iloc[i:i + 100], self.y.iloc[i:i + 100]) for i in range(0, 300, 100)]
+
+    # Tests that each step is fitted on the output of the steps before it
+    def test_fit_stream(self):
+        pipeline = Pipeline([StandardScalerStep(), ChiSqSelectionStep(select_kwargs={'k':5}), PCAStep(kwargs={'n_components':2})])
+        self.assertIs(pipeline.fit_stream(self.chunks), pipeline)
+        self.assertEqual(pipeline.steps[2].fitted.components_.shape[1], 5)
+        r = pipeline.transform(self.X)
+        self.assertEqual(r.shape, (300, 2))
+
+    # Tests that the data can be read again from a function for each step
+    def test_callable_source(self):
+        pipeline = Pipeline([StandardScalerStep(), EmptyStep()])
+        pipeline.fit_stream(lambda: iter(self.chunks), chunksize=50)
+        expected = StandardScalerStep().fit(self.X)
+        np.testing.assert_allclose(pipeline.transform(self.X).values, expected.values)
+
+    # Tests that fitting a fitted pipeline again forgets the chunks it was fitted on before
+    def test_refit(self):
+        pipeline = Pipeline([StandardScalerStep(), PearsonCorrStep(num_features=3), LDATransformStep()])
+        pipeline.fit_stream(self.chunks)
+        shifted = [(X * 10 + 5, y) for X, y in self.chunks[:2]]
+        pipeline.fit_stream(shifted)
+        expected = Pipeline([StandardScalerStep(), PearsonCorrStep(num_features=3), LDATransformStep()]).fit_stream(shifted)
+        self.assertEqual(pipeline.steps[0].fitted.n_samples_seen_, 200)
+        X = self.X * 10 + 5
+        np.testing.assert_allclose(pipeline.transform(X).values, expected.transform(X).values)
+
+    # Tests that one-shot iterators and steps without partial_fit are rejected
+    def test_errors(self):
+        pipeline = Pipeline([StandardScalerStep()])
+        with self.assertRaises(TypeError):
+            pipeline.fit_stream(iter(self.chunks))
+        pipeline = Pipeline([StandardScalerStep(), ABODStep(num_remove=1)])
+        with self.assertRaises(TypeError):
+            pipeline.fit_stream(self.chunks)
+
+class TestPipelineShardedTransform(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(301, 8), outlier=True)
+
+    # Tests that transforming shards in threads and processes matches transforming all of the rows at once
+    def test_matches_serial(self):
+        pipeline = Pipeline([StandardScalerStep(), PolyStep(kwargs={'degree':2}), PCAStep(kwargs={'n_components':4}, append_input=True)])
+        pipeline.fit(self.X)
+        expected = pipeline.transform(self.X)
+        for backend in ('thread', 'process'):
+            pd.testing.assert_frame_equal(pipeline.transform(self.X, n_jobs=3, backend=backend), expected)
+
+        # The shards are aligned by position, so the original index is kept when no samples are removed
+        X = self.X.set_index(self.X.index + 1000)
+        r = pipeline.transform(X, n_jobs=3, backend='thread')
+        pd.testing.assert_index_equal(r.index, X.index)
+        np.testing.assert_allclose(r.values, expected.values)
+
+    # Tests that steps which are not row independent are run on all of the rows, between sharded runs
+    def test_row_dependent_steps(self):
+        pipeline = Pipeline([StandardScalerStep(), LOFStep(kwargs={'contamination':0.05}), PCAStep(kwargs={'n_components':2})])
+        self.assertFalse(pipeline.row_independent)
+        pipeline.fit(self.X, self.y)
+        expected_X, expected_y = pipeline.transform(self.X, y=self.y)
+        r_X, r_y = pipeline.transform(self.X, y=self.y, n_jobs=4, backend='thread')
+        pd.testing.assert_frame_equal(r_X, expected_X)
+        pd.testing.assert_series_equal(r_y, expected_y)
+
+    # Tests that samples removed by a row independent step stay aligned with their targets
+    def test_novelty_removal(self):
+        pipeline = Pipeline([StandardScalerStep(), LOFStep(novelty=True, kwargs={'contamination':0.05})])
+        self.assertTrue(pipeline.row_independent)
+        pipeline.fit(self.X, self.y)
+        expected_X, expected_y = pipeline.transform(self.X, y=self.y)
+        r_X, r_y = pipeline.transform(self.X, y=self.y, n_jobs=2, backend='process')
+        self.assertLess(r_X.shape[0], self.X.shape[0])
+        pd.testing.assert_frame_equal(r_X, expected_X)
+        pd.testing.assert_series_equal(r_y, expected_y)
+
+    # Tests that the workers are kept between transforms, closed when the pipeline is fitted again, and left out when it is pickled
+    def test_reused_workers(self):
+        pipeline = Pipeline([StandardScalerStep(), LOFStep(kwargs={'contamination':0.05}), PCAStep(kwargs={'n_components':2})])
+        pipeline.fit(self.X)
+        expected = pipeline.transform(self.X, allow_sample_removal=False)
+        pd.testing.assert_frame_equal(pipeline.transform(self.X, n_jobs=2, allow_sample_removal=False), expected)
+        executor = pipeline._pool[2]
+        pd.testing.assert_frame_equal(pipeline.transform(self.X, n_jobs=2, allow_sample_removal=False), expected)
+        self.assertIs(pipeline._pool[2], executor)
+        self.assertIsNone(pickle.loads(pickle.dumps(pipeline))._pool)
+
+        pipeline.fit(self.X * 2)
+        self.assertIsNone(pipeline._pool)
+        pd.testing.assert_frame_equal(pipeline.transform(self.X, n_jobs=2, allow_sample_removal=False), pipeline.transform(self.X, allow_sample_removal=False))
+        pipeline.close()
+        self.assertIsNone(pipeline._pool)
+
+    # Tests that an unknown backend is rejected
+    def test_backend(self):
+        pipeline = Pipeline([StandardScalerStep()])
+        pipeline.fit(self.X)
+        self.assertRaises(ValueError, pipeline.transform, self.X, n_jobs=2, backend='gpu')
+
+class TestPipelinePruning(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(200, 10))
+        self.X = self.X.add_prefix('x')
+        self.test_X = rand_df(shape=(50, 10), labeled=False).add_prefix('x')
+
+    # Fits the pipeline and checks that the poly step only creates the columns the next step kept, with the same output as creating all of them
+    def assert_pruned(self, pipeline, num_kept):
+        fit_X, _ = pipeline.fit(self.X, self.y)
+        poly = pipeline.steps[0]
+        self.assertEqual(len(poly.kept_outputs), num_kept)
+        pd.testing.assert_frame_equal(pipeline.transform(self.X), fit_X)
+        pruned = pipeline.transform(self.test_X)
+        poly.prune_outputs(None)
+        pd.testing.assert_frame_equal(pruned, pipeline.transform(self.test_X))
+
+    # Tests that the poly step is pruned to the features kept by each kind of selection
+    def test_selections(self):
+        self.assert_pruned(Pipeline([PolyStep(kwargs={'degree':2}), PearsonCorrStep(num_features=8)]), 8)
+        self.assert_pruned(Pipeline([PolyStep(kwargs={'degree':3}), TreeSelectionStep(tree_kwargs={'n_estimators':10}, select_kwargs={'threshold':-np.inf, 'max_features':5})]), 5)
+        self.assert_pruned(Pipeline([PolyStep(kwargs={'degree':2}), ListSelectionStep(['x1*x2', 'x3^2', 'x0'])]), 3)
+        self.assert_pruned(Pipeline([PolyStep(kwargs={'degree':2}, sparse=True), Pipeline([PearsonCorrStep(num_features=4), EmptyStep()])]), 4)
+
+    # Tests that the degree one features of an appended poly step are kept along with the input column of the same name
+    def test_append_input(self):
+        self.assert_pruned(Pipeline([PolyStep(append_input=True, kwargs={'degree':2}), ListSelectionStep(['x1', 'x1*x2'])]), 2)
+
+    # Tests that steps that need every column do not prune the poly step, and that fitting again creates every feature
+    def test_not_pruned(self):
+        pipeline = Pipeline([PolyStep(kwargs={'degree':2}), StandardScalerStep()])
+        pipeline.fit(self.X)
+        self.assertIsNone(pipeline.steps[0].kept_outputs)
+        pipeline = Pipeline([PolyStep(kwargs={'degree':2}), PearsonCorrStep(num_features=8)])
+        pipeline.fit(self.X, self.y)
+        self.assertEqual(pipeline.steps[0].fit(self.X).shape, (200, 66))
+
+    # Tests that fitting on chunks also prunes the poly step
+    def test_fit_stream(self):
+        pipeline = Pipeline([PolyStep(kwargs={'degree':2}), PearsonCorrStep(num_features=8)])
+        pipeline.fit_stream([(self.X.iloc[:100], self.y.iloc[:100]), (self.X.iloc[100:], self.y.iloc[100:])])
+        self.assertEqual(len(pipeline.steps[0].kept_outputs), 8)
+        self.assertEqual(pipeline.transform(self.X).shape, (200, 8))
+
+class TestPipelineDtype(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df_classification(shape=(300, 8), val_range=(1, 10), classes=3)
+
+    # Tests that every step keeps the float32 data of a pipeline with a float32 dtype, when fitting and transforming
+    def test_steps_keep_dtype(self):
+        steps = [StandardScalerStep(append_input=True), PCAStep(kwargs={'n_components':3, 'whiten':True}), PolyStep(), PolyStep(sparse=True), SinStep(), LogStep(), LDATransformStep(),
+                 PearsonCorrStep(num_features=3), ChiSqSelectionStep(select_kwargs={'k':3}), LassoSelectionStep(lasso_kwargs={'alpha':0.01}), TreeSelectionStep(tree_kwargs={'n_estimators':10}),
+                 PolyScreenStep(num_features=4), LOFStep(kwargs={'contamination':0.05}), Pipeline([PolyStep(), PearsonCorrStep(num_features=5)])]
+        for step in steps:
+            pipeline = Pipeline([step], dtype=np.float32)
+            fit_X, _ = pipeline.fit(self.X, self.y)
+            for r in (fit_X, pipeline.transform(self.X)):
+                self.assertEqual({getattr(dtype, 'subtype', dtype) for dtype in r.dtypes}, {np.dtype(np.float32)}, step.description)
+        self.assertEqual(self.X.dtypes.unique().tolist(), [np.dtype(np.float64)])
+
+    # Tests that the float32 output of a pipeline stays close to float64 and takes half the memory
+    def test_precision(self):
+        # The components have well separated variances so that they are the same in float32
+        rng = np.random.RandomState(0)
+        latent = rng.normal(size=(2000, 5)) * np.arange(10, 5, -1)
+        X = pd.DataFrame(latent @ rng.normal(size=(5, 30)) + rng.normal(scale=0.1, size=(2000, 30)), columns=[str(i) for i in range(30)])
+        y = pd.Series(latent[:, 0] * latent[:, 1] + latent[:, 2] ** 2 + latent[:, 3] + rng.normal(size=2000), name='y')
+        steps = lambda: [StandardScalerStep(), PCAStep(kwargs={'n_components':5}), PolyStep(kwargs={'degree':2}), PearsonCorrStep(num_features=6)]
+        expected = Pipeline(steps()).fit(X, y)[0]
+        pipeline = Pipeline(steps(), dtype=np.float32)
+        for r in (pipeline.fit(X, y)[0], pipeline.transform(X), pipeline.compile().transform(X)):
+            self.assertEqual(list(r.columns), list(expected.columns))
+            self.assertEqual(r.values.nbytes * 2, expected.values.nbytes)
+            error = np.abs(r.values - expected.values) / np.abs(expected.values).max(axis=0)
+            self.assertLess(error.max(), 1e-4)
+        self.assertRaises(ValueError, Pipeline, steps(), dtype=np.int32)
+
+class TestPipelineCopy(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(50000, 20), val_range=(1, 10))
+        self.pipeline = Pipeline([StandardScalerStep(), SinStep(), LogStep(log_func=np.log1p)])
+        self.pipeline.fit(self.X)
+        self.expected = self.pipeline.transform(self.X)
+
+    # Returns the output of transforming a copy of the data and the peak memory used, relative to the size of the data
+    def peak_transform(self, **kwargs):
+        X = self.X.copy()
+        tracemalloc.start()
+        try:
+            r = self.pipeline.transform(X, **kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return X, r, peak / self.X.memory_usage().sum()
+
+    # Tests that the data is only copied once, by the first step, and not at all when the pipeline owns it
+    def test_peak_memory(self):
+        X, r, peak = self.peak_transform()
+        pd.testing.assert_frame_equal(r, self.expected)
+        pd.testing.assert_frame_equal(X, self.X)
+        self.assertLess(peak, 1.5)
+
+        X, r, peak = self.peak_transform(copy=False)
+        pd.testing.assert_frame_equal(r, self.expected)
+        self.assertLess(peak, 0.5)
+
+    # Tests that steps which append their input or select columns do not overwrite the data, and that the output is never the input
+    def test_copy_false(self):
+        for steps in ([SinStep(append_input=True), LogStep(columns=['sin_0'])], [StandardScalerStep(append_input=True)], [EmptyStep()], [ListSelectionStep(['1', '2']), SinStep()]):
+            pipeline = Pipeline(steps)
+            pipeline.fit(self.X)
+            expected = pipeline.transform(self.X)
+            X = self.X.copy()
+            pd.testing.assert_frame_equal(pipeline.transform(X, copy=False), expected)
+            r = pipeline.transform(X)
+            self.assertFalse(np.shares_memory(r.values, X.values))
+        pipeline = Pipeline([SinStep()], append_input=True)
+        pipeline.fit(self.X)
+        X = self.X.copy()
+        pd.testing.assert_frame_equal(pipeline.transform(X, copy=False), pipeline.transform(self.X))
+        pd.testing.assert_frame_equal(X, self.X)
+
+class SleepStep(EmptyStep):
+    """ An empty step that sleeps and records when it ran """
+    def __init__(self, seconds=0.2):
+        super().__init__()
+        self.seconds = seconds
+        self.interval = None
+
+    def fit(self, X, y=None):
+        start = time.perf_counter()
+        time.sleep(self.seconds)
+        self.interval = (start, time.perf_counter())
+        return super().fit(X, y=y)
+
+class TestDAGPipelineStep(unittest.TestCase, StepTest):
+    step = DAGPipeline({
+        'scaled': (StandardScalerStep(), ['input']),
+        'pca': (PCAStep(kwargs={'n_components':3}), ['scaled']),
+        'merged': (EmptyStep(), ['input', 'pca'])
+    }, output='merged')
+    X, y = rand_df(shape=(100, 10))
+    test_X = rand_df(shape=(100, 10), labeled=False)
+
+class TestDAGPipeline(unittest.TestCase):
+
+    def make_nodes(self):
+        return {
+            'scaled': (StandardScalerStep(), ['input']),
+            'pca': (PCAStep(kwargs={'n_components':3}), ['scaled']),
+            'poly': (PolyStep(kwargs={'degree':2, 'include_bias':False}), ['scaled']),
+            'log': (LogStep(), ['input']),
+            'merged': (EmptyStep(), ['pca', 'poly', 'log'])
+        }
+
+    # Tests that the branches are joined at the merge node and match running each branch on its own
+    def test_branches(self):
+        X, y = rand_df(shape=(100, 4), val_range=(1, 100))
+        test_X = rand_df(shape=(30, 4), val_range=(1, 100), labeled=False)
+        for backend in ('thread', 'process'):
+            dag = DAGPipeline(self.make_nodes(), output='merged', n_jobs=3, backend=backend)
+            r, r_y = dag.fit(X, y)
+            self.assertEqual(r.shape, (100, 3 + 14 + 4))
+            self.assertTrue(r_y.equals(y))
+            expected = pd.concat((Pipeline([StandardScalerStep(), PCAStep(kwargs={'n_components':3})]).fit(X), Pipeline([StandardScalerStep(), PolyStep(kwargs={'degree':2, 'include_bias':False})]).fit(X), LogStep().fit(X)), axis=1)
+            np.testing.assert_allclose(np.abs(r.values), np.abs(expected.values))
+            self.assertEqual(dag.transform(test_X).shape, (30, 21))
+
+    # Tests that the process workers are kept between transforms and are given the newly fitted steps after fitting again
+    def test_reused_workers(self):
+        X, y = rand_df(shape=(100, 4), val_range=(1, 100))
+        dag = DAGPipeline(self.make_nodes(), output='merged', n_jobs=2, backend='process')
+        dag.fit(X)
+        expected = dag.transform(X)
+        executor = dag._pool[2]
+        pd.testing.assert_frame_equal(dag.transform(X), expected)
+        self.assertIs(dag._pool[2], executor)
+        self.assertIsNone(pickle.loads(pickle.dumps(dag))._pool)
+
+        fit_X = dag.fit(X * 2)
+        self.assertIsNone(dag._pool)
+        pd.testing.assert_frame_equal(dag.transform(X * 2), fit_X)
+        dag.close()
+
+    # Tests that independent branches run at the same time
+    def test_concurrent(self):
+        nodes = {
+            'a': (SleepStep(), ['input']),
+            'b': (SleepStep(), ['input']),
+            'c': (SleepStep(), ['input']),
+            'merged': (EmptyStep(), ['a', 'b', 'c'])
+        }
+        dag = DAGPipeline(nodes, output='merged', n_jobs=3)
+        dag.fit(rand_df(shape=(10, 2), labeled=False))
+        intervals = [nodes[name][0].interval for name in ('a', 'b', 'c')]
+        self.assertLess(max(start for start, _ in intervals), min(end for _, end in intervals))
+
+    # Tests that invalid graphs are rejected
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            DAGPipeline({'a': (EmptyStep(), ['b']), 'b': (EmptyStep(), ['a'])}, output='a')
+        with self.assertRaises(ValueError):
+            DAGPipeline({'a': (EmptyStep(), ['missing'])}, output='a')
+        with self.assertRaises(ValueError):
+            DAGPipeline({'a': (ABODStep(num_remove=1), ['input'])}, output='a')
+        with self.assertRaises(ValueError):
+            DAGPipeline({'a': (EmptyStep(), ['input'])}, output='a', backend='gpu')
@@ -1,9 +1,14 @@
 # External Imports
+import tracemalloc
 import unittest
-from sklearn.ensemble import ExtraTreesClassifier
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesClassifier, ExtraTreesRegressor
+from sklearn.tree import DecisionTreeRegressor
 
 # Internal Imports
-from DSPipeline.feature_selection import ChiSqSelectionStep, LassoSelectionStep, ListSelectionStep, PearsonCorrStep, TreeSelectionStep
+from DSPipeline.data_transformations import PolyStep
+from DSPipeline.feature_selection import ChiSqSelectionStep, LassoSelectionStep, ListSelectionStep, PearsonCorrStep, PolyScreenStep, TreeSelectionStep, _stratified_sample
 from tests.step_tests import StepTest
 from tests.utils import rand_df, rand_df_classification
 
@@ -56,4 +61,188 @@ class TreeTests1(unittest.TestCase, StepTest):
 class TreeTests2(unittest.TestCase, StepTest):
     step = TreeSelectionStep(tree_model=ExtraTreesClassifier)
     X, y = rand_df_classification()
-    test_X = rand_df(labeled=False)
\ No newline at end of file
+    test_X = rand_df(labeled=False)
+
+class TreeTests3(unittest.TestCase, StepTest):
+    step = TreeSelectionStep(tree_kwargs={'n_estimators':20}, max_samples=0.5, batch_size=5, random_state=0)
+    X, y = rand_df_classification(classes=3)
+    test_X = rand_df(labeled=False)
+
+class TreeSelectionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.X, _ = rand_df(shape=(2000, 10))
+        self.y = self.X['2'] * 3 + self.X['7'] + np.random.normal(size=2000)
+        self.select_kwargs = {'threshold':-np.inf, 'max_features':2}
+
+    # Tests that a classifier is used for class labels and a regressor otherwise, on all cores unless tree_kwargs sets n_jobs
+    def test_model(self):
+        model = TreeSelectionStep()._make_model(pd.Series([0, 1, 2, 1]))
+        self.assertIsInstance(model, ExtraTreesClassifier)
+        self.assertEqual(model.n_jobs, -1)
+        model = TreeSelectionStep(tree_kwargs={'n_jobs':2})._make_model(self.y)
+        self.assertIsInstance(model, ExtraTreesRegressor)
+        self.assertEqual(model.n_jobs, 2)
+        self.assertEqual(TreeSelectionStep(n_jobs=3)._make_model(self.y).n_jobs, 3)
+
+        step = TreeSelectionStep(tree_kwargs={'n_estimators':20}, select_kwargs={'threshold':-np.inf, 'max_features':1})
+        step.fit(self.X, (self.X['4'] > 0).astype(int))
+        self.assertEqual(step.features, ['4'])
+
+    # Tests that batches of trees on samples of the rows stop once the selection is stable, and select the same features as all of the rows
+    def test_early_stopping(self):
+        expected = TreeSelectionStep(tree_kwargs={'n_estimators':50}, select_kwargs=self.select_kwargs)
+        expected.fit(self.X, self.y)
+        step = TreeSelectionStep(tree_kwargs={'n_estimators':200}, select_kwargs=self.select_kwargs, max_samples=500, batch_size=10, random_state=0)
+        r, _ = step.fit(self.X, self.y)
+        self.assertEqual(step.features, expected.features)
+        self.assertEqual(list(r.columns), ['2', '7'])
+        self.assertLess(step.num_trees, 200)
+
+        # The stopping point depends on the trees, but the selection it stops at does not
+        for random_state in (1, 2):
+            step = TreeSelectionStep(tree_kwargs={'n_estimators':200}, select_kwargs=self.select_kwargs, max_samples=500, batch_size=10, random_state=random_state)
+            step.fit(self.X, self.y)
+            self.assertEqual(step.features, expected.features)
+            self.assertLess(step.num_trees, 200)
+
+        step = TreeSelectionStep(tree_kwargs={'n_estimators':50}, select_kwargs=self.select_kwargs, batch_size=20, patience=10)
+        step.fit(self.X, self.y)
+        self.assertEqual(step.num_trees, 50)
+        self.assertRaises(ValueError, TreeSelectionStep(tree_model=DecisionTreeRegressor, tree_kwargs={}, batch_size=10).fit, self.X, self.y)
+
+    # Tests that each stratum keeps its share of the sampled rows, and that small strata are still sampled
+    def test_stratified_sample(self):
+        strata = np.array([0] * 900 + [1] * 95 + [2] * 5)
+        rows = _stratified_sample(strata, 100, np.random.RandomState(0))
+        self.assertEqual(len(np.unique(rows)), len(rows))
+        self.assertEqual(np.bincount(strata[rows]).tolist(), [90, 10, 1])
+
+class PearsonCorrTargetTests(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(300, 20))
+        self.X.iloc[10:40, 3] = np.nan
+        self.X['constant'] = 1.0
+
+    # Returns the features the step selected before, using the whole correlation matrix
+    def corr_matrix_features(self, num_features, kwargs, X, y):
+        corr_target = abs(pd.concat((X, y), axis=1).corr(**kwargs)[y.name])
+        if num_features < 1:
+            return corr_target[corr_target > num_features].drop(index=y.name)
+        return corr_target.sort_values(ascending=False).iloc[:(num_features + 1)].drop(index=y.name)
+
+    # Tests that both num_features modes match the correlation matrix for each method, with missing values and a constant feature
+    def test_matches_corr(self):
+        X_complete = self.X.drop(columns=['constant']).fillna(0)
+        for kwargs in ({}, {'method':'spearman'}, {'method':'kendall'}, {'min_periods':280}):
+            for X in (self.X, X_complete):
+                for num_features in (0.05, 5):
+                    step = PearsonCorrStep(num_features=num_features, kwargs=kwargs)
+                    step.fit(X, self.y)
+                    expected = self.corr_matrix_features(num_features, kwargs, X, self.y)
+                    self.assertEqual(sorted(step.features.index), sorted(expected.index))
+                    np.testing.assert_allclose(step.features[expected.index].values, expected.values)
+
+    # Tests that the selection from chunks matches fitting the selection at once
+    def test_partial_fit(self):
+        for num_features in (0.05, 5):
+            step = PearsonCorrStep(num_features=num_features)
+            for i in range(0, 300, 70):
+                self.assertIs(step.partial_fit(self.X.iloc[i:i + 70], self.y.iloc[i:i + 70]), step)
+            expected = PearsonCorrStep(num_features=num_features)
+            expected.fit(self.X, self.y)
+            self.assertEqual(list(step.features.index), list(expected.features.index))
+            np.testing.assert_allclose(step.features.values, expected.features.values)
+
+    # Tests that the step needs target values and can only accumulate the pearson method
+    def test_errors(self):
+        self.assertRaises(ValueError, PearsonCorrStep(num_features=5).fit, self.X)
+        self.assertRaises(ValueError, PearsonCorrStep(num_features=5, kwargs={'method':'spearman'}).partial_fit, self.X, self.y)
+
+class PolyScreenTests1(unittest.TestCase, StepTest):
+    step = PolyScreenStep(num_features=10)
+    X, y = rand_df()
+    test_X = rand_df(labeled=False)
+
+class PolyScreenTests2(unittest.TestCase, StepTest):
+    step = PolyScreenStep(num_features=10, kwargs={'degree':3, 'interaction_only':True}, score='lasso', block_size=50, append_input=True)
+    X, y = rand_df(shape=(100, 10))
+    test_X = rand_df(shape=(50, 10), labeled=False)
+
+class PolyScreenScoreTests(unittest.TestCase):
+
+    # Tests that screening in blocks keeps the same combinations as creating all of them and selecting with pearson correlation
+    def test_matches_poly_corr(self):
+        X, y = rand_df(shape=(200, 12))
+        X = X.add_prefix('x')
+        for kwargs in ({'degree':2}, {'degree':3, 'interaction_only':True}, {'degree':(2, 3)}):
+            r, _ = PolyScreenStep(num_features=10, kwargs=kwargs, block_size=37).fit(X, y)
+            expected, _ = PearsonCorrStep(num_features=10).fit(PolyStep(kwargs=kwargs).fit(X), y)
+            self.assertEqual(list(r.columns), list(expected.columns))
+            np.testing.assert_allclose(r.values, expected.values)
+
+    # Tests that the combinations are named like PolyStep names them, including columns with spaces in their names
+    def test_names(self):
+        X, y = rand_df(shape=(100, 3))
+        X.columns = ['a', 'b c', 'd']
+        r, _ = PolyScreenStep(num_features=9, kwargs={'degree':2}).fit(X, y)
+        expected = PolyStep(kwargs={'degree':2, 'include_bias':False}).fit(X)
+        self.assertEqual(sorted(r.columns), sorted(expected.columns))
+        self.assertIn('a*b c', r.columns)
+        self.assertIn('b c^2', r.columns)
+
+    # Tests that the peak memory of fitting grows with the block size and not the number of combinations
+    def test_memory(self):
+        X, y = rand_df(shape=(1000, 120))
+        step = PolyScreenStep(num_features=5, block_size=100)
+        tracemalloc.start()
+        step.fit(X, y)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertLess(peak, 1000 * 7260 * 8 / 4)
+
+class ChiSqPartialFitTests(unittest.TestCase):
+
+    # Tests that the selection from chunks matches fitting the selection at once
+    def test_matches_fit(self):
+        X, y = rand_df_classification(shape=(300, 30), classes=3)
+        step = ChiSqSelectionStep(select_kwargs={'k':8})
+        for i in range(0, 300, 100):
+            step.partial_fit(X.iloc[i:i + 100], y.iloc[i:i + 100])
+        expected = ChiSqSelectionStep(select_kwargs={'k':8})
+        expected.fit(X, y)
+        self.assertEqual(step.features, expected.features)
+        self.assertEqual(step.transform(X).shape, (300, 8))
+
+class SparseInputTests(unittest.TestCase):
+
+    # Tests that the model based selections are fitted on the sparse output of the poly step
+    def test_sparse_poly(self):
+        X, y = rand_df(shape=(100, 6))
+        X[X < 50] = 0
+        poly = PolyStep(kwargs={'degree':2, 'include_bias':False}, sparse=True).fit(X)
+        for step in (LassoSelectionStep(select_kwargs={'threshold':-np.inf, 'max_features':5}), TreeSelectionStep(tree_kwargs={'n_estimators':10}, select_kwargs={'threshold':-np.inf, 'max_features':5})):
+            r, _ = step.fit(poly, y)
+            self.assertEqual(r.shape, (100, 5))
+            self.assertTrue(all(isinstance(dtype, pd.SparseDtype) for dtype in r.dtypes))
+
+    # Tests that chi squared and pearson selections on sparse data match dense data, including when fitted on chunks
+    def test_statistics(self):
+        X, y = rand_df_classification(shape=(300, 20), classes=3)
+        X[X < 70] = 0
+        sparse_X = X.astype(pd.SparseDtype(float, 0))
+        for make_step in (lambda: ChiSqSelectionStep(select_kwargs={'k':5}), lambda: PearsonCorrStep(num_features=5)):
+            expected = make_step()
+            expected.fit(X, y)
+            step = make_step()
+            r, _ = step.fit(sparse_X, y)
+            self.assertEqual(list(r.columns), list(expected.transform(X).columns))
+            self.assertTrue(all(isinstance(dtype, pd.SparseDtype) for dtype in r.dtypes))
+            chunked = make_step()
+            for i in range(0, 300, 100):
+                chunked.partial_fit(sparse_X.iloc[i:i + 100], y.iloc[i:i + 100])
+            self.assertEqual(list(chunked.transform(sparse_X).columns), list(r.columns))
+        self.assertEqual(ListSelectionStep(['1', '3']).fit(sparse_X).shape, (300, 2))
+        self.assertRaises(TypeError, PearsonCorrStep(num_features=5, kwargs={'method':'spearman'}).fit, sparse_X, y)
+        self.assertRaises(TypeError, PolyScreenStep(num_features=5).fit, sparse_X, y)
@@ -0,0 +1,114 @@
+# External Imports
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+# Internal Imports
+from DSPipeline.data_transformations import LogStep, PCAStep, PolyStep, StandardScalerStep
+from DSPipeline.ds_pipeline import Pipeline
+from DSPipeline.feature_selection import ListSelectionStep, PearsonCorrStep
+from DSPipeline.fit_cache import FitCache, step_key
+from DSPipeline.outlier_detection import ABODStep
+from DSPipeline.profiling import PipelineProfiler
+from tests.utils import rand_df
+
+################################################################################################
+# TESTS
+################################################################################################
+class FitCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.X, self.y = rand_df(shape=(100, 5), val_range=(1, 100))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_steps(self, num_features=5):
+        return [StandardScalerStep(), PolyStep(kwargs={'degree':2, 'include_bias':False}), PearsonCorrStep(num_features=num_features)]
+
+    # Tests that refitting the same steps on the same data loads every step from the cache
+    def test_hits(self):
+        pipeline = Pipeline(self.make_steps(), memory=self.directory)
+        expected, _ = pipeline.fit_transform(self.X, self.y)
+        self.assertEqual(pipeline.fit_cache.info()['misses'], 3)
+
+        pipeline = Pipeline(self.make_steps(), memory=self.directory)
+        result, _ = pipeline.fit_transform(self.X, self.y)
+        info = pipeline.fit_cache.info()
+        self.assertEqual((info['hits'], info['misses'], info['entries']), (3, 0, 3))
+        pd.testing.assert_frame_equal(result, expected)
+
+        # The loaded steps must be able to transform new data
+        test_X = rand_df(shape=(20, 5), val_range=(1, 100), labeled=False)
+        self.assertEqual(pipeline.transform(test_X).shape, (20, 5))
+
+    # Tests that changing the data or a later step's arguments only misses the affected steps
+    def test_misses(self):
+        Pipeline(self.make_steps(), memory=self.directory).fit(self.X, self.y)
+
+        pipeline = Pipeline(self.make_steps(num_features=3), memory=self.directory)
+        pipeline.fit(self.X, self.y)
+        self.assertEqual((pipeline.fit_cache.hits, pipeline.fit_cache.misses), (2, 1))
+
+        pipeline = Pipeline(self.make_steps(), memory=self.directory)
+        pipeline.fit(self.X * 2, self.y)
+        self.assertEqual((pipeline.fit_cache.hits, pipeline.fit_cache.misses), (0, 3))
+
+    # Tests that functions given as arguments are part of the key
+    def test_function_arguments(self):
+        cache = FitCache(self.directory)
+        key = cache.fingerprint(self.X, self.y)
+        self.assertEqual(cache.output_key(key, LogStep()), cache.output_key(key, LogStep()))
+        self.assertNotEqual(cache.output_key(key, LogStep()), cache.output_key(key, LogStep(log_func=abs)))
+
+    # Tests that lambdas and closures are keyed on their code and closure values, and that steps holding them are fitted without being cached
+    def test_lambda_arguments(self):
+        self.assertNotEqual(step_key(LogStep(log_func=lambda x: x + 1)), step_key(LogStep(log_func=lambda x: x + 2)))
+        def make_func(offset):
+            return lambda x: x + offset
+        self.assertNotEqual(step_key(LogStep(log_func=make_func(1))), step_key(LogStep(log_func=make_func(2))))
+        self.assertEqual(step_key(LogStep(log_func=make_func(1))), step_key(LogStep(log_func=make_func(1))))
+
+        pipeline = Pipeline([LogStep(log_func=make_func(1))], memory=self.directory)
+        with self.assertWarns(UserWarning):
+            result, _ = pipeline.fit_transform(self.X, self.y)
+        np.testing.assert_array_equal(result.values, self.X.values + 1)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    # Tests that the profiler of a nested pipeline is not part of the key
+    def test_profiled_steps(self):
+        cache = FitCache(self.directory)
+        key = cache.fingerprint(self.X, self.y)
+        self.assertEqual(cache.output_key(key, Pipeline(self.make_steps(), profiler=PipelineProfiler())), cache.output_key(key, Pipeline(self.make_steps(), profiler=PipelineProfiler())))
+
+    # Tests that every constructor argument is part of the key, with arrays hashed by their values and random states by their state
+    def test_arguments(self):
+        self.assertNotEqual(step_key(ListSelectionStep(['a', 'b'])), step_key(ListSelectionStep(['a', 'c'])))
+        features = np.arange(2000)
+        changed = features.copy()
+        changed[1000] = -1
+        self.assertNotEqual(step_key(ListSelectionStep(features)), step_key(ListSelectionStep(changed)))
+        self.assertEqual(step_key(ABODStep(1, random_state=np.random.RandomState(0))), step_key(ABODStep(1, random_state=np.random.RandomState(0))))
+        self.assertNotEqual(step_key(ABODStep(1, random_state=np.random.RandomState(0))), step_key(ABODStep(1, random_state=np.random.RandomState(1))))
+
+        # What a step learns while fitting is not part of the key
+        step = StandardScalerStep()
+        key = step_key(step)
+        step.fit(self.X)
+        self.assertEqual(step_key(step), key)
+
+    # Tests that the least recently used entries are removed once the cache is too big
+    def test_eviction(self):
+        pipeline = Pipeline([StandardScalerStep(), PCAStep()], memory=self.directory)
+        pipeline.fit(self.X, self.y)
+        sizes = sorted(os.path.getsize(os.path.join(self.directory, f)) for f in os.listdir(self.directory))
+
+        pipeline = Pipeline([StandardScalerStep(), PCAStep()], memory=self.directory, max_cache_bytes=sum(sizes) + 1)
+        pipeline.fit(self.X * 2, self.y)
+        info = pipeline.fit_cache.info()
+        self.assertGreater(info['evictions'], 0)
+        self.assertLessEqual(info['bytes'], sum(sizes) + 1)
@@ -0,0 +1,46 @@
+# External Imports
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Modules that only some of the steps need, which must not be loaded by importing DSPipeline
+HEAVY_MODULES = ['pyod', 'imblearn', 'sklearn.ensemble', 'sklearn.neighbors', 'sklearn.discriminant_analysis', 'sklearn.feature_selection']
+
+IMPORT_SCRIPT = """
+import json, sys
+{statement}
+print(json.dumps(sorted(sys.modules)))
+"""
+
+################################################################################################
+# Runs an import statement in a fresh interpreter and returns the loaded modules
+def loaded_modules(statement):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT.format(statement=statement)], cwd=root)
+    return set(json.loads(output.decode().strip().splitlines()[-1]))
+
+################################################################################################
+# TESTS
+################################################################################################
+class ImportTests(unittest.TestCase):
+
+    # Tests that importing the package only needs pandas and numpy
+    def test_package_import(self):
+        modules = loaded_modules('import DSPipeline')
+        self.assertNotIn('sklearn', modules)
+
+    # Tests that using the light steps does not load the modules of the heavy ones
+    def test_light_steps(self):
+        modules = loaded_modules('from DSPipeline import StandardScalerStep, ListSelectionStep, Pipeline')
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+
+    # Tests that every exported name can still be loaded
+    def test_exports(self):
+        import DSPipeline
+        for name in DSPipeline.__all__:
+            self.assertTrue(hasattr(DSPipeline, name))
+        with self.assertRaises(AttributeError):
+            DSPipeline.NotAStep
@@ -1,8 +1,9 @@
 # External Imports
 import unittest
+import numpy as np
 
 # Internal Imports
-from DSPipeline.outlier_detection import ABODStep, IsoForestStep, LOFStep
+from DSPipeline.outlier_detection import ABODStep, IsoForestStep, LOFStep, _remove_samples
 from tests.step_tests import StepTest
 from tests.utils import rand_df, rand_df_classification
 
@@ -33,3 +34,77 @@ class LFOIncludeY(unittest.TestCase, StepTest):
     step = LOFStep(include_y=False)
     X, y = rand_df(outlier=True)
     test_X = rand_df(labeled=False, outlier=True)
+
+class SampleRemovalTests(unittest.TestCase):
+
+    # Tests that the mask removes the flagged rows and keeps X and y aligned for any index
+    def test_remove_samples(self):
+        X, y = rand_df(shape=(50, 3))
+        X.index = np.arange(50)[::-1] * 3 + 7
+        y.index = X.index
+        keep = np.ones(50, dtype=bool)
+        keep[[0, 10, 49]] = False
+        new_X, new_y = _remove_samples(X, y, keep)
+        self.assertEqual(new_X.shape, (47, 3))
+        self.assertEqual(list(new_X.index), list(range(47)))
+        np.testing.assert_array_equal(new_X.values, X.values[keep])
+        np.testing.assert_array_equal(new_y.values, y.values[keep])
+        self.assertEqual(_remove_samples(X, None, keep).shape, (47, 3))
+
+    # Tests that outliers are removed from data that does not have a range index
+    def test_non_range_index(self):
+        X, y = rand_df(outlier=True)
+        X.index = X.index + 1000
+        y.index = X.index
+        step = LOFStep(kwargs={'contamination':0.05})
+        new_X, new_y = step.fit(X, y)
+        self.assertEqual(new_X.shape[0], 95)
+        self.assertEqual(new_y.shape[0], 95)
+        self.assertFalse((new_X.values > 1e5).any())
+
+class LOFNovelty(unittest.TestCase, StepTest):
+    step = LOFStep(novelty=True)
+    X, y = rand_df(outlier=True)
+    test_X = rand_df(labeled=False, outlier=True)
+
+class LOFNoveltyTests(unittest.TestCase):
+
+    # Tests that new data is scored against the training neighbors without refitting
+    def test_scores_against_training(self):
+        X, y = rand_df(shape=(200, 5))
+        step = LOFStep(novelty=True)
+        step.fit(X, y)
+        fitted = step.fitted
+        test_X = rand_df(shape=(50, 5), labeled=False, outlier=True)
+        new_X = step.transform(test_X)
+        self.assertIs(step.fitted, fitted)
+        self.assertEqual(fitted.negative_outlier_factor_.shape[0], 200)
+        self.assertFalse((new_X.values > 1e5).any())
+
+class ABODReferenceTests(unittest.TestCase, StepTest):
+    step = ABODStep(num_remove=1, max_reference=50, reference='kmeans', random_state=0)
+    X, y = rand_df(outlier=True)
+    test_X = rand_df(labeled=False, outlier=True)
+
+class ABODScoringTests(unittest.TestCase):
+
+    # Tests that new data is scored itself instead of using the training scores
+    def test_scores_given_data(self):
+        X, y = rand_df(shape=(200, 5))
+        test_X = rand_df(shape=(40, 5), labeled=False, outlier=True)
+        for step in (ABODStep(num_remove=1), ABODStep(num_remove=1, max_reference=60, random_state=0)):
+            step.fit(X, y)
+            new_X = step.transform(test_X)
+            self.assertEqual(new_X.shape[0], 39)
+            self.assertFalse((new_X.values > 1e5).any())
+
+    # Tests that the reference set is capped
+    def test_max_reference(self):
+        X, y = rand_df(shape=(300, 5))
+        step = ABODStep(num_remove=3, max_reference=80, random_state=0)
+        new_X, new_y = step.fit(X, y)
+        self.assertEqual(step.fitted.n_train_, 80)
+        self.assertEqual(new_X.shape[0], 297)
+        self.assertEqual(new_y.shape[0], 297)
+        with self.assertRaises(ValueError):
+            ABODStep(num_remove=1, max_reference=10, reference='other').fit(X, y)
@@ -0,0 +1,58 @@
+# External Imports
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+# Internal Imports
+from DSPipeline.data_transformations import PCAStep, StandardScalerStep
+from DSPipeline.ds_pipeline import Pipeline
+from DSPipeline.feature_selection import PearsonCorrStep, TreeSelectionStep
+from DSPipeline.outlier_detection import IsoForestStep
+from DSPipeline.persistence import ARRAY_DIRECTORY, load, save
+from tests.utils import rand_df
+
+################################################################################################
+# TESTS
+################################################################################################
+class PersistenceTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.X, self.y = rand_df(shape=(200, 300))
+        self.test_X = rand_df(shape=(50, 300), labeled=False)
+        self.pipeline = Pipeline([StandardScalerStep(), PearsonCorrStep(num_features=100), TreeSelectionStep(tree_kwargs={'n_estimators':10}), PCAStep(kwargs={'n_components':5})])
+        self.pipeline.fit(self.X, self.y)
+        self.expected = self.pipeline.transform(self.test_X)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # Tests that a memory mapped pipeline transforms the same as the original
+    def test_mmap_load(self):
+        self.pipeline.save(self.directory)
+        self.assertTrue(len(os.listdir(os.path.join(self.directory, ARRAY_DIRECTORY))) > 0)
+        loaded = Pipeline.load(self.directory)
+        self.assertIsInstance(loaded.steps[0].fitted.mean_, np.memmap)
+        self.assertFalse(loaded.steps[0].fitted.mean_.flags.writeable)
+        pd.testing.assert_frame_equal(loaded.transform(self.test_X), self.expected)
+
+    # Tests that arrays are read into memory when not memory mapping, and that saving again replaces the arrays
+    def test_load_without_mmap(self):
+        self.pipeline.save(self.directory)
+        loaded = Pipeline.load(self.directory, mmap=False)
+        self.assertNotIsInstance(loaded.steps[0].fitted.mean_, np.memmap)
+        loaded.save(self.directory)
+        loaded = Pipeline.load(self.directory)
+        pd.testing.assert_frame_equal(loaded.transform(self.test_X), self.expected)
+
+    # Tests that the node arrays of fitted trees are kept in the pickle, since sklearn copies them when loading
+    def test_tree_arrays(self):
+        X = rand_df(shape=(2000, 5), labeled=False)
+        step = IsoForestStep(include_y=False, kwargs={'n_estimators':5, 'random_state':0})
+        step.fit(X)
+        save(step, self.directory)
+        self.assertEqual(os.listdir(os.path.join(self.directory, ARRAY_DIRECTORY)), [])
+        np.testing.assert_array_equal(load(self.directory).fitted.decision_function(X), step.fitted.decision_function(X))
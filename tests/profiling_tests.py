@@ -0,0 +1,103 @@
+# External Imports
+import os
+import pickle
+import tempfile
+import tracemalloc
+import unittest
+import pandas as pd
+
+# Internal Imports
+from DSPipeline.data_transformations import PCAStep, SinStep, StandardScalerStep
+from DSPipeline.ds_pipeline import Pipeline
+from DSPipeline.outlier_detection import LOFStep
+from DSPipeline.profiling import PipelineProfiler
+from tests.utils import rand_df
+
+################################################################################################
+# TESTS
+################################################################################################
+class PipelineProfilerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(300, 6), val_range=(1, 10))
+        self.steps = lambda: [StandardScalerStep(), LOFStep(kwargs={'contamination':0.1}), PCAStep(kwargs={'n_components':3})]
+
+    # Tests that every call of each step is recorded with its shapes and the rows it removed, and sent to the callbacks
+    def test_records(self):
+        sent = []
+        profiler = PipelineProfiler(callbacks=[sent.append])
+        pipeline = Pipeline(self.steps(), profiler=profiler)
+        expected = Pipeline(self.steps()).fit(self.X, self.y)
+        r = pipeline.fit(self.X, self.y)
+        pd.testing.assert_frame_equal(r[0], expected[0])
+        pipeline.transform(self.X, allow_sample_removal=False)
+
+        frame = profiler.to_frame()
+        self.assertEqual(frame['step'].tolist(), [0, 1, 2, 0, 2])
+        self.assertEqual(frame['method'].tolist(), ['fit'] * 3 + ['transform'] * 2)
+        self.assertEqual(frame['input_shape'].tolist(), [(300, 6), (300, 6), (270, 6), (300, 6), (300, 6)])
+        self.assertEqual(frame['output_shape'].tolist(), [(300, 6), (270, 6), (270, 3), (300, 6), (300, 3)])
+        self.assertEqual(frame['rows_removed'].tolist(), [0, 30, 0, 0, 0])
+        self.assertTrue((frame['wall_seconds'] > 0).all())
+        self.assertTrue(frame['peak_memory_delta'].isna().all())
+        self.assertEqual(sent, list(profiler.records))
+
+        summary = profiler.summary()
+        self.assertEqual(summary.loc[(0, 'Standard Scaler', 'fit'), 'calls'], 1)
+        self.assertEqual(summary.loc[(2, 'PCA', 'transform'), 'calls'], 1)
+        profiler.clear()
+        self.assertEqual(len(profiler.to_frame()), 0)
+
+    # Tests that the memory of each step is recorded and that tracing is stopped afterwards
+    def test_memory(self):
+        X, _ = rand_df(shape=(20000, 10))
+        profiler = PipelineProfiler(memory=True)
+        pipeline = Pipeline([SinStep(), StandardScalerStep(append_input=True)], profiler=profiler)
+        pipeline.fit(X)
+        frame = profiler.to_frame()
+        size = X.memory_usage().sum()
+        self.assertGreaterEqual(frame.loc[0, 'allocated_bytes'], size)
+        self.assertGreaterEqual(frame.loc[1, 'peak_memory_delta'], 2 * size)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    # Tests that nested profilers still record memory when tracemalloc cannot reset its peak, as before Python 3.9
+    def test_memory_without_reset_peak(self):
+        X, _ = rand_df(shape=(2000, 10))
+        inner = PipelineProfiler(memory=True)
+        outer = PipelineProfiler(memory=True)
+        pipeline = Pipeline([SinStep(), Pipeline([StandardScalerStep()], profiler=inner)], profiler=outer)
+        reset_peak = getattr(tracemalloc, 'reset_peak', None)
+        if reset_peak is not None:
+            del tracemalloc.reset_peak
+        try:
+            pipeline.fit(X)
+        finally:
+            if reset_peak is not None:
+                tracemalloc.reset_peak = reset_peak
+        self.assertTrue(inner.to_frame()['peak_memory_delta'].isna().all())
+        self.assertFalse(outer.to_frame()['peak_memory_delta'].isna().any())
+        self.assertFalse(tracemalloc.is_tracing())
+
+    # Tests that fit_stream records the partial fits and that runs of steps on shards are recorded once
+    def test_stream_and_shards(self):
+        profiler = PipelineProfiler(max_records=3)
+        pipeline = Pipeline([StandardScalerStep(), PCAStep(kwargs={'n_components':2})], profiler=profiler)
+        pipeline.fit_stream([self.X.iloc[:150], self.X.iloc[150:]])
+        self.assertEqual(profiler.to_frame()['method'].tolist(), ['partial_fit', 'transform', 'partial_fit'])
+        profiler.clear()
+        pipeline.transform(self.X, n_jobs=2, backend='thread')
+        frame = profiler.to_frame()
+        self.assertEqual(frame['description'].tolist(), ['Standard Scaler, PCA'])
+        self.assertEqual(frame['output_shape'].tolist(), [(300, 2)])
+
+    # Tests that a pipeline with a profiler can be saved, without the callbacks
+    def test_pickle(self):
+        profiler = PipelineProfiler(callbacks=[lambda record: None])
+        pipeline = Pipeline(self.steps(), profiler=profiler)
+        pipeline.fit(self.X, self.y)
+        with tempfile.TemporaryDirectory() as path:
+            pipeline.save(os.path.join(path, 'pipeline'))
+            loaded = Pipeline.load(os.path.join(path, 'pipeline'))
+        self.assertEqual(loaded.profiler.callbacks, [])
+        self.assertEqual(len(loaded.profiler.records), 3)
+        self.assertEqual(len(pickle.loads(pickle.dumps(profiler)).records), 3)
@@ -0,0 +1,103 @@
+# External Imports
+import unittest
+import numpy as np
+import pandas as pd
+
+# Internal Imports
+from DSPipeline.data_transformations import PCAStep, PolyStep, StandardScalerStep
+from DSPipeline.ds_pipeline import EmptyStep, Pipeline
+from DSPipeline.feature_selection import ListSelectionStep, PearsonCorrStep
+from DSPipeline.outlier_detection import IsoForestStep
+from DSPipeline.search import PrefixSearch
+from tests.utils import rand_df
+
+################################################################################################
+# Scores a candidate on the mean absolute correlation of its features with the target
+def mean_corr(X, y):
+    return float(X.corrwith(y).abs().mean())
+
+class CountingScalerStep(StandardScalerStep):
+    """ A standard scaler step that counts how many times its class is fitted """
+    fit_calls = 0
+
+    def fit(self, X, y=None):
+        CountingScalerStep.fit_calls += 1
+        return super().fit(X, y=y)
+
+################################################################################################
+# TESTS
+################################################################################################
+class PrefixSearchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(200, 6))
+        self.test_X = rand_df(shape=(50, 6), labeled=False)
+        CountingScalerStep.fit_calls = 0
+
+    def make_candidates(self):
+        candidates = []
+        for degree in (2, 3):
+            for num_features in (3, 5):
+                candidates.append([CountingScalerStep(), PolyStep(kwargs={'degree':degree}), PearsonCorrStep(num_features=num_features)])
+        return candidates
+
+    # Tests that shared prefixes are fitted once and every candidate matches fitting it alone
+    def test_matches_separate_fits(self):
+        search = PrefixSearch(self.make_candidates(), scorer=mean_corr, n_jobs=2).fit(self.X, y=self.y)
+        self.assertEqual(CountingScalerStep.fit_calls, 1)
+        self.assertEqual(search.report['candidates'], 4)
+        self.assertEqual(search.report['steps_fitted'], 1 + 2 + 4)
+        self.assertEqual(search.report['naive_steps_fitted'], 12)
+        self.assertGreaterEqual(search.report['saved_seconds'], 0)
+
+        for steps, pipeline, score in zip(self.make_candidates(), search.pipelines, search.scores):
+            r_X, r_y = Pipeline(steps).fit_transform(self.X, y=self.y)
+            pd.testing.assert_frame_equal(pipeline.transform(self.test_X), Pipeline(steps).transform(self.test_X))
+            self.assertAlmostEqual(score, mean_corr(r_X, r_y))
+
+    # Tests that candidates which are prefixes of other candidates and sample removing steps are handled
+    def test_prefix_candidates(self):
+        candidates = [
+            [StandardScalerStep()],
+            [StandardScalerStep(), IsoForestStep(kwargs={'contamination':0.1, 'random_state':0})],
+            [StandardScalerStep(), IsoForestStep(kwargs={'contamination':0.1, 'random_state':0}), PCAStep(kwargs={'n_components':2})]
+        ]
+        search = PrefixSearch(candidates, scorer=lambda X, y: X.shape[0]).fit(self.X, y=self.y)
+        self.assertEqual(search.report['steps_fitted'], 3)
+        self.assertEqual(search.scores[0], self.X.shape[0])
+        self.assertLess(search.scores[1], self.X.shape[0])
+        self.assertEqual(search.scores[1], search.scores[2])
+        self.assertEqual(search.best()[0], 0)
+
+    # Tests that steps are only shared when all of their arguments are the same
+    def test_distinct_arguments(self):
+        candidates = [[ListSelectionStep(list(self.X.columns[:3]))], [ListSelectionStep(list(self.X.columns[3:]))]]
+        search = PrefixSearch(candidates).fit(self.X)
+        self.assertEqual(search.report['steps_fitted'], 2)
+        self.assertEqual(list(search.pipelines[1].transform(self.X).columns), list(self.X.columns[3:]))
+
+    # Tests that a step object given under different prefixes is fitted separately for each of them
+    def test_shared_step_object(self):
+        selector = PearsonCorrStep(num_features=1)
+        candidates = [[PCAStep(kwargs={'n_components':2}), selector], [PCAStep(kwargs={'n_components':5}), selector]]
+        search = PrefixSearch(candidates).fit(self.X, y=self.y)
+        self.assertIsNone(selector.features)
+        for steps, pipeline in zip(candidates, search.pipelines):
+            expected = Pipeline([PCAStep(kwargs=steps[0].kwargs), PearsonCorrStep(num_features=1)])
+            expected.fit(self.X, y=self.y)
+            pd.testing.assert_frame_equal(pipeline.transform(self.test_X), expected.transform(self.test_X))
+
+    # Tests that the process backend copies the fitted state back
+    def test_process_backend(self):
+        candidates = [[StandardScalerStep(), PCAStep(kwargs={'n_components':n})] for n in (2, 3)]
+        search = PrefixSearch(candidates, n_jobs=2, backend='process').fit(self.X)
+        self.assertIsNone(search.scores)
+        for pipeline, n in zip(search.pipelines, (2, 3)):
+            self.assertEqual(pipeline.transform(self.test_X).shape, (50, n))
+        np.testing.assert_array_equal(search.pipelines[0].steps[0].fitted.mean_, search.pipelines[1].steps[0].fitted.mean_)
+
+    # Tests that an unknown backend and asking for the best candidate without a scorer raise errors
+    def test_errors(self):
+        self.assertRaises(ValueError, PrefixSearch, [[EmptyStep()]], backend='gpu')
+        search = PrefixSearch([[EmptyStep()]]).fit(self.X)
+        self.assertRaises(ValueError, search.best)
@@ -0,0 +1,83 @@
+# External Imports
+import asyncio
+import unittest
+import numpy as np
+import pandas as pd
+
+# Internal Imports
+from DSPipeline.data_transformations import PCAStep, StandardScalerStep
+from DSPipeline.ds_pipeline import Pipeline
+from DSPipeline.outlier_detection import LOFStep
+from DSPipeline.serving import AsyncPipelineRunner
+from tests.utils import rand_df
+
+################################################################################################
+# Sends every record to the runner from its own task, starting at most concurrency requests at a time
+async def generate_load(runner, records, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    async def request(record):
+        async with semaphore:
+            return await runner.transform(record)
+    return await asyncio.gather(*(request(record) for record in records))
+
+class FailingStep(StandardScalerStep):
+    """ A scaler step that fails to transform """
+    def transform(self, X, y=None):
+        raise RuntimeError('transform failed')
+
+################################################################################################
+# TESTS
+################################################################################################
+class AsyncPipelineRunnerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = rand_df(shape=(300, 5))
+        self.pipeline = Pipeline([StandardScalerStep(), LOFStep(kwargs={'contamination':0.1}), PCAStep(kwargs={'n_components':3})])
+        self.pipeline.fit(self.X, self.y)
+        self.expected = self.pipeline.transform(self.X, allow_sample_removal=False)
+
+    # Tests that concurrent requests are batched and every caller gets its own row
+    def test_batches(self):
+        async def run():
+            async with AsyncPipelineRunner(self.pipeline, max_batch=32, max_wait_ms=5) as runner:
+                records = [self.X.iloc[i].to_dict() if i % 2 else self.X.iloc[i].to_numpy() for i in range(len(self.X))]
+                rows = await generate_load(runner, records, concurrency=100)
+                return rows, runner.metrics()
+        rows, metrics = asyncio.run(run())
+        result = pd.DataFrame(rows)
+        self.assertEqual(list(result.columns), list(self.expected.columns))
+        np.testing.assert_allclose(result.to_numpy(), self.expected.to_numpy())
+
+        self.assertEqual(metrics['requests'], len(self.X))
+        self.assertLessEqual(metrics['max_batch_size'], 32)
+        self.assertGreater(metrics['mean_batch_size'], 1)
+        self.assertLess(metrics['batches'], len(self.X))
+        self.assertLessEqual(metrics['queue_ms_p50'], metrics['latency_ms_p50'])
+
+    # Tests that a lone request is sent once max_wait_ms has passed, and that a compiled pipeline can be served
+    def test_single_request(self):
+        async def run():
+            with_compiled = AsyncPipelineRunner(self.pipeline.compile(), max_batch=64, max_wait_ms=1)
+            row = await with_compiled.transform(self.X.iloc[7])
+            with_compiled.close()
+            return row, with_compiled.metrics()
+        row, metrics = asyncio.run(run())
+        np.testing.assert_allclose(row.to_numpy(), self.expected.iloc[7].to_numpy())
+        self.assertEqual(metrics['batches'], 1)
+        self.assertEqual(metrics['max_batch_size'], 1)
+
+    # Tests that errors while transforming reach every caller in the batch and that bad records are rejected
+    def test_errors(self):
+        pipeline = Pipeline([FailingStep()])
+        pipeline.input_columns = list(self.X.columns)
+        async def run():
+            async with AsyncPipelineRunner(pipeline, max_batch=4) as runner:
+                return await asyncio.gather(*(runner.transform(self.X.iloc[i]) for i in range(6)), return_exceptions=True)
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+        async def bad_record():
+            async with AsyncPipelineRunner(self.pipeline) as runner:
+                await runner.transform(np.ones(2))
+        self.assertRaises(ValueError, asyncio.run, bad_record())
+        self.assertRaises(ValueError, AsyncPipelineRunner, Pipeline([StandardScalerStep()]))
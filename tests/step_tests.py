@@ -16,6 +16,7 @@ class StepTest(object):
     ## Make sure that the step class has the correct attributes
     def test_attributes(self):
         self.assertTrue(type(self.step.changes_num_samples) == bool)
+        self.assertTrue(type(self.step.row_independent) == bool)
         self.assertTrue(type(self.step.description) == str)
         self.assertTrue(len(self.step.description) > 1)
 